@@ -1,3 +1,34 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from backend.testing import isolated_storage
+from patients.models import Patient
+
+
+@isolated_storage
+class ClinicalDashboardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='clinician', password='secret')
+        Patient.objects.bulk_create([
+            Patient(patient_id=f'T{i:05d}', risk_category=['low', 'medium', 'high'][i % 3])
+            for i in range(30)
+        ])
+
+    def test_query_budget_does_not_grow_with_patients(self):
+        self.client.force_login(self.user)
+        # Session, user, one aggregate over Patient
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('clinical_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_patients'], 30)
+        self.assertEqual(response.context['high_risk_count'], 10)
+        # WSGI can't stream events, so the page doesn't try
+        self.assertContains(response, 'data-live-updates="false"')
+
+    async def test_asgi_pages_enable_live_updates(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('clinical_dashboard'))
+        self.assertContains(response, 'data-live-updates="true"')
@@ -4,11 +4,12 @@ from django.contrib import messages
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.http import HttpResponseForbidden
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth import logout
-from patients.models import Patient
+from predictions.summary import patient_stats
 import re
 
 User = get_user_model()
@@ -128,14 +129,13 @@ def login_view(request):
 def clinical_dashboard(request):
     """Clinical staff dashboard view"""
     try:
-        # Get all patients
-        patients = Patient.objects.all()
-        
-        # Calculate risk counts
-        high_risk_count = patients.filter(risk_category='high').count()
-        medium_risk_count = patients.filter(risk_category='medium').count()
-        low_risk_count = patients.filter(risk_category='low').count()
-        unknown_risk_count = patients.filter(risk_category='unknown').count()
+        # Calculate risk counts (one aggregate query)
+        stats = patient_stats()
+        risk_distribution = stats['risk_distribution']
+        high_risk_count = risk_distribution['high']
+        medium_risk_count = risk_distribution['medium']
+        low_risk_count = risk_distribution['low']
+        unknown_risk_count = risk_distribution['unknown']
         
         # Create sample alerts
         alerts = [
@@ -153,33 +153,18 @@ def clinical_dashboard(request):
             }
         ]
         
-        # Prepare patient data for template
-        patient_data = []
-        for patient in patients:
-            patient_info = {
-                'id': patient.id,
-                'first_name': getattr(patient, 'first_name', 'Patient'),
-                'last_name': getattr(patient, 'last_name', f'#{patient.id}'),
-                'patient_id': getattr(patient, 'patient_id', f'P{patient.id:04d}'),
-                'age': getattr(patient, 'age', 0),
-                'risk_category': getattr(patient, 'risk_category', 'unknown'),
-                'ml_risk_score': getattr(patient, 'ml_risk_score', 0),
-                'risk_score': int(getattr(patient, 'ml_risk_score', 0) * 100),  # Convert to percentage for display
-                'last_visit': getattr(patient, 'last_visit', None),
-                'length_of_stay': getattr(patient, 'length_of_stay', 0),
-                'previous_admissions': getattr(patient, 'previous_admissions', 0),
-            }
-            patient_data.append(patient_info)
-        
+        # The patient list itself is paged in by the browser from the patient list API
         context = {
-            'patients': patient_data,
+            'total_patients': stats['total_patients'],
             'high_risk_count': high_risk_count,
             'medium_risk_count': medium_risk_count,
             'low_risk_count': low_risk_count,
             'alerts': alerts,
+            # Live updates are only streamed by the ASGI server
+            'live_updates': isinstance(request, ASGIRequest),
         }
         
-        return render(request, 'patients/clinical-dashboard.html', context)
+        return render(request, 'clinical-dashboard.html', context)
         
     except Exception as e:
         # Fallback context if there's an error
@@ -189,7 +174,7 @@ def clinical_dashboard(request):
         
         # Provide fallback data
         context = {
-            'patients': [],
+            'total_patients': 0,
             'high_risk_count': 0,
             'medium_risk_count': 0,
             'low_risk_count': 0,
@@ -201,7 +186,8 @@ def clinical_dashboard(request):
                     'timestamp': timezone.now()
                 }
             ],
-            'error': 'Loading patient data...'
+            'error': 'Loading patient data...',
+            'live_updates': isinstance(request, ASGIRequest),
         }
     return render(request, 'clinical-dashboard.html', context)
 
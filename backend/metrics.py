@@ -0,0 +1,288 @@
+# backend/metrics.py
+import bisect
+import contextvars
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+import weakref
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by view, method and status code'),
+    'http_request_duration_seconds': ('histogram', 'Time spent handling a request, by view'),
+    'http_response_bytes_total': ('counter', 'Response body bytes sent, by view (streamed bodies not counted)'),
+    'http_exceptions_total': ('counter', 'Unhandled exceptions raised by views, by view and exception type'),
+    'db_queries_total': ('counter', 'Database queries run while handling requests, by view'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in database queries while handling requests, by view'),
+}
+
+WORKERS_KEY = 'metrics:workers'
+
+
+class _ShardHolder:
+    """Thread-local owner of a shard; collected when its thread ends"""
+    __slots__ = ('shard', '__weakref__')
+
+    def __init__(self, shard):
+        self.shard = shard
+
+
+class Registry:
+    """Counters and histograms for this process.
+
+    Every thread writes to its own shard, so recording never takes a lock
+    or contends with other threads; the shards are only summed when the
+    metrics are read. When a thread ends its shard is folded into the
+    retired totals, so servers that start a thread per request don't grow
+    the list for ever. Histogram entries are per-bucket counts followed by
+    the observation count and sum.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {'counters': {}, 'histograms': {}}
+        self._keys = itertools.count()
+        # Only taken the first and last time a thread records, and to read
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = self._local.holder = _ShardHolder({'counters': {}, 'histograms': {}})
+            key = next(self._keys)
+            with self._shards_lock:
+                self._shards[key] = holder.shard
+            # The thread's locals, and so the holder, go away when it ends
+            weakref.finalize(holder, self._retire, key)
+        return holder.shard
+
+    def _retire(self, key):
+        with self._shards_lock:
+            shard = self._shards.pop(key, None)
+            if shard is not None:
+                merge(self._retired, shard)
+
+    def inc(self, name, labels, amount=1):
+        counters = self._shard()['counters']
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        histograms = self._shard()['histograms']
+        key = (name, labels)
+        entry = histograms.get(key)
+        if entry is None:
+            entry = histograms[key] = [0] * (len(buckets) + 3)
+        entry[bisect.bisect_left(buckets, value)] += 1
+        entry[-2] += 1
+        entry[-1] += value
+
+    def snapshot(self):
+        """Totals over all threads, as plain dicts safe to pickle"""
+        snapshot = {'counters': {}, 'histograms': {}}
+        with self._shards_lock:
+            # Together, so a shard retired meanwhile isn't counted twice
+            shards = list(self._shards.values())
+            merge(snapshot, self._retired)
+        for shard in shards:
+            # dict() copies in one step, so an owner thread adding a key can't break the loop
+            merge(snapshot, {'counters': dict(shard['counters']), 'histograms': dict(shard['histograms'])})
+        return snapshot
+
+
+def merge(total, snapshot):
+    """Add snapshot's counters and histograms into total"""
+    for key, value in snapshot['counters'].items():
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    for key, entry in snapshot['histograms'].items():
+        existing = total['histograms'].get(key)
+        if existing is None:
+            total['histograms'][key] = list(entry)
+        else:
+            for i, value in enumerate(entry):
+                existing[i] += value
+    return total
+
+
+registry = Registry()
+
+# The in-flight request's stats, seen by the query timer on whichever
+# thread (or sync_to_async executor) runs the request's queries
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+def install_execute_wrapper(wrapper):
+    """Add wrapper to every database connection, current and future, once"""
+    def install(connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    # weak=False: install is a closure nothing else keeps alive
+    connection_created.connect(install, weak=False, dispatch_uid=f'{wrapper.__module__}.{wrapper.__qualname__}')
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+class MetricsMiddleware:
+    """Record latency, status, response size and database work per view"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_execute_wrapper(time_query)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = [0, 0.0]
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = [0, 0.0]
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    def process_exception(self, request, exception):
+        registry.inc('http_exceptions_total', (view_label(request), type(exception).__name__))
+
+    def record(self, request, response, elapsed, stats):
+        view = view_label(request)
+        registry.inc('http_requests_total', (view, request.method, str(response.status_code)))
+        registry.observe('http_request_duration_seconds', (view,), elapsed)
+        if not response.streaming:
+            registry.inc('http_response_bytes_total', (view,), len(response.content))
+        if stats[0]:
+            registry.inc('db_queries_total', (view,), stats[0])
+            registry.inc('db_query_duration_seconds_total', (view,), stats[1])
+        flush_if_due()
+
+
+def view_label(request):
+    # Route names, not paths, keep the number of series bounded
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+_last_flush = {'pid': None, 'at': 0.0}
+
+
+def worker_key():
+    return f'metrics:worker:{socket.gethostname()}:{os.getpid()}'
+
+
+def flush_if_due():
+    interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+    now = time.monotonic()
+    if _last_flush['pid'] == os.getpid() and now - _last_flush['at'] < interval:
+        return
+    _last_flush.update(pid=os.getpid(), at=now)
+    try:
+        flush()
+    except Exception:
+        # Metrics must never fail a request
+        logger.exception('Publishing metrics to the cache failed')
+
+
+def flush():
+    """Publish this worker's totals to the shared cache for /metrics to merge"""
+    timeout = getattr(settings, 'METRICS_RETENTION', 86400)
+    key = worker_key()
+    cache.set(key, registry.snapshot(), timeout)
+    workers = cache.get(WORKERS_KEY) or {}
+    if key not in workers:
+        # Racing workers may drop each other's entry; both re-add on their next flush
+        workers[key] = time.time()
+        cache.set(WORKERS_KEY, workers, timeout)
+
+
+def collect():
+    """Totals across every worker sharing the cache, this one's up to date"""
+    total = {'counters': {}, 'histograms': {}}
+    own = worker_key()
+    workers = cache.get(WORKERS_KEY) or {}
+    others = [key for key in workers if key != own]
+    for snapshot in cache.get_many(others).values():
+        merge(total, snapshot)
+    return merge(total, registry.snapshot())
+
+
+def render(snapshot):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        if metric_type == 'histogram':
+            for (metric, labels), entry in sorted(snapshot['histograms'].items()):
+                if metric != name:
+                    continue
+                label_text = _labels(name, labels)
+                cumulative = 0
+                for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), entry):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_count{{{label_text}}} {entry[-2]}')
+                lines.append(f'{name}_sum{{{label_text}}} {entry[-1]}')
+        else:
+            for (metric, labels), value in sorted(snapshot['counters'].items()):
+                if metric == name:
+                    lines.append(f'{name}{{{_labels(name, labels)}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+LABEL_NAMES = {
+    'http_requests_total': ('view', 'method', 'status'),
+    'http_exceptions_total': ('view', 'exception'),
+}
+
+
+def _labels(name, values):
+    names = LABEL_NAMES.get(name, ('view',))
+    return ','.join(f'{label}="{_escape(value)}"' for label, value in zip(names, values))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,172 @@
+# backend/profiling.py
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils import timezone
+
+from backend.metrics import install_execute_wrapper
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+
+# cProfile can't profile two things at once in a thread, and concurrent
+# profiles would slow the whole worker; extra requests simply aren't profiled
+_busy = threading.Lock()
+
+# (sql, seconds) of the queries run under the active profile, from any thread
+_queries = contextvars.ContextVar('profile_queries', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    queries = _queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.append((sql, time.perf_counter() - started))
+
+
+class Profile:
+    """One profiled request or command and where its results were written"""
+
+    def __init__(self, label):
+        self.label = label
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.started_at = timezone.now()
+        self.elapsed = 0.0
+        self.path = None
+
+    def write(self):
+        """Write <name>.prof (load with pstats or snakeviz) and a <name>.txt summary"""
+        directory = Path(settings.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '-', self.label).strip('-')[:80]
+        name = f'{self.started_at:%Y%m%d-%H%M%S}-{slug}-{os.getpid()}'
+        self.path = directory / f'{name}.prof'
+        self.profiler.dump_stats(self.path)
+        (directory / f'{name}.txt').write_text(self.summary(), encoding='utf-8')
+        return self.path
+
+    def summary(self):
+        top = getattr(settings, 'PROFILE_TOP_N', 30)
+        sql_time = sum(seconds for _, seconds in self.queries)
+        lines = [
+            self.label,
+            f'Started {self.started_at.isoformat()}, wall time {self.elapsed * 1000:.1f}ms, '
+            f'{len(self.queries)} queries in {sql_time * 1000:.1f}ms',
+            '',
+            f'Top {top} statements by total time:',
+        ]
+        by_statement = defaultdict(lambda: [0, 0.0])
+        for sql, seconds in self.queries:
+            # Parameters aren't in sql, so repeats of one statement group together
+            by_statement[sql][0] += 1
+            by_statement[sql][1] += seconds
+        for sql, (count, seconds) in sorted(by_statement.items(), key=lambda item: -item[1][1])[:top]:
+            lines.append(f'{seconds * 1000:9.1f}ms {count:5d}x  {sql}')
+
+        stats_text = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stats_text)
+        stats.sort_stats('cumulative').print_stats(top)
+        lines += ['', stats_text.getvalue()]
+        return '\n'.join(lines)
+
+
+@contextmanager
+def profile(label):
+    """Run the block under cProfile with its SQL recorded, then write the results.
+
+    Yields the Profile, or None if another profile is already running in
+    this process. cProfile only sees the calling thread; queries run on
+    other threads (async views) still appear in the SQL summary.
+    """
+    if not _busy.acquire(blocking=False):
+        yield None
+        return
+    session = Profile(label)
+    install_execute_wrapper(record_query)
+    token = _queries.set(session.queries)
+    started = time.perf_counter()
+    session.profiler.enable()
+    try:
+        yield session
+    finally:
+        session.profiler.disable()
+        session.elapsed = time.perf_counter() - started
+        _queries.reset(token)
+        try:
+            session.write()
+        finally:
+            _busy.release()
+
+
+class ProfilingMiddleware:
+    """Profile selected requests into PROFILE_DIR when PROFILING_ENABLED.
+
+    A request is profiled when a staff user sends ``X-Profile: 1`` or
+    ``?profile=1``, or at random with probability PROFILE_SAMPLE_RATE.
+    Staff-triggered responses name the written file in ``X-Profile``.
+    Streaming responses are profiled up to the point the view returns.
+    Under ASGI the profiler also sees whatever else the event loop runs
+    while the request awaits, and not the executor threads its queries run
+    on; the SQL summary still covers those queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        requested = self.requested(request)
+        if not (requested or self.sampled()):
+            return self.get_response(request)
+        with profile(f'{request.method} {request.path}') as session:
+            response = self.get_response(request)
+        return self.annotate(response, session, requested)
+
+    async def __acall__(self, request):
+        requested = self.requested(request)
+        if not (requested or self.sampled()):
+            return await self.get_response(request)
+        with profile(f'{request.method} {request.path}') as session:
+            response = await self.get_response(request)
+        return self.annotate(response, session, requested)
+
+    def requested(self, request):
+        if not settings.PROFILING_ENABLED:
+            return False
+        if request.META.get(PROFILE_HEADER) != '1' and request.GET.get(PROFILE_PARAM) != '1':
+            return False
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_authenticated
+                    and (user.is_staff or getattr(user, 'role', '') in ('admin', 'staff')))
+
+    def sampled(self):
+        rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0.0)
+        return settings.PROFILING_ENABLED and rate > 0 and random.random() < rate
+
+    def annotate(self, response, session, requested):
+        if requested:
+            response['X-Profile'] = session.path.name if session else 'skipped: another profile is running'
+        return response
@@ -41,10 +41,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # <- serve static files in production
+    'backend.metrics.MetricsMiddleware',  # per-view latency and query counts for /metrics
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'backend.profiling.ProfilingMiddleware',  # opt-in cProfile of selected requests
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -104,6 +106,86 @@ STATICFILES_DIRS = [BASE_DIR / 'static']  # local development
 STATIC_ROOT = BASE_DIR / 'staticfiles'    # production (Railway/Render)
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Uploaded files (trained model artifacts)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", BASE_DIR / 'media'))
+
+# Cache shared by all workers on a host; set CACHE_BACKEND/CACHE_LOCATION
+# to point several hosts at e.g. Redis or Memcached
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv("CACHE_LOCATION", str(BASE_DIR / 'var' / 'cache')),
+    }
+}
+# Seconds a rendered dashboard payload is kept; writes to predictions,
+# models and patients invalidate it sooner
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", "300"))
+# Serve the dashboard tab APIs from their async views, which run each tab's
+# queries concurrently; only worth it under the ASGI entry point
+DASHBOARD_ASYNC_VIEWS = os.getenv("DASHBOARD_ASYNC_VIEWS", "False") == "True"
+
+# Prediction models
+PREDICTION_MODEL_CACHE_SIZE = int(os.getenv("PREDICTION_MODEL_CACHE_SIZE", "2"))  # loaded artifacts kept per worker
+PREDICTION_MODEL_MMAP_MODE = os.getenv("PREDICTION_MODEL_MMAP_MODE", "r") or None  # share artifact arrays across workers
+PREDICTION_MODEL_WARM_UP = os.getenv("PREDICTION_MODEL_WARM_UP", "True") == "True"  # load active model at startup
+# "eager": bulk scoring stores top factors; "lazy": computed when a result is opened
+PREDICTION_EXPLANATIONS = os.getenv("PREDICTION_EXPLANATIONS", "eager")
+# patient_id numbers fetched from the database sequence at a time per process
+PATIENT_ID_BLOCK_SIZE = int(os.getenv("PATIENT_ID_BLOCK_SIZE", "100"))
+# Dashboard prediction counts from the incrementally maintained RiskSummary
+# table; False computes them from PredictionResult with one aggregate query
+PREDICTION_SUMMARY_ENABLED = os.getenv("PREDICTION_SUMMARY_ENABLED", "True") == "True"
+# PredictionResult history kept by `manage.py compact_prediction_history`:
+# everything from the last DETAIL_DAYS, then one prediction per patient per
+# SNAPSHOT_DAYS period
+PREDICTION_HISTORY_DETAIL_DAYS = int(os.getenv("PREDICTION_HISTORY_DETAIL_DAYS", "90"))
+PREDICTION_HISTORY_SNAPSHOT_DAYS = int(os.getenv("PREDICTION_HISTORY_SNAPSHOT_DAYS", "30"))
+# Measured prediction latency shown on the analytics tab: per-worker timings
+# are written to PredictionTiming every FLUSH_INTERVAL seconds and averaged
+# over the last WINDOW_HOURS
+PREDICTION_TELEMETRY_FLUSH_INTERVAL = float(os.getenv("PREDICTION_TELEMETRY_FLUSH_INTERVAL", "30"))
+PREDICTION_TELEMETRY_WINDOW_HOURS = int(os.getenv("PREDICTION_TELEMETRY_WINDOW_HOURS", "24"))
+PREDICTION_TELEMETRY_RETENTION_DAYS = int(os.getenv("PREDICTION_TELEMETRY_RETENTION_DAYS", "30"))
+# Seconds between checks for new predictions to push to dashboard event streams
+PREDICTION_EVENTS_INTERVAL = float(os.getenv("PREDICTION_EVENTS_INTERVAL", "1.0"))
+
+# Bulk prediction jobs: run on a thread in the web process, or only via
+# `manage.py run_prediction_jobs` when set to False
+PREDICTION_JOBS_IN_PROCESS = os.getenv("PREDICTION_JOBS_IN_PROCESS", "True") == "True"
+PREDICTION_JOB_THREADS = int(os.getenv("PREDICTION_JOB_THREADS", "1"))
+# A running job whose worker hasn't reported progress for this many seconds
+# is marked failed (each chunk of BULK_CHUNK_SIZE patients reports)
+PREDICTION_JOB_TIMEOUT = int(os.getenv("PREDICTION_JOB_TIMEOUT", "600"))
+
+# Columnar patient feature store read by the scoring and training paths;
+# build it with `manage.py build_feature_store`
+FEATURE_STORE_ENABLED = os.getenv("FEATURE_STORE_ENABLED", "True") == "True"
+FEATURE_STORE_DIR = Path(os.getenv("FEATURE_STORE_DIR", BASE_DIR / 'var' / 'feature_store'))
+
+# Model training runs in a separate process pool, outside the web workers
+MODEL_TRAINING_PROCESSES = int(os.getenv("MODEL_TRAINING_PROCESSES", "1"))
+
+# A model still training after this many seconds is marked failed; its
+# process went away with a restarted or redeployed web worker
+MODEL_TRAINING_TIMEOUT = int(os.getenv("MODEL_TRAINING_TIMEOUT", "3600"))
+
+# Request metrics served at /metrics in Prometheus format. Each worker
+# publishes its totals to the cache every METRICS_FLUSH_INTERVAL seconds
+# so a scrape of any worker covers them all. Scrapers send METRICS_TOKEN
+# as a bearer token (Prometheus `authorization`); unset, only staff may read
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "10"))
+
+# Opt-in request profiling: when enabled, staff can profile a request with
+# an `X-Profile: 1` header or `?profile=1`, and PROFILE_SAMPLE_RATE of all
+# requests are profiled at random. Profiles and top-N summaries (functions
+# and SQL) go to PROFILE_DIR; see also `manage.py profile_command`
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", BASE_DIR / 'var' / 'profiles'))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "30"))
+
 # Default primary key
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,40 @@
+# backend/testing.py
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+
+from patients.models import Patient
+from predictions import summary
+from predictions.models import MLModel, PredictionResult
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Keeps rows written by tests out of the developer's var/cache and
+# var/feature_store. The directory stays empty, so the feature store counts
+# as not built and the save signals leave it alone. The long telemetry
+# interval keeps flush timers from writing outside the test transactions.
+TEST_FEATURE_STORE = tempfile.TemporaryDirectory(prefix='test-feature-store-')
+isolated_storage = override_settings(
+    CACHES=LOCMEM_CACHES, FEATURE_STORE_DIR=Path(TEST_FEATURE_STORE.name),
+    PREDICTION_TELEMETRY_FLUSH_INTERVAL=3600,
+)
+
+
+def create_dataset(patients=30):
+    """An active model plus scored patients, each with two predictions"""
+    ml_model = MLModel.objects.create(name='Baseline', model_type='logistic', version='1.0', is_active=True)
+    categories = ['low', 'medium', 'high']
+    Patient.objects.bulk_create([
+        Patient(patient_id=f'T{i:05d}', first_name='Test', last_name=f'Patient{i}', age=40 + i,
+                length_of_stay=i % 9, ml_risk_score=(i % 10) / 10, risk_category=categories[i % 3])
+        for i in range(patients)
+    ])
+    PredictionResult.objects.bulk_create([
+        PredictionResult(patient=patient, ml_model=ml_model, risk_score=patient.ml_risk_score,
+                         risk_category=patient.risk_category, confidence=0.85, top_factors={})
+        for patient in Patient.objects.all()
+        for _ in range(2)
+    ])
+    summary.rebuild()
+    return ml_model
@@ -0,0 +1,123 @@
+import gc
+import io
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from backend import metrics
+from backend.testing import create_dataset, isolated_storage
+
+
+@isolated_storage
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_dataset(patients=3)
+
+    def setUp(self):
+        # A cached payload would be served without queries
+        cache.clear()
+
+    def test_requests_are_recorded_per_view(self):
+        before = metrics.registry.snapshot()
+        self.client.get(reverse('predictions:api_models'))
+        after = metrics.registry.snapshot()
+
+        key = ('http_requests_total', ('predictions:api_models', 'GET', '200'))
+        self.assertEqual(after['counters'][key] - before['counters'].get(key, 0), 1)
+        queries = ('db_queries_total', ('predictions:api_models',))
+        self.assertGreaterEqual(after['counters'][queries] - before['counters'].get(queries, 0), 1)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_prometheus_output(self):
+        self.client.get(reverse('predictions:api_models'))
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="predictions:api_models",le="+Inf"}', body)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_scrapes_need_the_token_or_staff(self):
+        url = reverse('metrics')
+        # Loopback proves nothing behind a same-host proxy
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        with self.settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+        self.client.force_login(CustomUser.objects.create_user(username='ops', password='secret', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_shards_of_finished_threads_are_retired(self):
+        registry = metrics.Registry()
+        registry.inc('http_requests_total', ('view', 'GET', '200'))
+
+        def record():
+            registry.inc('http_requests_total', ('view', 'GET', '200'))
+            registry.observe('http_request_duration_seconds', ('view',), 0.2)
+
+        for _ in range(20):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+        gc.collect()
+
+        self.assertEqual(len(registry._shards), 1)
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['counters'][('http_requests_total', ('view', 'GET', '200'))], 21)
+        self.assertEqual(snapshot['histograms'][('http_request_duration_seconds', ('view',))][-2], 20)
+
+
+@isolated_storage
+@override_settings(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=0)
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_dataset(patients=3)
+        cls.staff = CustomUser.objects.create_user(username='ops', password='pw', is_staff=True)
+        cls.clinician = CustomUser.objects.create_user(username='doc', password='pw')
+
+    def setUp(self):
+        cache.clear()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        settings_override = override_settings(PROFILE_DIR=self.profile_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_staff_can_profile_a_request(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('predictions:api_models'), HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+
+        written = sorted(os.listdir(self.profile_dir))
+        self.assertEqual(written, [response['X-Profile'], response['X-Profile'].replace('.prof', '.txt')])
+        pstats.Stats(os.path.join(self.profile_dir, written[0]))
+        with open(os.path.join(self.profile_dir, written[1])) as summary:
+            text = summary.read()
+        self.assertIn(f"GET {reverse('predictions:api_models')}", text)
+        self.assertIn('1 queries', text)
+        self.assertIn('FROM "predictions_mlmodel"', text)
+
+    def test_other_users_cannot_trigger_profiling(self):
+        self.client.force_login(self.clinician)
+        response = self.client.get(reverse('predictions:api_models') + '?profile=1')
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_profile_command(self):
+        out = io.StringIO()
+        call_command('profile_command', 'rebuild_risk_summary', stdout=out)
+        self.assertIn('profile written to', out.getvalue())
+        self.assertEqual(len(os.listdir(self.profile_dir)), 2)
@@ -5,6 +5,7 @@ from backend import views   # import the views from backend/views.py
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.home, name='home'),
+    path('metrics', views.metrics, name='metrics'),
     path('patients/', include('patients.urls')),  # routes all /patients/... to patients app
     path('login/', views.login_page, name='login'),
     path('register/', views.register_page, name='register'),
@@ -1,5 +1,11 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from backend import metrics as request_metrics
+
 def home(request):
     return render(request, 'index.html')
 
@@ -9,5 +15,21 @@ def login_page(request):
 def register_page(request):
     return render(request, 'register.html')
 
+def metrics(request):
+    """Prometheus scrape endpoint; METRICS_TOKEN bearer token or staff only.
 
+    Client addresses aren't trusted: behind a same-host proxy every request
+    arrives from loopback.
+    """
+    user = request.user
+    is_staff = user.is_authenticated and (user.is_staff or getattr(user, 'role', '') in ('admin', 'staff'))
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    has_token = bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode())
+    if not (has_token or is_staff):
+        return JsonResponse({'success': False, 'error': 'Forbidden'}, status=403)
 
+    return HttpResponse(
+        request_metrics.render(request_metrics.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
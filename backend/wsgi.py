@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Load the active prediction model now so gunicorn's preloaded master shares
+# it with the workers it forks
+from predictions.model_cache import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,5 @@
+# gunicorn.conf.py
+# Import the application in the master before forking so the active
+# prediction model (memory-mapped by predictions.model_cache.warm_up) is
+# loaded once and its pages are shared by all workers.
+preload_app = True
@@ -0,0 +1,131 @@
+# patients/bulk_insert.py
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from django.db import connection, transaction
+
+# Rows sent per COPY / executemany round trip
+INSERT_CHUNK_SIZE = 10000
+
+
+def insert_rows(model, fields, rows, chunk_size=INSERT_CHUNK_SIZE):
+    """Insert plain value tuples into model's table as fast as the backend allows.
+
+    ``rows`` is an iterable of tuples aligned with ``fields`` (field names).
+    PostgreSQL streams them with ``COPY ... FROM STDIN``; other backends use
+    one ``executemany`` INSERT per chunk. Unlike ``bulk_create`` no model
+    instances are built and ``auto_now``/``auto_now_add`` values are taken
+    as given, which is what bulk loaders of historical data need. Returns
+    the number of rows written.
+    """
+    model_fields = [model._meta.get_field(name) for name in fields]
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [field.column for field in model_fields]
+    written = 0
+
+    with connection.cursor() as cursor:
+        for chunk in _chunks(rows, chunk_size):
+            if connection.vendor == 'postgresql':
+                copy_rows(cursor, table, columns, chunk)
+            else:
+                quoted = ', '.join(connection.ops.quote_name(column) for column in columns)
+                placeholders = ', '.join(['%s'] * len(columns))
+                cursor.executemany(
+                    f'INSERT INTO {table} ({quoted}) VALUES ({placeholders})',
+                    [
+                        [field.get_db_prep_save(value, connection) for field, value in zip(model_fields, row)]
+                        for row in chunk
+                    ],
+                )
+            written += len(chunk)
+    return written
+
+
+def upsert_rows(model, fields, rows, unique_field, update_fields):
+    """Insert rows, or update ``update_fields`` of rows whose ``unique_field`` already exists.
+
+    ``rows`` is a list of tuples aligned with ``fields`` holding at most one
+    row per unique value. PostgreSQL COPYs them into a temporary table and
+    merges with ``INSERT ... ON CONFLICT``; other backends use
+    ``bulk_create(update_conflicts=True)``.
+    """
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_create(
+            [model(**dict(zip(fields, row))) for row in rows],
+            update_conflicts=True,
+            unique_fields=[unique_field],
+            update_fields=update_fields,
+        )
+        return len(rows)
+
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    staging = quote(f'{model._meta.db_table}_upsert')
+    columns = [model._meta.get_field(name).column for name in fields]
+    quoted = ', '.join(quote(column) for column in columns)
+    updates = ', '.join(
+        f'{quote(column)} = EXCLUDED.{quote(column)}'
+        for column in (model._meta.get_field(name).column for name in update_fields)
+    )
+    conflict = quote(model._meta.get_field(unique_field).column)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Same column types as the target, none of its constraints; dropped
+        # when the transaction ends
+        cursor.execute(f'DROP TABLE IF EXISTS {staging}')
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS SELECT {quoted} FROM {table} WITH NO DATA'
+        )
+        copy_rows(cursor, staging, columns, rows)
+        cursor.execute(
+            f'INSERT INTO {table} ({quoted}) SELECT {quoted} FROM {staging} '
+            f'ON CONFLICT ({conflict}) DO UPDATE SET {updates}'
+        )
+    return len(rows)
+
+
+def copy_rows(cursor, table, columns, rows):
+    """COPY rows into an already quoted table name (PostgreSQL only).
+
+    Works with both psycopg 3 (``cursor.copy``) and psycopg2
+    (``cursor.copy_expert``); values are serialized as CSV.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(value) for value in row])
+
+    quoted = ', '.join(connection.ops.quote_name(column) for column in columns)
+    sql = f"COPY {table} ({quoted}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    raw = cursor.cursor
+    if hasattr(raw, 'copy'):
+        with raw.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+    else:
+        buffer.seek(0)
+        raw.copy_expert(sql, buffer)
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,121 @@
+# patients/identifiers.py
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import PatientIdCounter
+
+SEQUENCE_NAME = 'patients_patient_number_seq'
+COUNTER_NAME = 'patient_id'
+# The shape of allocated IDs; explicit IDs like this must not be handed out again
+NUMBERED_ID = re.compile(r'^P(\d+)$')
+
+_lock = threading.Lock()
+# Numbers drawn from the sequence but not handed out yet, per process
+_block = {'pid': None, 'next': 0, 'end': 0}
+
+
+def format_patient_id(number):
+    return f'P{number:04d}'
+
+
+def allocate_patient_numbers(count):
+    """Reserve ``count`` unused patient numbers and return them as a list.
+
+    PostgreSQL draws them from a sequence. Sequences ignore transactions, so
+    single numbers are fetched in blocks of ``PATIENT_ID_BLOCK_SIZE`` and
+    handed out from a per-process cache; bulk requests take exactly what
+    they need. Numbers are unique but not gap-free. Other databases bump a
+    counter row inside the caller's transaction, which serializes writers
+    but rolls back together with the inserts that used the numbers.
+    """
+    if count <= 0:
+        return []
+    if connection.vendor != 'postgresql':
+        return _counter_numbers(count)
+
+    block_size = getattr(settings, 'PATIENT_ID_BLOCK_SIZE', 100)
+    if count >= block_size:
+        return _sequence_numbers(count)
+
+    with _lock:
+        if _block['pid'] != os.getpid():
+            # Forked workers must not share the parent's cached numbers
+            _block.update(pid=os.getpid(), next=0, end=0)
+        if _block['end'] - _block['next'] < count:
+            numbers = _sequence_numbers(block_size)
+            # nextval() over a series is ascending, but concurrent callers
+            # may interleave; only a contiguous run can be cached as a range
+            if numbers[-1] - numbers[0] != len(numbers) - 1:
+                return numbers[:count]
+            _block.update(next=numbers[0], end=numbers[-1] + 1)
+        start = _block['next']
+        _block['next'] += count
+    return list(range(start, start + count))
+
+
+def next_patient_id():
+    """A fresh patient_id for a single new patient"""
+    return format_patient_id(allocate_patient_numbers(1)[0])
+
+
+def assign_patient_ids(patients):
+    """Give every Patient instance without a patient_id a fresh one, in one allocation"""
+    reserve_patient_ids(patient.patient_id for patient in patients if patient.patient_id)
+    missing = [patient for patient in patients if not patient.patient_id]
+    for patient, number in zip(missing, allocate_patient_numbers(len(missing))):
+        patient.patient_id = format_patient_id(number)
+
+
+def reserve_patient_ids(patient_ids):
+    """Move the allocator past the highest ``P<number>`` among explicitly written IDs.
+
+    Call before writing IDs that didn't come from the allocator (imports,
+    the admin, fixtures), so later allocations can't collide with them.
+    PostgreSQL moves the sequence with ``setval``, which like ``nextval``
+    ignores transactions, and skips this process's cached block past the
+    ID; blocks already cached by other processes were drawn before the
+    move and can only collide if an explicit ID lands inside them.
+    """
+    numbers = [int(match.group(1)) for match in map(NUMBERED_ID.match, patient_ids) if match]
+    if not numbers:
+        return
+    highest = max(numbers)
+    if connection.vendor != 'postgresql':
+        counter = PatientIdCounter.objects.filter(name=COUNTER_NAME)
+        with transaction.atomic():
+            if not counter.update(next_value=Greatest(F('next_value'), highest + 1)):
+                PatientIdCounter.objects.get_or_create(name=COUNTER_NAME, defaults={'next_value': highest + 1})
+                counter.update(next_value=Greatest(F('next_value'), highest + 1))
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT setval(%s::regclass, GREATEST(last_value, %s)) FROM {SEQUENCE_NAME}',
+            [SEQUENCE_NAME, highest],
+        )
+    with _lock:
+        if _block['pid'] == os.getpid() and _block['end'] > highest:
+            _block.update(next=max(_block['next'], highest + 1))
+
+
+def _sequence_numbers(count):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT nextval(%s::regclass) FROM generate_series(1, %s)', [SEQUENCE_NAME, count])
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _counter_numbers(count):
+    counter = PatientIdCounter.objects.filter(name=COUNTER_NAME)
+    with transaction.atomic():
+        # The UPDATE takes the write lock before we read the new value back
+        if not counter.update(next_value=F('next_value') + count):
+            PatientIdCounter.objects.get_or_create(name=COUNTER_NAME, defaults={'next_value': 1})
+            counter.update(next_value=F('next_value') + count)
+        end = counter.values_list('next_value', flat=True).get()
+    return list(range(end - count, end))
@@ -0,0 +1,150 @@
+# patients/importer.py
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+
+from .models import Patient
+
+# Patient fields an EHR extract may provide; risk fields are ours to compute
+IMPORT_FIELDS = [
+    'patient_id', 'first_name', 'last_name', 'age', 'last_visit', 'previous_admissions',
+    'chronic_conditions', 'medication_count', 'lab_abnormalities', 'vital_signs', 'length_of_stay',
+    'time_since_last_discharge', 'social_support_score', 'transportation_access',
+]
+
+JSON_FIELDS = {'chronic_conditions': list, 'lab_abnormalities': dict, 'vital_signs': dict}
+
+# Inclusive bounds for numeric fields
+RANGES = {
+    'age': (0, 130),
+    'previous_admissions': (0, 1000),
+    'medication_count': (0, 1000),
+    'length_of_stay': (0, 3650),
+    'time_since_last_discharge': (0, 36500),
+    'social_support_score': (0, 5),
+}
+
+BOOLEAN_STRINGS = {
+    'true': True, 't': True, 'yes': True, 'y': True, '1': True,
+    'false': False, 'f': False, 'no': False, 'n': False, '0': False,
+}
+
+
+class RowError(ValueError):
+    """A source row that can't be mapped onto Patient"""
+
+
+def read_csv(path, chunk_size, delimiter=','):
+    """Yield lists of (line number, row dict) from a CSV file, chunk_size rows at a time"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        chunk = []
+        for row in reader:
+            chunk.append((reader.line_num, row))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def read_parquet(path, chunk_size):
+    """Yield lists of (row number, row dict) from a Parquet file, one record batch at a time"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Reading Parquet files requires pyarrow (pip install pyarrow)')
+
+    def chunks():
+        row_number = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            rows = batch.to_pylist()
+            yield list(enumerate(rows, start=row_number + 1))
+            row_number += len(rows)
+
+    return chunks()
+
+
+def column_mapping(source_columns, overrides=None):
+    """Map source column names onto IMPORT_FIELDS.
+
+    Columns match fields by name, ignoring case and surrounding spaces;
+    ``overrides`` ({source column: field}) takes precedence. Unknown source
+    columns are ignored. Raises ValueError if patient_id isn't mapped.
+    """
+    overrides = overrides or {}
+    unknown = set(overrides.values()) - set(IMPORT_FIELDS)
+    if unknown:
+        raise ValueError(f'Cannot import into: {", ".join(sorted(unknown))}')
+
+    mapping = {}
+    for column in source_columns:
+        field = overrides.get(column, column.strip().lower())
+        if field in IMPORT_FIELDS:
+            mapping[column] = field
+    if 'patient_id' not in mapping.values():
+        raise ValueError('The source has no patient_id column')
+    return mapping
+
+
+def clean_row(row, mapping):
+    """Validate one source row and return {field: value} for the mapped fields.
+
+    A blank patient_id is returned as None: the row is a new patient and
+    gets an allocated ID when it is written.
+    """
+    cleaned = {}
+    for column, field_name in mapping.items():
+        value = row.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        try:
+            cleaned[field_name] = clean_value(field_name, value)
+        except (ValidationError, ValueError, TypeError) as e:
+            message = '; '.join(e.messages) if isinstance(e, ValidationError) else str(e)
+            raise RowError(f'{column}: {message}')
+    return cleaned
+
+
+def clean_value(field_name, value):
+    field = Patient._meta.get_field(field_name)
+    if value is None or value == '':
+        if field.null:
+            return None
+        return field.get_default()
+
+    if field_name in JSON_FIELDS:
+        # Empty lists and objects are valid, so skip the blank check in clean()
+        return _parse_json_field(field_name, value)
+    if field.get_internal_type() == 'BooleanField' and isinstance(value, str):
+        value = BOOLEAN_STRINGS.get(value.lower(), value)
+    if field.get_internal_type() == 'IntegerField' and isinstance(value, str):
+        # Extracts often write integers as floats ("3.0")
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f'{value!r} is not a whole number')
+        value = int(number)
+
+    value = field.clean(value, None)
+    if field_name in RANGES:
+        low, high = RANGES[field_name]
+        if not low <= value <= high:
+            raise ValueError(f'{value} is outside {low}-{high}')
+    return value
+
+
+def _parse_json_field(field_name, value):
+    expected = JSON_FIELDS[field_name]
+    if isinstance(value, str):
+        if value[:1] in '[{':
+            value = json.loads(value)
+        elif expected is list:
+            # Plain lists are written as "diabetes;copd" or "diabetes|copd"
+            separator = ';' if ';' in value else '|'
+            value = [item.strip() for item in value.split(separator) if item.strip()]
+        else:
+            raise ValueError('expected a JSON object')
+    if not isinstance(value, expected):
+        raise ValueError(f'expected a JSON {"array" if expected is list else "object"}')
+    return value
@@ -1,14 +1,65 @@
 # patients/management/commands/create_sample_patients.py
-from django.core.management.base import BaseCommand
+import json
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from patients.bulk_insert import INSERT_CHUNK_SIZE, insert_rows
+from patients.identifiers import allocate_patient_numbers, format_patient_id
 from patients.models import Patient
+from patients.synthetic import feature_matrix, generate_patients, merge_distributions
 from django.utils import timezone
 
+PATIENT_FIELDS = [
+    'patient_id', 'first_name', 'last_name', 'age', 'last_visit', 'previous_admissions',
+    'chronic_conditions', 'medication_count', 'lab_abnormalities', 'vital_signs', 'length_of_stay',
+    'time_since_last_discharge', 'social_support_score', 'transportation_access',
+    'ml_risk_score', 'risk_category', 'last_prediction_date',
+]
+
+HISTORY_FIELDS = [
+    'patient', 'ml_model', 'risk_score', 'risk_category', 'confidence', 'top_factors', 'fingerprint', 'created_at',
+]
+
 class Command(BaseCommand):
     help = 'Create sample patient data for testing'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int,
+                            help='Generate this many synthetic patients instead of the three samples')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed, so the same dataset can be regenerated')
+        parser.add_argument('--distributions',
+                            help='JSON file overriding entries of patients.synthetic.DISTRIBUTIONS, '
+                                 'e.g. {"age": {"mean": 70}}')
+        parser.add_argument('--history', type=int, default=0,
+                            help='Synthetic PredictionResult rows per patient (0 = none)')
+        parser.add_argument('--history-days', type=int, default=365,
+                            help='Spread the prediction history over this many past days')
+        parser.add_argument('--chunk-size', type=int, default=INSERT_CHUNK_SIZE,
+                            help='Patients generated and written per round trip')
+
     def handle(self, *args, **options):
+        if options['count'] is None:
+            return self.create_samples()
+
+        overrides = None
+        if options['distributions']:
+            with open(options['distributions']) as f:
+                overrides = json.load(f)
+        try:
+            distributions = merge_distributions(overrides)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.generate(options['count'], distributions, options)
+
+    def create_samples(self):
         sample_patients = [
             {
+                'patient_id': 'SAMPLE-1',
                 'first_name': 'John',
                 'last_name': 'Smith',
                 'age': 65,
@@ -21,6 +72,7 @@ class Command(BaseCommand):
                 'risk_category': 'high'
             },
             {
+                'patient_id': 'SAMPLE-2',
                 'first_name': 'Maria',
                 'last_name': 'Garcia',
                 'age': 45,
@@ -33,6 +85,7 @@ class Command(BaseCommand):
                 'risk_category': 'low'
             },
             {
+                'patient_id': 'SAMPLE-3',
                 'first_name': 'Robert',
                 'last_name': 'Johnson',
                 'age': 58,
@@ -45,14 +98,131 @@ class Command(BaseCommand):
                 'risk_category': 'medium'
             }
         ]
-        
+
         for patient_data in sample_patients:
+            # Keyed on a fixed patient_id: synthetic patients can share these names
             patient, created = Patient.objects.get_or_create(
-                first_name=patient_data['first_name'],
-                last_name=patient_data['last_name'],
+                patient_id=patient_data['patient_id'],
                 defaults=patient_data
             )
             if created:
                 self.stdout.write(
                     self.style.SUCCESS(f'Created patient: {patient.first_name} {patient.last_name}')
-                )
\ No newline at end of file
+                )
+
+    def generate(self, count, distributions, options):
+        # Imported here: the predictions app depends on patients, not the other way round
+        from predictions.dashboard_cache import bump_data_version
+        from predictions.feature_store import get_store
+        from predictions.models import MLModel, PredictionResult
+        from predictions.services import ReadmissionPredictor
+        from predictions.summary import record_predictions
+
+        rng = np.random.default_rng(options['seed'])
+        store = get_store()
+        history_model = None
+        if options['history']:
+            history_model, _ = MLModel.objects.get_or_create(
+                name='Synthetic history', version='synthetic',
+                defaults={'model_type': 'logistic', 'status': 'ready'},
+            )
+        predictor = ReadmissionPredictor()
+
+        started = time.perf_counter()
+        created = 0
+        history_rows = 0
+
+        while created < count:
+            size = min(options['chunk_size'], count - created)
+            columns = generate_patients(size, rng, distributions)
+            X = feature_matrix(columns)
+            patient_ids = [format_patient_id(number) for number in allocate_patient_numbers(size)]
+
+            history = None
+            risk = [(0.0, 'unknown', None)] * size
+            if history_model:
+                history = self.synthetic_history(predictor, X, rng, options['history'], options['history_days'])
+                risk = history['latest']
+
+            rows = (
+                (
+                    patient_id, first_name, last_name, age, last_visit, admissions, conditions,
+                    medications, {}, {}, stay, since_discharge, social_support, transportation,
+                    risk_score, risk_category, prediction_date,
+                )
+                for (patient_id, first_name, last_name, age, last_visit, admissions, conditions,
+                     medications, stay, since_discharge, social_support, transportation,
+                     (risk_score, risk_category, prediction_date)) in zip(
+                    patient_ids, columns['first_name'], columns['last_name'], columns['age'].tolist(),
+                    columns['last_visit'], columns['previous_admissions'].tolist(), columns['chronic_conditions'],
+                    columns['medication_count'].tolist(), columns['length_of_stay'].tolist(),
+                    columns['time_since_last_discharge'], columns['social_support_score'].tolist(),
+                    columns['transportation_access'].tolist(), risk,
+                )
+            )
+
+            with transaction.atomic():
+                insert_rows(Patient, PATIENT_FIELDS, rows, chunk_size=size)
+                # Bulk inserts bypass the signal that invalidates the dashboard cache
+                bump_data_version()
+                # COPY doesn't return keys; look them up by the generated patient_id
+                pks = dict(Patient.objects.filter(patient_id__in=patient_ids).values_list('patient_id', 'id'))
+                pks = np.array([pks[patient_id] for patient_id in patient_ids], dtype=np.int64)
+                if history:
+                    history_rows += insert_rows(
+                        PredictionResult, HISTORY_FIELDS, self.history_rows(pks, history_model.pk, history)
+                    )
+                    record_predictions(
+                        history_model.pk,
+                        [category for row in history['categories'] for category in row],
+                        [score for row in history['scores'] for score in row],
+                        [confidence for confidence in history['confidences'] for _ in range(options['history'])],
+                    )
+
+            # Bulk inserts bypass the post_save signal that maintains the store
+            if store is not None and store.exists():
+                store.update(pks, X)
+
+            created += size
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{created}/{count} patients ({created / elapsed:,.0f}/s)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} synthetic patients and {history_rows} prediction results '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def synthetic_history(self, predictor, X, rng, per_patient, days):
+        """Drift each patient's current rule-based score back through time.
+
+        The most recent entry is the current score itself, so the denormalized
+        risk fields on Patient agree with the latest PredictionResult.
+        """
+        batch = predictor.predict_batch(X, explain=True)
+        n = len(X)
+        now = timezone.now()
+        # Newest first: offset 0 is now, the rest are random past moments
+        offsets = np.sort(rng.random((n, per_patient)) * days, axis=1)
+        offsets[:, 0] = 0
+        drift = np.cumsum(rng.normal(0, 0.05, (n, per_patient)), axis=1)
+        drift[:, 0] = 0
+        scores = np.round(np.clip(batch['risk_scores'][:, None] + drift, 0.05, 0.95), 3)
+        categories = predictor._categorize_batch(scores.ravel()).reshape(scores.shape)
+        created_at = [[now - timedelta(days=offset) for offset in row] for row in offsets.tolist()]
+
+        return {
+            'scores': scores.tolist(),
+            'categories': categories.tolist(),
+            'confidences': np.round(batch['confidences'], 3).tolist(),
+            'top_factors': batch['top_factors'],
+            'created_at': created_at,
+            'latest': list(zip(scores[:, 0].tolist(), categories[:, 0].tolist(), [row[0] for row in created_at])),
+        }
+
+    def history_rows(self, pks, model_id, history):
+        for pk, scores, categories, confidence, factors, created_at in zip(
+            pks.tolist(), history['scores'], history['categories'], history['confidences'],
+            history['top_factors'], history['created_at'],
+        ):
+            for score, category, timestamp in zip(scores, categories, created_at):
+                yield pk, model_id, score, category, confidence, factors, '', timestamp
@@ -0,0 +1,129 @@
+# patients/management/commands/import_patients.py
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from patients.bulk_insert import upsert_rows
+from patients.identifiers import allocate_patient_numbers, format_patient_id, reserve_patient_ids
+from patients.importer import RowError, clean_row, column_mapping, read_csv, read_parquet
+from patients.models import Patient
+
+
+class Command(BaseCommand):
+    help = 'Import (insert or update by patient_id) patients from a CSV or Parquet extract'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or Parquet file to import')
+        parser.add_argument('--format', choices=['csv', 'parquet'],
+                            help='Source format (default: from the file extension)')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows validated and written per transaction')
+        parser.add_argument('--map', action='append', default=[], metavar='COLUMN=FIELD',
+                            help='Map a source column onto a Patient field; may be repeated')
+        parser.add_argument('--delimiter', default=',', help='CSV field delimiter')
+        parser.add_argument('--max-errors', type=int, default=100,
+                            help='Abort after this many invalid rows')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate the file without writing anything')
+
+    def handle(self, *args, **options):
+        # Imported here: the predictions app depends on patients, not the other way round
+        from predictions.dashboard_cache import bump_data_version
+        from predictions.feature_store import get_store
+        from predictions.services import patient_feature_matrix
+
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'{path} does not exist')
+        source_format = options['format'] or ('parquet' if path.suffix.lower() in ('.parquet', '.pq') else 'csv')
+
+        try:
+            overrides = dict(item.split('=', 1) for item in options['map'])
+        except ValueError:
+            raise CommandError('--map expects COLUMN=FIELD')
+
+        if source_format == 'parquet':
+            try:
+                chunks = read_parquet(path, options['chunk_size'])
+            except ImportError as e:
+                raise CommandError(str(e))
+        else:
+            chunks = read_csv(path, options['chunk_size'], delimiter=options['delimiter'])
+
+        # New rows need every column; existing rows only get what the file provides
+        fields = [field.name for field in Patient._meta.concrete_fields if not field.primary_key]
+        defaults = {name: Patient._meta.get_field(name).get_default() for name in fields}
+        store = get_store()
+
+        mapping = None
+        imported = 0
+        errors = 0
+        started = time.perf_counter()
+
+        try:
+            for chunk in chunks:
+                if mapping is None:
+                    try:
+                        mapping = column_mapping(chunk[0][1].keys(), overrides)
+                    except ValueError as e:
+                        raise CommandError(str(e))
+                    update_fields = [field for field in mapping.values() if field != 'patient_id']
+                    self.stdout.write(f'Columns: {", ".join(f"{c} -> {f}" for c, f in mapping.items())}')
+
+                # Later rows for the same patient_id win
+                cleaned = {}
+                unnumbered = []
+                for line, row in chunk:
+                    try:
+                        values = clean_row(row, mapping)
+                    except RowError as e:
+                        errors += 1
+                        self.stderr.write(f'Row {line}: {e}')
+                        if errors > options['max_errors']:
+                            raise CommandError(
+                                f'Aborted after {errors} invalid rows; {imported} rows were already imported'
+                            )
+                        continue
+                    if values.get('patient_id'):
+                        cleaned[values['patient_id']] = values
+                    else:
+                        unnumbered.append(values)
+                
+                # Explicit P<number> IDs first, so new numbers skip past them
+                if cleaned and not options['dry_run']:
+                    reserve_patient_ids(cleaned)
+
+                # New patients without an ID in the extract
+                if unnumbered and not options['dry_run']:
+                    for values, number in zip(unnumbered, allocate_patient_numbers(len(unnumbered))):
+                        values['patient_id'] = format_patient_id(number)
+                        cleaned[values['patient_id']] = values
+
+                if cleaned and not options['dry_run']:
+                    rows = [
+                        tuple(values.get(name, defaults[name]) for name in fields)
+                        for values in cleaned.values()
+                    ]
+                    with transaction.atomic():
+                        upsert_rows(Patient, fields, rows, 'patient_id', update_fields)
+                        bump_data_version()
+
+                    # Bulk writes bypass the post_save signal that maintains the store
+                    if store is not None and store.exists():
+                        store.update(*patient_feature_matrix(Patient.objects.filter(patient_id__in=list(cleaned))))
+
+                imported += len(cleaned) + (len(unnumbered) if options['dry_run'] else 0)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'{imported} rows {"validated" if options["dry_run"] else "imported"} '
+                                  f'({imported / elapsed:,.0f}/s), {errors} rejected')
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+        if mapping is None:
+            raise CommandError(f'{path} has no rows')
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {imported} patients in {time.perf_counter() - started:.1f}s ({errors} rows rejected)'
+        ))
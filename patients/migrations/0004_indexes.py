@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0003_remove_patient_assigned_to_remove_patient_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["risk_category", "ml_risk_score", "id"],
+                name="patient_category_score_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["ml_risk_score", "id"], name="patient_score_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["last_prediction_date", "id"],
+                name="patient_prediction_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:27
+
+import re
+
+from django.db import migrations, models
+
+SEQUENCE_NAME = "patients_patient_number_seq"
+
+
+def next_patient_number(Patient):
+    """First number past every id and every existing P<number> patient_id"""
+    highest = Patient.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    numbered = re.compile(r"^P(\d+)$")
+    for patient_id in (
+        Patient.objects.filter(patient_id__startswith="P")
+        .values_list("patient_id", flat=True)
+        .iterator(chunk_size=10000)
+    ):
+        match = numbered.match(patient_id)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest + 1
+
+
+def create_allocator(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    start = next_patient_number(Patient)
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE_NAME} START WITH {int(start)}"
+        )
+    else:
+        PatientIdCounter = apps.get_model("patients", "PatientIdCounter")
+        PatientIdCounter.objects.create(name="patient_id", next_value=start)
+
+
+def drop_allocator(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {SEQUENCE_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0004_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PatientIdCounter",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("next_value", models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(create_allocator, drop_allocator),
+    ]
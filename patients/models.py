@@ -1,6 +1,14 @@
 # patients/models.py
 from django.db import models
 
+class PatientManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create that assigns patient_id to objects without one, like save() does"""
+        from .identifiers import assign_patient_ids
+        objs = list(objs)
+        assign_patient_ids(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
 class Patient(models.Model):
     # Basic identification fields (ADD THESE)
     first_name = models.CharField(max_length=100, default='Unknown')
@@ -29,13 +37,39 @@ class Patient(models.Model):
     risk_category = models.CharField(max_length=20, default='unknown')
     last_prediction_date = models.DateTimeField(null=True, blank=True)
     
+    objects = PatientManager()
+    
+    class Meta:
+        indexes = [
+            # Risk category counts, and category-filtered lists sorted by score
+            models.Index(fields=['risk_category', 'ml_risk_score', 'id'], name='patient_category_score_idx'),
+            # Patient list sorted by score; unscored patients (score 0) for bulk runs
+            models.Index(fields=['ml_risk_score', 'id'], name='patient_score_idx'),
+            models.Index(fields=['last_prediction_date', 'id'], name='patient_prediction_date_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.first_name} {self.last_name} (ID: {self.patient_id})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_patient_id = instance.__dict__.get('patient_id')
+        return instance
+    
     def save(self, *args, **kwargs):
         # Auto-generate patient ID if not provided
         if not self.patient_id:
-            last_patient = Patient.objects.order_by('-id').first()
-            next_id = (last_patient.id + 1) if last_patient else 1
-            self.patient_id = f"P{next_id:04d}"
-        super().save(*args, **kwargs)
\ No newline at end of file
+            from .identifiers import next_patient_id
+            self.patient_id = next_patient_id()
+        elif self.patient_id != getattr(self, '_saved_patient_id', None):
+            # A new explicit ID (admin, fixtures) must not be allocated again later
+            from .identifiers import reserve_patient_ids
+            reserve_patient_ids([self.patient_id])
+        super().save(*args, **kwargs)
+        self._saved_patient_id = self.patient_id
+
+class PatientIdCounter(models.Model):
+    """Next free patient number, for databases without sequences (see patients.identifiers)"""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField()
\ No newline at end of file
@@ -0,0 +1,84 @@
+# patients/pagination.py
+import base64
+import json
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+# Sort keys the patient list accepts; "-" means descending. Ties are broken
+# by id in the same direction so every position in the order is unique.
+SORT_FIELDS = ['ml_risk_score', 'last_prediction_date']
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort, value, pk):
+    """Opaque cursor pointing just after (value, pk) in the given sort"""
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, pk = json.loads(payload)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Malformed cursor')
+    if cursor_sort != sort or not isinstance(pk, int):
+        raise InvalidCursor('Cursor does not match this sort order')
+    if value is not None and sort.lstrip('-') == 'last_prediction_date':
+        value = parse_datetime(value)
+        if value is None:
+            raise InvalidCursor('Malformed cursor')
+    return value, pk
+
+
+def keyset_page(queryset, sort, cursor=None, limit=50, fields=None):
+    """Return (rows, next_cursor) for one page of queryset in sort order.
+
+    Pages are located with a WHERE on (sort value, id) instead of OFFSET,
+    so every page costs the same however deep the client has scrolled and
+    rows inserted meanwhile don't shift later pages. NULL sort values
+    (patients never scored) come last in either direction. ``fields`` are
+    the ``values()`` columns to return; the sort field and id are always
+    included.
+    """
+    field = sort.lstrip('-')
+    if field not in SORT_FIELDS:
+        raise ValueError(f'Unsupported sort: {sort}')
+    descending = sort.startswith('-')
+
+    if descending:
+        order = [F(field).desc(nulls_last=True), F('id').desc()]
+    else:
+        order = [F(field).asc(nulls_last=True), F('id').asc()]
+    queryset = queryset.order_by(*order)
+
+    if cursor:
+        value, pk = decode_cursor(cursor, sort)
+        after_pk = Q(id__lt=pk) if descending else Q(id__gt=pk)
+        if value is None:
+            # Already inside the trailing NULL block
+            queryset = queryset.filter(Q(**{f'{field}__isnull': True}) & after_pk)
+        else:
+            # The redundant bound lets the database range-scan an index
+            # on (field, id) rather than evaluate the OR for every row
+            bound = Q(**{f'{field}__lte' if descending else f'{field}__gte': value})
+            beyond = Q(**{f'{field}__lt' if descending else f'{field}__gt': value})
+            condition = bound & (beyond | (Q(**{field: value}) & after_pk))
+            if queryset.model._meta.get_field(field).null:
+                condition |= Q(**{f'{field}__isnull': True})
+            queryset = queryset.filter(condition)
+
+    columns = list(dict.fromkeys([*(fields or []), 'id', field]))
+    rows = list(queryset.values(*columns)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, last[field], last['id'])
+    return rows, next_cursor
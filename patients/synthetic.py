@@ -0,0 +1,124 @@
+# patients/synthetic.py
+import copy
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+FIRST_NAMES = [
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Carlos', 'Maria',
+    'Wei', 'Aisha', 'Mohammed', 'Fatima', 'Hiroshi', 'Yuki', 'Ivan', 'Olga', 'Kwame', 'Amara',
+]
+
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Chen', 'Nguyen', 'Patel', 'Kim', 'Okafor', 'Ivanova', 'Tanaka', 'Cohen', 'Singh',
+]
+
+CHRONIC_CONDITIONS = [
+    'hypertension', 'diabetes', 'copd', 'heart_failure', 'chronic_kidney_disease',
+    'asthma', 'coronary_artery_disease', 'atrial_fibrillation', 'depression', 'obesity',
+]
+
+# Defaults loosely follow an adult inpatient population. Any key can be
+# overridden (see create_sample_patients --distributions).
+DISTRIBUTIONS = {
+    # Normal, clipped to [min, max]
+    'age': {'mean': 62, 'sd': 17, 'min': 18, 'max': 100},
+    # Poisson whose rate grows with every decade of age over 40
+    'previous_admissions': {'rate': 0.6, 'rate_per_decade': 0.2},
+    'chronic_conditions': {'rate': 0.7, 'rate_per_decade': 0.35},
+    # Poisson on top of a fixed number of drugs per chronic condition
+    'medication_count': {'rate': 1.0, 'per_condition': 1.5},
+    # Gamma, in days, clipped to [1, max]
+    'length_of_stay': {'shape': 2.0, 'scale': 2.5, 'max': 60},
+    # Probabilities of scores 1..5
+    'social_support_score': {'weights': [0.08, 0.17, 0.35, 0.25, 0.15]},
+    'transportation_access': {'probability': 0.85},
+    # Gamma, in days, for patients with at least one previous admission
+    'time_since_last_discharge': {'shape': 1.5, 'scale': 60},
+    # Uniform over the last N days
+    'last_visit': {'days': 365},
+}
+
+
+def merge_distributions(overrides=None):
+    """DISTRIBUTIONS with the given per-key overrides applied"""
+    distributions = copy.deepcopy(DISTRIBUTIONS)
+    for key, params in (overrides or {}).items():
+        if key not in distributions:
+            raise ValueError(f'Unknown distribution: {key}')
+        distributions[key].update(params)
+    return distributions
+
+
+def generate_patients(n, rng, distributions=DISTRIBUTIONS):
+    """Draw n synthetic patients; returns a dict of equally long columns.
+
+    Numeric columns are numpy arrays, ``chronic_conditions`` is a list of
+    lists and ``time_since_last_discharge`` is None for first admissions.
+    """
+    d = distributions
+    age = np.clip(rng.normal(d['age']['mean'], d['age']['sd'], n), d['age']['min'], d['age']['max']).round()
+    decades_over_40 = np.maximum(age - 40, 0) / 10
+
+    admissions = rng.poisson(
+        d['previous_admissions']['rate'] + d['previous_admissions']['rate_per_decade'] * decades_over_40
+    )
+    condition_counts = np.minimum(
+        rng.poisson(d['chronic_conditions']['rate'] + d['chronic_conditions']['rate_per_decade'] * decades_over_40),
+        len(CHRONIC_CONDITIONS),
+    )
+    # Distinct conditions per patient: the first k of a random permutation
+    order = np.argsort(rng.random((n, len(CHRONIC_CONDITIONS))), axis=1)
+    conditions = [
+        [CHRONIC_CONDITIONS[i] for i in row[:count]]
+        for row, count in zip(order.tolist(), condition_counts.tolist())
+    ]
+    medications = (
+        rng.poisson(d['medication_count']['rate'], n)
+        + np.round(condition_counts * d['medication_count']['per_condition']).astype(np.int64)
+    )
+    stay = np.clip(
+        rng.gamma(d['length_of_stay']['shape'], d['length_of_stay']['scale'], n), 1, d['length_of_stay']['max']
+    ).round()
+    weights = np.asarray(d['social_support_score']['weights'], dtype=np.float64)
+    social_support = rng.choice(np.arange(1, len(weights) + 1), size=n, p=weights / weights.sum())
+    transportation = rng.random(n) < d['transportation_access']['probability']
+
+    since_discharge = np.ceil(rng.gamma(
+        d['time_since_last_discharge']['shape'], d['time_since_last_discharge']['scale'], n
+    )).astype(np.int64)
+    today = timezone.localdate()
+    visit_offsets = rng.integers(0, d['last_visit']['days'] + 1, n)
+
+    return {
+        'first_name': [FIRST_NAMES[i] for i in rng.integers(0, len(FIRST_NAMES), n).tolist()],
+        'last_name': [LAST_NAMES[i] for i in rng.integers(0, len(LAST_NAMES), n).tolist()],
+        'age': age.astype(np.int64),
+        'previous_admissions': admissions,
+        'chronic_conditions': conditions,
+        'medication_count': medications,
+        'length_of_stay': stay.astype(np.int64),
+        'social_support_score': social_support,
+        'transportation_access': transportation,
+        'time_since_last_discharge': [
+            days if count else None for days, count in zip(since_discharge.tolist(), admissions.tolist())
+        ],
+        'last_visit': [today - timedelta(days=offset) for offset in visit_offsets.tolist()],
+    }
+
+
+def feature_matrix(columns):
+    """Feature matrix of generated patients, in predictions.services.FEATURE_NAMES order"""
+    return np.column_stack([
+        columns['age'],
+        columns['previous_admissions'],
+        [len(conditions) for conditions in columns['chronic_conditions']],
+        columns['medication_count'],
+        columns['length_of_stay'],
+        columns['social_support_score'],
+        columns['transportation_access'],
+    ]).astype(np.float64)
@@ -0,0 +1,24 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from backend.testing import isolated_storage
+from patients.models import Patient
+
+
+@isolated_storage
+class CreateSamplePatientsTests(TestCase):
+
+    def test_samples_are_created_once_despite_namesakes(self):
+        # Synthetic patients draw from the same first and last names
+        Patient.objects.bulk_create([Patient(first_name='John', last_name='Smith') for _ in range(2)])
+
+        for _ in range(2):
+            call_command('create_sample_patients', stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(Patient.objects.filter(patient_id__startswith='SAMPLE-').values_list('patient_id', flat=True)),
+            ['SAMPLE-1', 'SAMPLE-2', 'SAMPLE-3'],
+        )
+        self.assertEqual(Patient.objects.filter(first_name='John', last_name='Smith').count(), 3)
@@ -0,0 +1,144 @@
+import itertools
+import threading
+from unittest import mock
+
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from backend.testing import isolated_storage
+from patients import identifiers
+from patients.models import Patient, PatientIdCounter
+
+
+def patient_number(patient_id):
+    return int(patient_id[1:])
+
+
+@isolated_storage
+class PatientIdAllocationTests(TestCase):
+    """Allocation through whichever backend the test database uses"""
+
+    def test_numbers_are_unique_and_increasing(self):
+        numbers = [number for count in (1, 3, 1, 250, 2) for number in identifiers.allocate_patient_numbers(count)]
+        self.assertEqual(len(set(numbers)), len(numbers))
+        if connection.vendor != 'postgresql':
+            # The counter row hands out contiguous ranges
+            self.assertEqual(numbers, list(range(numbers[0], numbers[0] + len(numbers))))
+
+    def test_save_and_bulk_create_share_the_allocator(self):
+        first = Patient.objects.create(first_name='First')
+        Patient.objects.bulk_create([
+            Patient(first_name='Blank'),
+            Patient(first_name='Explicit', patient_id='EXT-1'),
+            Patient(first_name='Blank'),
+        ])
+        last = Patient.objects.create(first_name='Last')
+
+        blank = list(Patient.objects.filter(first_name='Blank').order_by('id').values_list('patient_id', flat=True))
+        self.assertEqual(Patient.objects.get(first_name='Explicit').patient_id, 'EXT-1')
+        allocated = [first.patient_id, *blank, last.patient_id]
+        self.assertEqual(len(set(allocated)), 4)
+        if connection.vendor != 'postgresql':
+            # Cached sequence blocks are per process, so only the counter orders callers
+            numbers = [patient_number(patient_id) for patient_id in allocated]
+            self.assertEqual(numbers, sorted(numbers))
+
+    def test_explicit_numbered_ids_are_not_allocated_again(self):
+        first = Patient.objects.create(first_name='First')
+        number = patient_number(first.patient_id)
+        Patient.objects.create(first_name='Explicit', patient_id=identifiers.format_patient_id(number + 1))
+        Patient.objects.bulk_create([Patient(first_name='Bulk', patient_id=identifiers.format_patient_id(number + 3))])
+        # Explicit IDs of another shape don't move the allocator
+        Patient.objects.create(first_name='Other', patient_id='P12X')
+
+        created = Patient.objects.create(first_name='Created')
+        self.assertGreater(patient_number(created.patient_id), number + 3)
+
+    def test_counter_row_is_recreated_if_missing(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('PostgreSQL allocates from a sequence')
+        PatientIdCounter.objects.all().delete()
+        self.assertEqual(identifiers.allocate_patient_numbers(2), [1, 2])
+        self.assertEqual(identifiers.allocate_patient_numbers(1), [3])
+
+
+@override_settings(PATIENT_ID_BLOCK_SIZE=5)
+class SequenceBlockTests(SimpleTestCase):
+    """The PostgreSQL path, against a stand-in for nextval()"""
+
+    def setUp(self):
+        self.sequence = itertools.count(1)
+        self.sequence_lock = threading.Lock()
+        self.fetches = []
+        identifiers._block.update(pid=None, next=0, end=0)
+        self.addCleanup(identifiers._block.update, pid=None, next=0, end=0)
+        for patcher in (
+            mock.patch.object(identifiers, '_sequence_numbers', self.nextval),
+            # On the backend class, so threads' own connections see it too
+            mock.patch.object(type(connections['default']), 'vendor', 'postgresql'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def nextval(self, count):
+        with self.sequence_lock:
+            self.fetches.append(count)
+            return [next(self.sequence) for _ in range(count)]
+
+    def test_small_requests_are_served_from_cached_blocks(self):
+        self.assertEqual(identifiers.allocate_patient_numbers(1), [1])
+        self.assertEqual(identifiers.allocate_patient_numbers(3), [2, 3, 4])
+        # One number left in the block: a new block is fetched
+        self.assertEqual(identifiers.allocate_patient_numbers(2), [6, 7])
+        self.assertEqual(self.fetches, [5, 5])
+
+    def test_bulk_requests_bypass_the_cache(self):
+        self.assertEqual(identifiers.allocate_patient_numbers(1), [1])
+        self.assertEqual(identifiers.allocate_patient_numbers(8), list(range(6, 14)))
+        self.assertEqual(identifiers.allocate_patient_numbers(1), [2])
+        self.assertEqual(self.fetches, [5, 8])
+
+    def test_interleaved_blocks_are_not_cached(self):
+        with mock.patch.object(identifiers, '_sequence_numbers', return_value=[10, 12, 13, 14, 15]):
+            self.assertEqual(identifiers.allocate_patient_numbers(2), [10, 12])
+        self.assertEqual(identifiers.allocate_patient_numbers(1), [1])
+
+    def test_forked_process_drops_the_parents_block(self):
+        identifiers.allocate_patient_numbers(1)
+        identifiers._block['pid'] = -1
+        self.assertEqual(identifiers.allocate_patient_numbers(1), [6])
+
+    def test_concurrent_callers_get_unique_numbers(self):
+        results = []
+
+        def allocate():
+            numbers = [identifiers.allocate_patient_numbers(1)[0] for _ in range(50)]
+            with self.sequence_lock:
+                results.append(numbers)
+
+        threads = [threading.Thread(target=allocate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        numbers = [number for numbers in results for number in numbers]
+        self.assertEqual(len(set(numbers)), 400)
+        for numbers in results:
+            self.assertEqual(numbers, sorted(numbers))
+        self.assertEqual(self.fetches, [5] * 80)
+
+    def test_reserving_skips_the_cached_block_past_explicit_ids(self):
+        identifiers.allocate_patient_numbers(1)
+        with mock.patch.object(identifiers, 'connection', vendor='postgresql') as fake:
+            identifiers.reserve_patient_ids(['EXT-1', 'P0003'])
+        execute = fake.cursor.return_value.__enter__.return_value.execute
+        self.assertEqual(execute.call_args.args[1][1], 3)
+        self.assertEqual(identifiers.allocate_patient_numbers(2), [4, 5])
+        self.assertEqual(self.fetches, [5])
+
+    def test_assign_patient_ids_only_fills_blanks(self):
+        patients = [Patient(), Patient(patient_id='EXT-1'), Patient(patient_id=''), Patient()]
+        identifiers.assign_patient_ids(patients)
+        self.assertEqual([patient.patient_id for patient in patients], ['P0001', 'EXT-1', 'P0002', 'P0003'])
+        self.assertEqual(self.fetches, [5])
@@ -0,0 +1,97 @@
+import io
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from backend.testing import isolated_storage
+from patients.models import Patient
+from predictions.feature_store import get_store
+from predictions.services import patient_feature_matrix
+
+EXTRACT = """\
+patient_id,First_Name,age,transportation_access,chronic_conditions
+EXIST-1,Updated,61,no,diabetes;copd
+NEW-1,Ada,40,yes,[]
+,Blank,35,,
+BAD-1,Bad,200,yes,
+"""
+
+
+@isolated_storage
+class ImportPatientsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Patient.objects.create(patient_id='EXIST-1', first_name='Old', age=50, medication_count=4,
+                               chronic_conditions=['asthma'])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def run_import(self, text, *args):
+        path = self.directory / 'extract.csv'
+        path.write_text(text)
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_patients', str(path), *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_upserts_by_patient_id(self):
+        out, err = self.run_import(EXTRACT)
+
+        updated = Patient.objects.get(patient_id='EXIST-1')
+        self.assertEqual((updated.first_name, updated.age, updated.transportation_access), ('Updated', 61, False))
+        self.assertEqual(updated.chronic_conditions, ['diabetes', 'copd'])
+        # Columns missing from the extract are left alone on existing patients
+        self.assertEqual(updated.medication_count, 4)
+
+        created = Patient.objects.get(patient_id='NEW-1')
+        self.assertEqual((created.first_name, created.age, created.chronic_conditions), ('Ada', 40, []))
+
+        blank = Patient.objects.get(first_name='Blank')
+        self.assertRegex(blank.patient_id, r'^P\d{4,}$')
+        self.assertTrue(blank.transportation_access)
+
+        self.assertFalse(Patient.objects.filter(patient_id='BAD-1').exists())
+        self.assertIn('Row 5: age: 200 is outside 0-130', err)
+        self.assertIn('Imported 3 patients', out)
+        self.assertEqual(Patient.objects.count(), 3)
+
+    def test_imported_numbered_ids_are_not_allocated_again(self):
+        highest = Patient.objects.create(first_name='Allocated').patient_id
+        imported = f'P{int(highest[1:]) + 1:04d}'
+        self.run_import(f'patient_id,age\n{imported},40\n,41\n')
+
+        blank = Patient.objects.get(age=41)
+        created = Patient.objects.create(first_name='Created')
+        self.assertEqual(len({imported, blank.patient_id, created.patient_id}), 3)
+        self.assertGreater(int(created.patient_id[1:]), int(imported[1:]))
+
+    def test_dry_run_writes_nothing(self):
+        out, err = self.run_import(EXTRACT, '--dry-run')
+        self.assertIn('Validated 3 patients', out)
+        self.assertEqual(Patient.objects.count(), 1)
+        self.assertEqual(Patient.objects.get().first_name, 'Old')
+
+    def test_too_many_invalid_rows_abort(self):
+        with self.assertRaisesMessage(CommandError, 'Aborted after 2 invalid rows'):
+            self.run_import('patient_id,age\nA,-1\nB,x\nC,30\n', '--max-errors', '1')
+
+    def test_patient_id_column_is_required(self):
+        with self.assertRaisesMessage(CommandError, 'no patient_id column'):
+            self.run_import('name,age\nAda,40\n')
+
+    def test_feature_store_is_refreshed(self):
+        with override_settings(FEATURE_STORE_DIR=self.directory / 'feature_store'):
+            get_store().rebuild()
+            self.run_import(EXTRACT)
+
+            ids, X = patient_feature_matrix(Patient.objects.all())
+            stored_ids, stored_X = get_store().read(ids)
+            np.testing.assert_array_equal(stored_ids, ids)
+            np.testing.assert_array_equal(stored_X, X)
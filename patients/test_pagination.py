@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from backend.testing import isolated_storage
+from patients.models import Patient
+from patients.pagination import InvalidCursor, SORT_FIELDS, encode_cursor, keyset_page
+
+SORTS = [prefix + field for field in SORT_FIELDS for prefix in ('', '-')]
+
+
+@isolated_storage
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now().replace(microsecond=0)
+        # Repeated scores and dates so pages split runs of ties; every
+        # fourth patient has never been scored
+        Patient.objects.bulk_create([
+            Patient(
+                patient_id=f'K{i:03d}', ml_risk_score=(i % 5) / 10,
+                last_prediction_date=None if i % 4 == 0 else now - timedelta(days=i % 3),
+            )
+            for i in range(23)
+        ])
+
+    def expected(self, sort):
+        """Every patient in sort order, ties by id, NULLs last, computed in Python"""
+        field = sort.lstrip('-')
+        descending = sort.startswith('-')
+        rows = list(Patient.objects.values_list('id', field))
+        present = sorted((row for row in rows if row[1] is not None),
+                         key=lambda row: (row[1], row[0]), reverse=descending)
+        missing = sorted((row for row in rows if row[1] is None), key=lambda row: row[0], reverse=descending)
+        return [pk for pk, _ in present + missing]
+
+    def walk(self, sort, limit):
+        ids, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = keyset_page(Patient.objects.all(), sort, cursor=cursor, limit=limit)
+            ids.extend(row['id'] for row in rows)
+            pages += 1
+            if cursor is None:
+                return ids, pages
+
+    def test_every_page_of_every_sort(self):
+        for sort in SORTS:
+            for limit in (1, 3, 5, 23, 50):
+                with self.subTest(sort=sort, limit=limit):
+                    ids, pages = self.walk(sort, limit)
+                    self.assertEqual(ids, self.expected(sort))
+                    self.assertEqual(pages, max(1, -(-23 // limit)))
+
+    def test_cursor_inside_the_null_block(self):
+        ids = self.expected('last_prediction_date')
+        nulls = Patient.objects.filter(last_prediction_date__isnull=True).order_by('id')
+        nulls = list(nulls.values_list('id', flat=True))
+        cursor = encode_cursor('last_prediction_date', None, nulls[0])
+        rows, _ = keyset_page(Patient.objects.all(), 'last_prediction_date', cursor=cursor, limit=50)
+        self.assertEqual([row['id'] for row in rows], ids[ids.index(nulls[0]) + 1:])
+
+    def test_rejects_cursors_from_another_sort(self):
+        _, cursor = keyset_page(Patient.objects.all(), '-ml_risk_score', limit=2)
+        with self.assertRaises(InvalidCursor):
+            keyset_page(Patient.objects.all(), 'ml_risk_score', cursor=cursor)
+        with self.assertRaises(InvalidCursor):
+            keyset_page(Patient.objects.all(), 'ml_risk_score', cursor='not-a-cursor')
+
+    def test_patient_list_api(self):
+        self.client.force_login(get_user_model().objects.create_user(username='clinician', password='secret'))
+        url = reverse('patient_list')
+        ids, cursor = [], None
+        while True:
+            params = {'sort': '-last_prediction_date', 'limit': 4, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get(url, params).json()
+            ids.extend(patient['id'] for patient in data['patients'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(ids, self.expected('-last_prediction_date'))
+        self.assertEqual(self.client.get(url, {'sort': 'age'}).status_code, 400)
@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('new_assessment/', views.new_assessment, name='new_assessment'),
+    path('api/patients/', views.patient_list, name='patient_list'),
 ]
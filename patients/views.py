@@ -3,8 +3,13 @@ from django.shortcuts import render
 # Create your views here.
 from django.shortcuts import render
 from django.http import JsonResponse
+from django.db.models import Q
+from django.views.decorators.http import require_http_methods
 import json
 
+from .models import Patient
+from .pagination import keyset_page
+
 def new_assessment(request):
     if request.method == 'POST':
         # Parse JSON data from JS
@@ -15,3 +20,49 @@ def new_assessment(request):
     
     # If GET, just show a simple page or modal trigger
     return render(request, 'patients/new_assessment.html')
+
+
+# Columns returned for each patient in the list API
+PATIENT_LIST_FIELDS = [
+    'id', 'patient_id', 'first_name', 'last_name', 'age', 'risk_category',
+    'ml_risk_score', 'last_prediction_date', 'last_visit', 'length_of_stay', 'previous_admissions',
+]
+
+@require_http_methods(["GET"])
+def patient_list(request):
+    """Paginated patient list: ?sort=&risk_category=&q=&cursor=&limit="""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    
+    sort = request.GET.get('sort', '-ml_risk_score')
+    try:
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 200)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit must be a number'}, status=400)
+    
+    patients = Patient.objects.all()
+    risk_category = request.GET.get('risk_category')
+    if risk_category and risk_category != 'all':
+        patients = patients.filter(risk_category=risk_category)
+    
+    # Every word must prefix the patient ID, first name or last name
+    for term in request.GET.get('q', '').split():
+        patients = patients.filter(
+            Q(patient_id__istartswith=term) | Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+        )
+    
+    try:
+        rows, next_cursor = keyset_page(
+            patients, sort, cursor=request.GET.get('cursor'), limit=limit, fields=PATIENT_LIST_FIELDS
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    for row in rows:
+        row['risk_score'] = int(row['ml_risk_score'] * 100)  # percentage for display
+    
+    return JsonResponse({
+        'success': True,
+        'patients': rows,
+        'next_cursor': next_cursor
+    })
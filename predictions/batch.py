@@ -0,0 +1,154 @@
+# predictions/batch.py
+from contextlib import nullcontext
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from patients.models import Patient
+from . import model_cache, telemetry
+from .feature_store import load_features
+from .models import PredictionResult
+from .services import feature_fingerprints, model_version
+from .summary import record_predictions
+
+# Patients scored and written per round trip
+BULK_CHUNK_SIZE = 2000
+
+
+def score_patients(patients, ml_model, chunk_size=BULK_CHUNK_SIZE, preview=50,
+                   on_progress=None, atomic=True, force=False):
+    """Score a Patient queryset with ml_model using set-based writes.
+
+    Patients are processed in chunks: each chunk is scored in one vectorized
+    pass, its PredictionResult rows are written with one ``bulk_create`` and
+    the denormalized risk fields on Patient with one ``bulk_update``. All
+    chunks run inside a single transaction unless ``atomic`` is False, in
+    which case each chunk commits on its own so progress is visible to other
+    connections. ``on_progress(processed, total, skipped)`` is called before
+    the first chunk and after each one.
+
+    Patients whose features and model version match the fingerprint of their
+    latest prediction are skipped (no scoring, no write) unless ``force``.
+
+    Returns a dict with the number of patients ``processed`` and ``skipped``,
+    and (patient id, risk score, risk category) tuples for the first
+    ``preview`` patients scored.
+    """
+    predictor = model_cache.get_predictor(ml_model)
+    patient_ids = list(patients.order_by('id').values_list('id', flat=True))
+    version = model_version(ml_model)
+    # In lazy mode top_factors stay empty until a clinician opens the result
+    eager_explanations = getattr(settings, 'PREDICTION_EXPLANATIONS', 'eager') == 'eager'
+    total_processed = 0
+    total_skipped = 0
+    scored = []
+
+    if on_progress:
+        on_progress(0, len(patient_ids), 0)
+
+    with transaction.atomic() if atomic else nullcontext():
+        for start in range(0, len(patient_ids), chunk_size):
+            chunk_ids = patient_ids[start:start + chunk_size]
+            with telemetry.timed(ml_model.pk, count=len(chunk_ids)) as timer:
+                with telemetry.stage('features'):
+                    ids, X = load_features(chunk_ids)
+                    fingerprints = np.array(feature_fingerprints(X, version))
+
+                    if not force:
+                        changed = fingerprints != latest_fingerprints(ids)
+                        total_skipped += int(len(ids) - changed.sum())
+                        ids, X, fingerprints = ids[changed], X[changed], fingerprints[changed]
+
+                # Timings are per patient scored; skipped ones cost only their features
+                timer.count = len(ids)
+                if len(ids):
+                    batch = predictor.predict_batch(X, explain=eager_explanations)
+                    batch['patient_ids'] = ids
+                    batch['fingerprints'] = fingerprints.tolist()
+                    with telemetry.stage('write'), transaction.atomic(savepoint=False):
+                        chunk_results = _write_chunk(batch, ml_model)
+                    scored.extend(chunk_results[:max(0, preview - len(scored))])
+
+            total_processed += len(chunk_ids)
+            if on_progress:
+                on_progress(total_processed, len(patient_ids), total_skipped)
+
+    # Jobs and commands often exit right after scoring
+    telemetry.flush_on_commit()
+    return {'processed': total_processed, 'skipped': total_skipped, 'preview': scored}
+
+
+def latest_fingerprints(patient_ids):
+    """Fingerprint of each patient's most recent prediction ('' if none), aligned with patient_ids"""
+    latest = PredictionResult.objects.filter(patient=OuterRef('pk')).order_by('-created_at', '-id')
+    known = dict(
+        Patient.objects.filter(id__in=[int(patient_id) for patient_id in patient_ids])
+        .annotate(latest_fingerprint=Subquery(latest.values('fingerprint')[:1]))
+        .values_list('id', 'latest_fingerprint')
+    )
+    return np.array([known.get(int(patient_id)) or '' for patient_id in patient_ids])
+
+
+def _write_chunk(batch, ml_model):
+    """Persist one scored chunk and return its (id, score, category) tuples"""
+    now = timezone.now()
+    risk_scores = np.round(batch['risk_scores'], 3).tolist()
+    confidences = np.round(batch['confidences'], 3).tolist()
+    risk_categories = batch['risk_categories'].tolist()
+    patient_ids = batch['patient_ids'].tolist()
+
+    PredictionResult.objects.bulk_create([
+        PredictionResult(
+            patient_id=patient_id,
+            ml_model=ml_model,
+            risk_score=risk_score,
+            risk_category=risk_category,
+            confidence=confidence,
+            top_factors=top_factors,
+            fingerprint=fingerprint,
+        )
+        for patient_id, risk_score, risk_category, confidence, top_factors, fingerprint in zip(
+            patient_ids, risk_scores, risk_categories, confidences, batch['top_factors'],
+            batch['fingerprints']
+        )
+    ])
+    record_predictions(ml_model.pk, risk_categories, risk_scores, confidences)
+
+    _update_patient_risk(patient_ids, risk_scores, risk_categories, now)
+
+    return list(zip(patient_ids, risk_scores, risk_categories))
+
+
+def _update_patient_risk(patient_ids, risk_scores, risk_categories, prediction_date):
+    """Copy the new scores onto Patient with one statement per chunk"""
+    if connection.vendor == 'postgresql':
+        # bulk_update builds a CASE WHEN per row in Python; unnest() passes
+        # the whole chunk as three array parameters instead
+        table = connection.ops.quote_name(Patient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS p
+                SET ml_risk_score = v.risk_score,
+                    risk_category = v.risk_category,
+                    last_prediction_date = %s
+                FROM unnest(%s::bigint[], %s::double precision[], %s::varchar[])
+                    AS v(id, risk_score, risk_category)
+                WHERE p.id = v.id
+                """,
+                [prediction_date, patient_ids, risk_scores, risk_categories],
+            )
+        return
+
+    Patient.objects.bulk_update([
+        Patient(
+            id=patient_id,
+            ml_risk_score=risk_score,
+            risk_category=risk_category,
+            last_prediction_date=prediction_date,
+        )
+        for patient_id, risk_score, risk_category in zip(patient_ids, risk_scores, risk_categories)
+    ], fields=['ml_risk_score', 'risk_category', 'last_prediction_date'])
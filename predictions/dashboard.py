@@ -0,0 +1,163 @@
+# predictions/dashboard.py
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.template.loader import render_to_string
+
+from .models import MLModel, PredictionResult
+from .summary import patient_stats, prediction_stats
+from .telemetry import prediction_telemetry
+from .training import fail_stale_training, training_cutoff
+
+# Each dashboard tab's JSON body is built in two steps: independent
+# queries, then a body function that renders the partial from their
+# results without touching the database. build_payload runs the queries
+# one after another; abuild_payload runs them at the same time.
+
+
+def active_model():
+    return MLModel.objects.filter(is_active=True).first()
+
+
+def recent_predictions():
+    return list(PredictionResult.objects.select_related('patient').order_by('-created_at', '-id')[:10])
+
+
+def all_models():
+    models = list(MLModel.objects.all().order_by('-created_at'))
+    # Training runs lost with a restarted worker would otherwise be listed
+    # as training for ever; only pay for the UPDATE when one is overdue
+    cutoff = training_cutoff()
+    if any(model.status == 'training' and model.created_at < cutoff for model in models) and fail_stale_training():
+        models = list(MLModel.objects.all().order_by('-created_at'))
+    return models
+
+
+def dashboard_body(active_model, stats, recent_predictions):
+    """JSON body of api_dashboard_data; the same for every user until the data changes"""
+    total_predictions = stats['total_predictions']
+    high_risk_count = stats['high_risk_count']
+    medium_risk_count = stats['medium_risk_count']
+    low_risk_count = stats['low_risk_count']
+
+    # Render predictions HTML
+    html = render_to_string('predictions/partials/predictions_list.html', {
+        'predictions': recent_predictions,
+        'total_predictions': total_predictions,
+        'high_risk_count': high_risk_count,
+        'medium_risk_count': medium_risk_count,
+        'low_risk_count': low_risk_count
+    })
+
+    return {
+        'success': True,
+        'html': html,
+        'active_model': {
+            'name': active_model.name if active_model else 'No active model',
+            'version': active_model.version if active_model else 'N/A',
+            'accuracy': float(active_model.accuracy) if active_model else 0.0,
+            'model_type': active_model.get_model_type_display() if active_model else 'N/A'
+        },
+        'stats': {
+            'total_predictions': total_predictions,
+            'high_risk_count': high_risk_count,
+            'medium_risk_count': medium_risk_count,
+            'low_risk_count': low_risk_count
+        }
+    }
+
+
+def analytics_body(stats, active_model, telemetry):
+    """JSON body of api_analytics"""
+    total_patients = stats['total_patients']
+    patients_with_predictions = stats['total_assessed']
+    avg_risk_score = stats['avg_risk_score']
+    avg_stay = stats['avg_stay']
+
+    # Mock readmission rate (replace with actual calculation)
+    readmission_rate = 12.5
+
+    # Risk distribution
+    risk_distribution = stats['risk_distribution']
+
+    # Model performance metrics
+    model_metrics = {
+        'accuracy': active_model.accuracy if active_model else 0.85,
+        'precision': getattr(active_model, 'precision', 0.82) if active_model else 0.82,
+        'recall': getattr(active_model, 'recall', 0.87) if active_model else 0.87,
+        'f1_score': 0.84  # Calculated from precision and recall
+    }
+
+    # Render analytics HTML
+    html = render_to_string('predictions/partials/analytics_content.html')
+
+    return {
+        'success': True,
+        'html': html,
+        'readmission_rate': readmission_rate,
+        'avg_risk_score': round(avg_risk_score * 100, 1),
+        'avg_stay': round(avg_stay, 1),
+        'total_assessed': patients_with_predictions,
+        'risk_distribution': risk_distribution,
+        'total_patients': total_patients,
+        'model_metrics': model_metrics,
+        # Measured over PREDICTION_TELEMETRY_WINDOW_HOURS; times in ms per prediction
+        'quick_stats': {
+            'avg_prediction_time': telemetry['avg_prediction_time'],
+            'success_rate': telemetry['success_rate'],
+            'predictions_measured': telemetry['predictions'],
+            'stage_times': telemetry['stage_times']
+        }
+    }
+
+
+def models_body(models):
+    """JSON body of api_models"""
+    html = render_to_string('predictions/partials/models_list.html', {
+        'models': models
+    })
+
+    return {
+        'success': True,
+        'html': html,
+        'total_models': len(models),
+        'active_models': sum(1 for model in models if model.is_active)
+    }
+
+
+# Tab name -> (queries, body)
+PAYLOADS = {
+    'predictions': ((active_model, prediction_stats, recent_predictions), dashboard_body),
+    'analytics': ((patient_stats, active_model, prediction_telemetry), analytics_body),
+    'models': ((all_models,), models_body),
+}
+
+
+def build_payload(name):
+    queries, body = PAYLOADS[name]
+    return body(*(query() for query in queries))
+
+
+async def abuild_payload(name):
+    """build_payload with the queries run concurrently and rendering kept off the event loop.
+
+    Each query runs on its own executor thread and therefore its own
+    database connection, so the tab costs as long as its slowest query.
+    Those connections are released per CONN_MAX_AGE like a request's.
+    """
+    queries, body = PAYLOADS[name]
+    results = await asyncio.gather(*(
+        sync_to_async(_with_connection_cleanup(query), thread_sensitive=False)() for query in queries
+    ))
+    return await sync_to_async(body, thread_sensitive=False)(*results)
+
+
+def _with_connection_cleanup(query):
+    def run():
+        close_old_connections()
+        try:
+            return query()
+        finally:
+            close_old_connections()
+    return run
@@ -0,0 +1,109 @@
+# predictions/dashboard_cache.py
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'dashboard:data-version'
+# Bumped by telemetry flushes, which only the analytics payload reads, so
+# they don't invalidate every payload, ETag and live stream
+TELEMETRY_VERSION_KEY = 'dashboard:telemetry-version'
+# Versions each payload depends on besides the data version
+PAYLOAD_VERSIONS = {'analytics': (TELEMETRY_VERSION_KEY,)}
+
+
+def data_version(key=VERSION_KEY):
+    """Token identifying the current state of the dashboard data.
+
+    It lives in the cache rather than in process memory, so every worker
+    sharing the cache backend sees a bump. If the token has been evicted a
+    new one is started, which simply misses every cached payload once.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(key=VERSION_KEY):
+    """Invalidate every cached dashboard payload once the current transaction commits"""
+    transaction.on_commit(lambda: cache.set(key, _new_version(), timeout=None))
+
+
+def bump_telemetry_version():
+    """Invalidate the cached analytics payload once the current transaction commits"""
+    bump_data_version(TELEMETRY_VERSION_KEY)
+
+
+def payload_version(name):
+    """Token for payload ``name``: the data version plus any it additionally depends on"""
+    return '.'.join(data_version(key) for key in (VERSION_KEY, *PAYLOAD_VERSIONS.get(name, ())))
+
+
+def cached_payload(name, builder, timeout=None):
+    """builder()'s result for the current data version, built at most once per version.
+
+    Old versions are never deleted; their keys just stop being read and
+    expire after ``timeout`` (``DASHBOARD_CACHE_TIMEOUT`` by default).
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+    key = f'dashboard:{name}:{payload_version(name)}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = builder()
+        cache.set(key, payload, timeout)
+    return payload
+
+
+async def adata_version(key=VERSION_KEY):
+    """data_version() for async code"""
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+async def apayload_version(name):
+    """payload_version() for async code"""
+    return '.'.join([await adata_version(key) for key in (VERSION_KEY, *PAYLOAD_VERSIONS.get(name, ()))])
+
+
+async def acached_payload(name, builder, timeout=None):
+    """cached_payload() for async code; builder returns an awaitable"""
+    if timeout is None:
+        timeout = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+    key = f'dashboard:{name}:{await apayload_version(name)}'
+    payload = await cache.aget(key)
+    if payload is None:
+        payload = await builder()
+        await cache.aset(key, payload, timeout)
+    return payload
+
+
+def payload_etag(name):
+    """etag_func for django's condition() on the view serving cached_payload(name, ...)"""
+    def etag(request, *args, **kwargs):
+        return f'{name}-{payload_version(name)}'
+    return etag
+
+
+def payload_last_modified(name):
+    """last_modified_func for condition(): when the newest of the payload's versions started"""
+    def last_modified(request, *args, **kwargs):
+        try:
+            started = max(int(version.split('-')[0], 16) for version in payload_version(name).split('.'))
+        except ValueError:
+            return None
+        return datetime.fromtimestamp(started / 1e9, tz=timezone.utc)
+    return last_modified
+
+
+def _new_version():
+    # Unique across processes; no shared counter to increment
+    return f'{time.time_ns():x}-{uuid.uuid4().hex[:8]}'
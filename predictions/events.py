@@ -0,0 +1,143 @@
+# predictions/events.py
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .dashboard_cache import data_version
+from .models import PredictionResult
+from .summary import prediction_stats
+
+logger = logging.getLogger(__name__)
+
+# Newest predictions sent per event; bulk jobs write far more than a
+# dashboard shows, the counts cover the rest
+EVENT_ROW_LIMIT = 20
+# Events buffered for a slow client before it is told to refresh instead
+QUEUE_SIZE = 50
+KEEPALIVE_SECONDS = 15
+
+EVENT_FIELDS = [
+    'id', 'patient_id', 'patient__patient_id', 'patient__first_name', 'patient__last_name',
+    'risk_score', 'risk_category', 'confidence', 'created_at',
+]
+
+
+class PredictionBroadcaster:
+    """Fans prediction events out to every event stream open in this process.
+
+    A single poller per process watches the dashboard data version, which
+    every prediction write bumps whichever process made it, and runs one
+    query for the new rows when it changes. Connected clients cost a queue
+    each, not a query each.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self._loop = None
+        self._task = None
+        self._version = None
+        self._last_id = None
+
+    def subscribe(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # First stream, or the server restarted its loop
+            self.subscribers = set()
+            self._loop = loop
+            self._task = None
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, event):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Skipped rows can't be patched in; have the client catch up
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(('refresh', event[1]))
+
+    async def _poll(self):
+        interval = getattr(settings, 'PREDICTION_EVENTS_INTERVAL', 1.0)
+        self._version, self._last_id = await sync_to_async(self._position)()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                version = await sync_to_async(data_version)()
+                if version != self._version:
+                    self._version = version
+                    self.publish(await sync_to_async(self._changes)())
+            except Exception:
+                logger.exception('Polling for prediction events failed')
+
+    def _position(self):
+        latest = PredictionResult.objects.order_by('-id').values_list('id', flat=True).first()
+        return data_version(), latest or 0
+
+    def _changes(self):
+        """The event describing everything written since the last poll"""
+        rows = list(
+            PredictionResult.objects.filter(id__gt=self._last_id)
+            .order_by('-id').values(*EVENT_FIELDS)[:EVENT_ROW_LIMIT + 1]
+        )
+        stats = prediction_stats()
+        if not rows:
+            # Something else changed (a model, a deletion): counts only
+            return 'refresh', {'stats': stats}
+        self._last_id = rows[0]['id']
+        return 'predictions', {
+            'predictions': [compact_prediction(row) for row in rows[:EVENT_ROW_LIMIT]],
+            'more': len(rows) > EVENT_ROW_LIMIT,
+            'stats': stats,
+        }
+
+
+broadcaster = PredictionBroadcaster()
+
+
+def compact_prediction(row):
+    return {
+        'id': row['id'],
+        'patient': row['patient_id'],
+        'patient_id': row['patient__patient_id'],
+        'patient_name': f"{row['patient__first_name']} {row['patient__last_name']}",
+        'risk_score': row['risk_score'],
+        'risk_category': row['risk_category'],
+        'confidence': row['confidence'],
+        'created_at': row['created_at'],
+    }
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))}\n\n'
+
+
+async def event_stream():
+    """text/event-stream body for one client; ends when the client disconnects"""
+    queue = broadcaster.subscribe()
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                name, data = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(name, data)
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,111 @@
+# predictions/explanations.py
+import numpy as np
+from scipy import sparse
+
+from .services import FEATURE_NAMES
+
+FEATURE_LABELS = {
+    'age': 'Age',
+    'previous_admissions': 'Previous Admissions',
+    'chronic_conditions_count': 'Chronic Conditions',
+    'medication_count': 'Medications',
+    'length_of_stay': 'Length of Stay',
+    'social_support_score': 'Social Support',
+    'transportation_access': 'Transportation Access',
+}
+
+TOP_FACTORS = 5
+
+
+class Explainer:
+    """Per-feature contributions to the risk score for a whole feature matrix.
+
+    - linear models: exact ``coef * x`` terms of the log-odds
+    - tree ensembles (random forest, gradient boosting): tree-path
+      contributions, i.e. the change in node value at every split a row
+      passes through, credited to that split's feature
+    - xgboost: the booster's own ``pred_contribs``
+
+    Anything else (e.g. the neural network) has no exact decomposition and
+    ``contributions`` returns None.
+    """
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+        self.preprocess = None
+        if hasattr(estimator, 'steps'):
+            self.preprocess = estimator[:-1]
+            estimator = estimator.steps[-1][1]
+        self.model = estimator
+        self._path_weights = None
+
+    def contributions(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.preprocess is not None:
+            X = self.preprocess.transform(X)
+
+        if hasattr(self.model, 'get_booster'):
+            from xgboost import DMatrix
+            # Last column is the bias term
+            return self.model.get_booster().predict(DMatrix(X), pred_contribs=True)[:, :-1]
+        if hasattr(self.model, 'coef_'):
+            return X * np.asarray(self.model.coef_, dtype=np.float64)[0]
+        if hasattr(self.model, 'estimators_'):
+            return self._tree_contributions(X)
+        return None
+
+    def _tree_contributions(self, X):
+        trees = np.ravel(self.model.estimators_)
+        if self._path_weights is None:
+            # Built once per loaded model: one sparse (nodes x features)
+            # matrix per tree, stacked in decision_path column order
+            self._path_weights = sparse.vstack([_path_weights(tree.tree_) for tree in trees]).tocsr()
+
+        if hasattr(self.model, 'decision_path'):
+            # Random forests return every tree's path in one indicator matrix
+            paths, _ = self.model.decision_path(X)
+            return np.asarray((paths @ self._path_weights).todense()) / len(trees)
+
+        # Gradient boosting: per-tree raw values, scaled like the ensemble
+        paths = sparse.hstack([tree.decision_path(X) for tree in trees]).tocsr()
+        return np.asarray((paths @ self._path_weights).todense()) * self.model.learning_rate
+
+
+def _path_weights(tree):
+    """Sparse matrix mapping each node to (its value - its parent's value) on the parent's split feature"""
+    value = tree.value[:, 0, :]
+    if value.shape[1] > 1:
+        # Classifier: probability of readmission at each node
+        value = value[:, 1] / value.sum(axis=1)
+    else:
+        value = value[:, 0]
+
+    parent = np.full(tree.node_count, -1)
+    for children in (tree.children_left, tree.children_right):
+        has_child = children >= 0
+        parent[children[has_child]] = np.flatnonzero(has_child)
+
+    nodes = np.flatnonzero(parent >= 0)
+    return sparse.csr_matrix(
+        (value[nodes] - value[parent[nodes]], (nodes, tree.feature[parent[nodes]])),
+        shape=(tree.node_count, len(FEATURE_NAMES)),
+    )
+
+
+def top_factors(contributions, limit=TOP_FACTORS):
+    """Turn a contribution matrix into one {"factor": weight} dict per row.
+
+    Weights are each feature's signed share of the row's total absolute
+    contribution, in percent, for the ``limit`` largest features.
+    """
+    contributions = np.asarray(contributions, dtype=np.float64)
+    magnitude = np.abs(contributions)
+    totals = magnitude.sum(axis=1, keepdims=True)
+    shares = np.round(100 * np.divide(contributions, totals, out=np.zeros_like(contributions), where=totals > 0), 1)
+
+    order = np.argsort(-magnitude, axis=1)[:, :limit]
+    labels = [FEATURE_LABELS[name] for name in FEATURE_NAMES]
+    factors = []
+    for row_order, row_shares in zip(order.tolist(), shares.tolist()):
+        factors.append({labels[i]: row_shares[i] for i in row_order if row_shares[i] != 0})
+    return factors
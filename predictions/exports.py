@@ -0,0 +1,142 @@
+# predictions/exports.py
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import PredictionResult
+
+# (column header, PredictionResult lookup) in output order
+EXPORT_COLUMNS = [
+    ('prediction_id', 'id'),
+    ('created_at', 'created_at'),
+    ('patient_pk', 'patient_id'),
+    ('patient_id', 'patient__patient_id'),
+    ('first_name', 'patient__first_name'),
+    ('last_name', 'patient__last_name'),
+    ('age', 'patient__age'),
+    ('model_id', 'ml_model_id'),
+    ('model_name', 'ml_model__name'),
+    ('model_type', 'ml_model__model_type'),
+    ('model_version', 'ml_model__version'),
+    ('risk_score', 'risk_score'),
+    ('risk_category', 'risk_category'),
+    ('confidence', 'confidence'),
+    ('top_factors', 'top_factors'),
+    ('fingerprint', 'fingerprint'),
+]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 5000
+
+
+def parse_bound(value, end=False):
+    """Parse a YYYY-MM-DD date or ISO datetime filter value into an aware datetime.
+
+    A bare date used as an upper bound (``end``) covers that whole day.
+    Raises ValueError for anything else.
+    """
+    if not value:
+        return None
+    parsed = parse_datetime(value) or parse_date(value)
+    if parsed is None:
+        raise ValueError(f'Invalid date: {value}')
+    if not isinstance(parsed, datetime):
+        parsed = datetime.combine(parsed + timedelta(days=1) if end else parsed, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_predictions(date_from=None, date_to=None, model_id=None, risk_category=None):
+    """PredictionResult queryset for an export, in primary key order.
+
+    ``date_from`` and ``date_to`` are strings accepted by parse_bound; the
+    range is inclusive of date_from and exclusive of a date_to datetime
+    (a date_to date includes that day).
+    """
+    queryset = PredictionResult.objects.order_by('id')
+    start = parse_bound(date_from)
+    end = parse_bound(date_to, end=True)
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lt=end)
+    if model_id:
+        queryset = queryset.filter(ml_model_id=int(model_id))
+    if risk_category:
+        queryset = queryset.filter(risk_category=risk_category)
+    return queryset
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream value tuples in EXPORT_COLUMNS order without caching the queryset.
+
+    On PostgreSQL ``iterator()`` reads through a server-side cursor, so memory
+    stays constant however many rows match.
+    """
+    return queryset.values_list(*(lookup for _, lookup in EXPORT_COLUMNS)).iterator(chunk_size=chunk_size)
+
+
+def csv_lines(rows, batch_size=1000):
+    """Yield the CSV export as text, a header line then batches of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        count += 1
+        if count % batch_size == 0:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def ndjson_lines(rows, batch_size=1000):
+    """Yield the export as newline-delimited JSON objects, in batches"""
+    headers = [header for header, _ in EXPORT_COLUMNS]
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(headers, row)), default=_json_default))
+        if len(lines) == batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_stream(queryset, export_format='csv', chunk_size=EXPORT_CHUNK_SIZE):
+    """Text chunks of the whole export in the given format"""
+    rows = export_rows(queryset, chunk_size)
+    if export_format == 'ndjson':
+        return ndjson_lines(rows)
+    return csv_lines(rows)
+
+
+def _drain(buffer):
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
@@ -0,0 +1,148 @@
+# predictions/feature_store.py
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from patients.models import Patient
+from .services import FEATURE_NAMES, patient_feature_matrix
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Column 0 flags whether the row holds a patient; features follow it
+PRESENT = 0
+WIDTH = len(FEATURE_NAMES) + 1
+
+
+class FeatureStore:
+    """Patient features as one contiguous float32 matrix on disk.
+
+    Row ``i`` of ``patient_features.npy`` holds the features of the patient
+    with primary key ``i``, so lookups are plain array indexing and the file
+    can be memory-mapped by every process. Writers serialize on a lock file;
+    readers never lock, and growing the matrix replaces the file atomically
+    so open maps keep a consistent (if slightly older) view.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = self.directory / 'patient_features.npy'
+        self.lock_path = self.directory / 'patient_features.lock'
+
+    def exists(self):
+        return self.path.exists()
+
+    @contextmanager
+    def _locked(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open(self, mode='r'):
+        return np.load(self.path, mmap_mode=mode)
+
+    def _create(self, capacity, source=None):
+        """Write a new matrix of the given capacity, copying rows from source"""
+        tmp_path = self.path.with_suffix('.tmp.npy')
+        matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, WIDTH))
+        if source is not None:
+            matrix[:len(source)] = source
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, self.path)
+
+    def rebuild(self, chunk_size=50000):
+        """Recompute the whole store from the Patient table"""
+        max_id = Patient.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        with self._locked():
+            self._create(max_id + 1)
+            matrix = self._open('r+')
+            for start in range(0, max_id + 1, chunk_size):
+                ids, X = patient_feature_matrix(
+                    Patient.objects.filter(id__gte=start, id__lt=start + chunk_size)
+                )
+                matrix[ids, PRESENT] = 1
+                matrix[ids, 1:] = X
+            matrix.flush()
+        return int(np.count_nonzero(self._open()[:, PRESENT]))
+
+    def update(self, ids, rows):
+        """Write feature rows for the given patient ids, growing if needed"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids) or not self.exists():
+            return
+        with self._locked():
+            matrix = self._open('r+')
+            if ids.max() >= len(matrix):
+                # Double the capacity so appends stay amortized O(1)
+                self._create(max(int(ids.max()) + 1, 2 * len(matrix)), source=matrix)
+                matrix = self._open('r+')
+            matrix[ids, PRESENT] = 1
+            matrix[ids, 1:] = np.asarray(rows, dtype=np.float32)
+            matrix.flush()
+
+    def delete(self, ids):
+        """Mark patient rows as absent"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids) or not self.exists():
+            return
+        with self._locked():
+            matrix = self._open('r+')
+            ids = ids[ids < len(matrix)]
+            matrix[ids, PRESENT] = 0
+            matrix.flush()
+
+    def read(self, ids=None):
+        """Return (ids, features) for the requested patients found in the store.
+
+        With ``ids=None`` every stored patient is returned.
+        """
+        matrix = self._open()
+        if ids is None:
+            found = np.flatnonzero(matrix[:, PRESENT])
+        else:
+            ids = np.asarray(ids, dtype=np.int64)
+            ids = ids[ids < len(matrix)]
+            found = ids[matrix[ids, PRESENT] == 1]
+        return found, np.asarray(matrix[found, 1:], dtype=np.float64)
+
+
+def get_store():
+    """The configured feature store, or None when it is disabled"""
+    if not getattr(settings, 'FEATURE_STORE_ENABLED', False):
+        return None
+    return FeatureStore(settings.FEATURE_STORE_DIR)
+
+
+def load_features(patient_ids):
+    """Return (ids, features) for patient_ids, preferring the feature store.
+
+    Patients missing from the store (or all of them, if it has not been built)
+    are read from the Patient table instead.
+    """
+    patient_ids = np.asarray(patient_ids, dtype=np.int64)
+    store = get_store()
+    if store is None or not store.exists():
+        return patient_feature_matrix(Patient.objects.filter(id__in=patient_ids.tolist()))
+
+    ids, X = store.read(patient_ids)
+    missing = np.setdiff1d(patient_ids, ids)
+    if len(missing):
+        missing_ids, missing_X = patient_feature_matrix(Patient.objects.filter(id__in=missing.tolist()))
+        ids = np.concatenate([ids, missing_ids])
+        X = np.vstack([X, missing_X])
+    return ids, X
@@ -0,0 +1,112 @@
+# predictions/jobs.py
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from patients.models import Patient
+from .batch import score_patients
+from .models import PredictionJob
+
+logger = logging.getLogger(__name__)
+
+# Lazily created so importing this module never starts threads
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'PREDICTION_JOB_THREADS', 1),
+            thread_name_prefix='prediction-job',
+        )
+    return _executor
+
+
+def enqueue_bulk_prediction(ml_model, patient_ids=None):
+    """Create a queued PredictionJob and hand it to a worker.
+
+    With ``PREDICTION_JOBS_IN_PROCESS`` the job runs on a background thread of
+    the current process once the enqueuing transaction commits; otherwise it
+    waits for ``manage.py run_prediction_jobs``.
+    """
+    job = PredictionJob.objects.create(ml_model=ml_model, patient_ids=patient_ids or [])
+
+    if getattr(settings, 'PREDICTION_JOBS_IN_PROCESS', True):
+        transaction.on_commit(lambda: _get_executor().submit(run_job, job.id))
+
+    return job
+
+
+def claim_next_job():
+    """Atomically mark the oldest queued job as running and return it"""
+    fail_stale_jobs()
+    for job_id in PredictionJob.objects.filter(status='queued').order_by('id').values_list('id', flat=True):
+        if _claim(job_id):
+            return job_id
+    return None
+
+
+def _claim(job_id):
+    # The status filter makes the claim safe across processes: only one
+    # UPDATE can move a given job out of "queued"
+    now = timezone.now()
+    return PredictionJob.objects.filter(id=job_id, status='queued').update(
+        status='running', started_at=now, heartbeat_at=now
+    ) == 1
+
+
+def fail_stale_jobs():
+    """Fail running jobs whose worker has stopped reporting progress.
+
+    A worker killed mid-job (deploy, OOM, restart) never finishes it, and
+    clients would poll it forever. The patients it already scored keep
+    their fingerprints, so re-running the bulk prediction skips them.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'PREDICTION_JOB_TIMEOUT', 600))
+    stale = PredictionJob.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    return stale.update(
+        status='failed', finished_at=timezone.now(),
+        error='The worker running this job stopped responding; start the bulk prediction again',
+    )
+
+
+def run_job(job_id, claimed=False):
+    """Execute a bulk prediction job, recording progress as chunks commit"""
+    try:
+        if not claimed and not _claim(job_id):
+            return
+
+        job = PredictionJob.objects.select_related('ml_model').get(id=job_id)
+        if job.ml_model is None:
+            raise ValueError('The prediction model for this job was deleted')
+
+        if job.patient_ids:
+            patients = Patient.objects.filter(id__in=job.patient_ids)
+        else:
+            patients = Patient.objects.filter(ml_risk_score=0)
+
+        def record_progress(processed, total, skipped):
+            PredictionJob.objects.filter(id=job_id).update(
+                processed=processed, total=total, skipped=skipped, heartbeat_at=timezone.now()
+            )
+
+        score_patients(patients, job.ml_model, on_progress=record_progress, atomic=False)
+
+        PredictionJob.objects.filter(id=job_id).update(status='completed', finished_at=timezone.now())
+    except Exception:
+        logger.exception('Prediction job %s failed', job_id)
+        PredictionJob.objects.filter(id=job_id).update(
+            status='failed', error=traceback.format_exc(limit=5), finished_at=timezone.now()
+        )
+    finally:
+        # Worker threads get their own connections; don't leak them
+        connections.close_all()
@@ -0,0 +1,210 @@
+# predictions/management/commands/benchmark_predictions.py
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from patients.models import Patient
+from patients.synthetic import feature_matrix, generate_patients
+from predictions import model_cache, telemetry
+from predictions.batch import BULK_CHUNK_SIZE, score_patients
+from predictions.models import MLModel
+from predictions.services import FEATURE_NAMES, ReadmissionPredictor, patient_feature_row
+from predictions.training import build_estimator
+
+
+def synthetic_features(n, rng):
+    """Feature matrix of n generated patients, in FEATURE_NAMES order"""
+    return feature_matrix(generate_patients(n, rng))
+
+
+def synthetic_labels(X, rng):
+    """Readmitted flags loosely driven by admissions, conditions and age"""
+    logit = (-3 + 0.6 * X[:, 1] + 0.4 * X[:, 2] + 0.02 * (X[:, 0] - 60)
+             + 0.05 * X[:, 4] - 0.3 * X[:, 5] + rng.normal(0, 1, len(X)))
+    return (logit > 0).astype(np.int8)
+
+
+# MLModel.model_type of each benchmark target's model row. Any model
+# without an artifact scores with the rules; the type is only a label.
+MODEL_TYPES = {**{model_type: model_type for model_type, _ in MLModel.MODEL_TYPES}, 'rule_based': 'logistic'}
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 4)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the prediction paths and emit machine-readable results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,100000,1000000',
+                            help='Comma-separated batch sizes (rows) to benchmark')
+        parser.add_argument('--model-types', default=','.join(t for t, _ in MLModel.MODEL_TYPES),
+                            help='Comma-separated MLModel types to train and benchmark')
+        parser.add_argument('--train-rows', type=int, default=20000,
+                            help='Synthetic rows used to fit each model type')
+        parser.add_argument('--single-calls', type=int, default=2000,
+                            help='Calls used for single-patient latency percentiles')
+        parser.add_argument('--db-rows', type=int, default=10000,
+                            help='Patients written in the (rolled back) DB write benchmark; 0 skips it')
+        parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE,
+                            help='Rows per predict_batch call, as in bulk scoring')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        model_types = [t for t in options['model_types'].split(',') if t]
+        unknown = set(model_types) - set(dict(MLModel.MODEL_TYPES))
+        if unknown:
+            raise CommandError(f'Unknown model types: {", ".join(sorted(unknown))}')
+
+        predictors = {'rule_based': ReadmissionPredictor()}
+        results = []
+        for model_type in model_types:
+            X_train = synthetic_features(options['train_rows'], rng)
+            estimator = build_estimator(model_type)
+            started = time.perf_counter()
+            estimator.fit(X_train, synthetic_labels(X_train, rng))
+            results.append({
+                'target': model_type, 'benchmark': 'train',
+                'rows': options['train_rows'], 'seconds': round(time.perf_counter() - started, 4),
+            })
+            predictor = ReadmissionPredictor()
+            predictor.model = estimator
+            predictors[model_type] = predictor
+
+        self.stderr.write('Single-patient latency...')
+        results.extend(self.bench_single(predictors, rng, options['single_calls']))
+
+        for size in sizes:
+            X = synthetic_features(size, rng)
+            for target, predictor in predictors.items():
+                self.stderr.write(f'Batch {target} x {size}...')
+                results.append(self.bench_batch(target, predictor, X, options['chunk_size']))
+
+        if options['db_rows']:
+            for target, predictor in predictors.items():
+                self.stderr.write(f'DB writes {target} x {options["db_rows"]}...')
+                results.append(self.bench_db_writes(target, predictor, rng, options['db_rows']))
+
+        report = {
+            'commit': self.git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'database': connection.vendor,
+            'features': FEATURE_NAMES,
+            'results': results,
+        }
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Wrote {len(results)} results to {options["output"]}'))
+        else:
+            self.stdout.write(payload)
+
+    def bench_single(self, predictors, rng, calls):
+        """The predict_readmission path: one Patient's feature row through predict_batch"""
+        X = synthetic_features(calls, rng)
+        patients = [
+            Patient(age=int(row[0]), previous_admissions=int(row[1]),
+                    chronic_conditions=['condition'] * int(row[2]), length_of_stay=int(row[4]))
+            for row in X
+        ]
+        results = []
+        for target, predictor in predictors.items():
+            results.append(self.latency(
+                target, lambda i, p=predictor: p.predict_batch(np.array([patient_feature_row(patients[i])])), calls
+            ))
+        return results
+
+    def latency(self, target, call, calls):
+        samples = np.empty(calls)
+        for i in range(calls):
+            started = time.perf_counter()
+            call(i)
+            samples[i] = time.perf_counter() - started
+        return {
+            'target': target, 'benchmark': 'single_latency', 'calls': calls,
+            'p50_ms': percentile_ms(samples, 50), 'p99_ms': percentile_ms(samples, 99),
+            'mean_ms': round(float(samples.mean()) * 1000, 4),
+        }
+
+    def bench_batch(self, target, predictor, X, chunk_size):
+        def run(explain):
+            started = time.perf_counter()
+            for start in range(0, len(X), chunk_size):
+                predictor.predict_batch(X[start:start + chunk_size], explain=explain)
+            return time.perf_counter() - started
+
+        timings = {explain: run(explain) for explain in (False, True)}
+
+        # Separate pass: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        run(True)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'target': target, 'benchmark': 'batch', 'rows': len(X), 'chunk_size': chunk_size,
+            'score_seconds': round(timings[False], 4),
+            'score_rows_per_second': round(len(X) / timings[False]),
+            'score_explain_seconds': round(timings[True], 4),
+            'score_explain_rows_per_second': round(len(X) / timings[True]),
+            'peak_memory_mb': round(peak / 2 ** 20, 2),
+        }
+
+    def bench_db_writes(self, target, predictor, rng, rows):
+        X = synthetic_features(rows, rng)
+        # Timings of a model row that is about to be rolled back would fail
+        # the telemetry flush that writes them
+        with telemetry.disabled(), transaction.atomic():
+            ml_model = MLModel.objects.create(name=f'benchmark {target}', model_type=MODEL_TYPES[target],
+                                              version='bench')
+            model_cache.put(ml_model, predictor)
+
+            started = time.perf_counter()
+            created = Patient.objects.bulk_create([
+                Patient(age=int(row[0]), previous_admissions=int(row[1]),
+                        chronic_conditions=['condition'] * int(row[2]), medication_count=int(row[3]),
+                        length_of_stay=int(row[4]), social_support_score=int(row[5]),
+                        transportation_access=bool(row[6]))
+                for row in X
+            ], batch_size=2000)
+            insert_seconds = time.perf_counter() - started
+
+            patients = Patient.objects.filter(id__in=[patient.pk for patient in created])
+            started = time.perf_counter()
+            outcome = score_patients(patients, ml_model, force=True)
+            score_seconds = time.perf_counter() - started
+
+            # Roll back every row written; sequences don't roll back, so
+            # primary keys and patient numbers drawn here are skipped
+            transaction.set_rollback(True)
+        model_cache.invalidate(ml_model.pk)
+
+        return {
+            'target': target, 'benchmark': 'db_write', 'rows': rows,
+            'patients_scored': outcome['processed'],
+            'patient_insert_seconds': round(insert_seconds, 4),
+            'score_and_write_seconds': round(score_seconds, 4),
+            'rows_per_second': round(outcome['processed'] / score_seconds) if score_seconds else None,
+        }
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,20 @@
+# predictions/management/commands/build_feature_store.py
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.feature_store import get_store
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the columnar patient feature store from the Patient table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50000,
+                            help='Patients read per query')
+
+    def handle(self, *args, **options):
+        store = get_store()
+        if store is None:
+            raise CommandError('The feature store is disabled (FEATURE_STORE_ENABLED=False)')
+
+        count = store.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Stored features for {count} patients in {store.path}'))
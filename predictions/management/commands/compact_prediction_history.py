@@ -0,0 +1,40 @@
+# predictions/management/commands/compact_prediction_history.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.retention import DELETE_CHUNK_SIZE, delete_predictions, superseded_predictions
+
+
+class Command(BaseCommand):
+    help = ('Keep full PredictionResult detail for recent predictions and reduce older history '
+            'to one snapshot per patient per period; run it nightly')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--detail-days', type=int, default=settings.PREDICTION_HISTORY_DETAIL_DAYS,
+                            help='Keep every prediction made within this many days')
+        parser.add_argument('--snapshot-days', type=int, default=settings.PREDICTION_HISTORY_SNAPSHOT_DAYS,
+                            help='Older history keeps the latest prediction per patient per this many days')
+        parser.add_argument('--chunk-size', type=int, default=DELETE_CHUNK_SIZE,
+                            help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between delete transactions')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count the rows that would be removed without deleting them')
+
+    def handle(self, *args, **options):
+        if options['detail_days'] < 0 or options['snapshot_days'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--detail-days must be >= 0, --snapshot-days and --chunk-size >= 1')
+
+        started = time.perf_counter()
+        superseded = superseded_predictions(options['detail_days'], options['snapshot_days'])
+        if options['dry_run']:
+            count = sum(1 for _ in superseded)
+            self.stdout.write(f'{count} predictions would be removed')
+            return
+
+        deleted = delete_predictions(superseded, options['chunk_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {deleted} superseded predictions in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,39 @@
+# predictions/management/commands/export_predictions.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_stream, filter_predictions
+
+
+class Command(BaseCommand):
+    help = 'Stream the PredictionResult history, with patient and model fields, as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--from', dest='date_from', help='Earliest created_at (YYYY-MM-DD or ISO datetime)')
+        parser.add_argument('--to', dest='date_to', help='Latest created_at; a bare date includes that day')
+        parser.add_argument('--model', type=int, help='Only predictions made by this MLModel id')
+        parser.add_argument('--risk-category', choices=['low', 'medium', 'high'])
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Rows fetched per database round trip')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            queryset = filter_predictions(
+                date_from=options['date_from'],
+                date_to=options['date_to'],
+                model_id=options['model'],
+                risk_category=options['risk_category'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = export_stream(queryset, options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+        else:
+            sys.stdout.writelines(chunks)
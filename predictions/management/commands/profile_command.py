@@ -0,0 +1,32 @@
+# predictions/management/commands/profile_command.py
+import argparse
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.profiling import profile
+
+
+class Command(BaseCommand):
+    help = ('Run another management command under the profiler and write its profile and '
+            'SQL summary to PROFILE_DIR, e.g. `profile_command run_prediction_jobs --once`')
+
+    def add_arguments(self, parser):
+        parser.add_argument('command', help='Management command to profile')
+        parser.add_argument('command_args', nargs=argparse.REMAINDER, metavar='args', help='Arguments passed to the command')
+
+    def handle(self, *args, **options):
+        name = options['command']
+        if name == 'profile_command':
+            raise CommandError('profile_command cannot profile itself')
+
+        # Profiles the command's own thread only; work done on job threads isn't seen
+        with profile(' '.join(['manage.py', name, *options['command_args']])) as session:
+            call_command(name, *options['command_args'])
+        if session is None:
+            raise CommandError('Another profile is already running in this process')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(session.queries)} queries, {session.elapsed:.2f}s; '
+            f'profile written to {session.path} (summary in {session.path.with_suffix(".txt").name})'
+        ))
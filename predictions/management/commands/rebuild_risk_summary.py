@@ -0,0 +1,12 @@
+# predictions/management/commands/rebuild_risk_summary.py
+from django.core.management.base import BaseCommand
+
+from predictions import summary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the RiskSummary totals from the PredictionResult table'
+
+    def handle(self, *args, **options):
+        rows = summary.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} risk summary rows'))
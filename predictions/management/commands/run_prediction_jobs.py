@@ -0,0 +1,37 @@
+# predictions/management/commands/run_prediction_jobs.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from predictions.jobs import claim_next_job, run_job
+from predictions.models import PredictionJob
+
+
+class Command(BaseCommand):
+    help = 'Run queued bulk prediction jobs outside the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the jobs currently queued and exit')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between checks for new jobs')
+
+    def handle(self, *args, **options):
+        while True:
+            job_id = claim_next_job()
+            if job_id is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Running prediction job {job_id}')
+            run_job(job_id, claimed=True)
+
+            job = PredictionJob.objects.get(id=job_id)
+            if job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(
+                    f'Job {job_id}: scored {job.processed} patients ({job.throughput:.0f}/s)'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'Job {job_id} failed:\n{job.error}'))
@@ -0,0 +1,44 @@
+# predictions/management/commands/train_model.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from predictions.models import MLModel
+from predictions.training import train_model
+
+
+class Command(BaseCommand):
+    help = 'Train a readmission model on the current patient data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='model_type', default='logistic',
+                            choices=[choice for choice, _ in MLModel.MODEL_TYPES])
+        parser.add_argument('--name', help='Model name (defaults to the model type)')
+        parser.add_argument('--activate', action='store_true',
+                            help='Make the model active if training succeeds')
+
+    def handle(self, *args, **options):
+        model_type = options['model_type']
+        ml_model = MLModel.objects.create(
+            name=options['name'] or f'{dict(MLModel.MODEL_TYPES)[model_type]} Model',
+            model_type=model_type,
+            version=f'{MLModel.objects.filter(model_type=model_type).count() + 1}.0',
+            status='training',
+        )
+
+        if train_model(ml_model.id) != 'ready':
+            ml_model.refresh_from_db()
+            raise CommandError(f'Training failed:\n{ml_model.training_error}')
+
+        ml_model.refresh_from_db()
+        self.stdout.write(self.style.SUCCESS(
+            f'Trained {ml_model.name} v{ml_model.version} on {ml_model.training_samples} patients '
+            f'in {ml_model.training_time:.2f}s: accuracy {ml_model.accuracy:.3f}, '
+            f'precision {ml_model.precision:.3f}, recall {ml_model.recall:.3f}'
+        ))
+
+        if options['activate']:
+            with transaction.atomic():
+                MLModel.objects.filter(is_active=True).update(is_active=False)
+                ml_model.is_active = True
+                ml_model.save(update_fields=['is_active', 'updated_at'])
+            self.stdout.write(self.style.SUCCESS(f'Activated {ml_model.name}'))
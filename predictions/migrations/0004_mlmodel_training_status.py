@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("predictions", "0003_predictionjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mlmodel",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("training", "Training"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="ready",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="mlmodel",
+            name="training_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="mlmodel",
+            name="training_samples",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="mlmodel",
+            name="training_time",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
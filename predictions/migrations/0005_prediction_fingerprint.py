@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("predictions", "0004_mlmodel_training_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="predictionjob",
+            name="skipped",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="predictionresult",
+            name="fingerprint",
+            field=models.CharField(blank=True, default="", max_length=32),
+        ),
+    ]
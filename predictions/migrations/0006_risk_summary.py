@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_risk_summary(apps, schema_editor):
+    PredictionResult = apps.get_model("predictions", "PredictionResult")
+    RiskSummary = apps.get_model("predictions", "RiskSummary")
+    RiskSummary.objects.bulk_create(
+        [
+            RiskSummary(
+                ml_model_id=row["ml_model_id"],
+                risk_category=row["risk_category"],
+                prediction_count=row["count"],
+                risk_score_sum=row["score_sum"],
+                confidence_sum=row["confidence_sum"],
+            )
+            for row in PredictionResult.objects.order_by()
+            .values("ml_model_id", "risk_category")
+            .annotate(
+                count=Count("id"),
+                score_sum=Sum("risk_score"),
+                confidence_sum=Sum("confidence"),
+            )
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("predictions", "0005_prediction_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RiskSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("risk_category", models.CharField(max_length=20)),
+                ("prediction_count", models.BigIntegerField(default=0)),
+                ("risk_score_sum", models.FloatField(default=0.0)),
+                ("confidence_sum", models.FloatField(default=0.0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "ml_model",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="predictions.mlmodel",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ml_model", "risk_category"), name="unique_risk_summary"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_risk_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+
+def keep_one_active_model(apps, schema_editor):
+    # The unique constraint below can't be added while several models are
+    # active; keep the most recently updated one
+    MLModel = apps.get_model("predictions", "MLModel")
+    newest = (
+        MLModel.objects.filter(is_active=True).order_by("-updated_at", "-id").first()
+    )
+    if newest:
+        MLModel.objects.filter(is_active=True).exclude(pk=newest.pk).update(
+            is_active=False
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0004_indexes"),
+        ("predictions", "0006_risk_summary"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="predictionresult",
+            index=models.Index(
+                fields=["patient", "-created_at", "-id"],
+                name="prediction_patient_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="predictionresult",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="prediction_recent_idx"
+            ),
+        ),
+        migrations.RunPython(keep_one_active_model, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="mlmodel",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_active", True)),
+                fields=("is_active",),
+                name="unique_active_model",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("predictions", "0007_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PredictionTiming",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("minute", models.DateTimeField()),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[
+                            ("features", "Feature build"),
+                            ("inference", "Inference"),
+                            ("explanation", "Explanation"),
+                            ("write", "Database write"),
+                            ("total", "Total"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("prediction_count", models.BigIntegerField(default=0)),
+                ("total_seconds", models.FloatField(default=0.0)),
+                ("failures", models.BigIntegerField(default=0)),
+                (
+                    "ml_model",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="predictions.mlmodel",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("minute", "ml_model", "stage"),
+                        name="unique_prediction_timing",
+                    )
+                ],
+            },
+        ),
+    ]
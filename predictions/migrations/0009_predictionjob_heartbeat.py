@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("predictions", "0008_prediction_timing"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="predictionjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("predictions", "0009_predictionjob_heartbeat"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="predictionresult",
+            options={},
+        ),
+    ]
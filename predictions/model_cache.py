@@ -0,0 +1,115 @@
+# predictions/model_cache.py
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connections
+
+from .services import ReadmissionPredictor
+
+# Loaded predictors keyed by (model id, updated_at), least recently used first
+_predictors = OrderedDict()
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def _max_cached_models():
+    return getattr(settings, 'PREDICTION_MODEL_CACHE_SIZE', 2)
+
+
+def _cache_key(ml_model):
+    return (ml_model.pk, ml_model.updated_at)
+
+
+def _load_predictor(ml_model):
+    """Deserialize the artifact of an MLModel into a ReadmissionPredictor"""
+    predictor = ReadmissionPredictor()
+    if not ml_model.model_file:
+        return predictor
+
+    mmap_mode = getattr(settings, 'PREDICTION_MODEL_MMAP_MODE', None)
+    try:
+        local_path = ml_model.model_file.path
+    except NotImplementedError:
+        # Remote storage backends have no local file to map
+        local_path = None
+
+    if mmap_mode and local_path:
+        predictor.load_model(local_path, mmap_mode=mmap_mode)
+    else:
+        with ml_model.model_file.open('rb') as artifact:
+            predictor.load_model(artifact)
+    return predictor
+
+
+def get_predictor(ml_model):
+    """Return the predictor for an MLModel, loading its artifact once per worker.
+
+    Models without an uploaded artifact get the rule-based predictor. Saving
+    the MLModel bumps ``updated_at``, so a re-uploaded artifact is picked up
+    as a new version and the old one is evicted.
+    """
+    key = _cache_key(ml_model)
+    with _lock:
+        predictor = _predictors.get(key)
+        if predictor is not None:
+            _predictors.move_to_end(key)
+            return predictor
+
+        # Loading under the lock keeps concurrent first requests from
+        # deserializing the same artifact several times
+        predictor = _load_predictor(ml_model)
+        _store(key, predictor)
+        return predictor
+
+
+def put(ml_model, predictor):
+    """Cache an already loaded predictor under the current version of ml_model"""
+    with _lock:
+        _store(_cache_key(ml_model), predictor)
+
+
+def _store(key, predictor):
+    # Only the newest version of a model is kept; callers hold _lock
+    for stale_key in [k for k in _predictors if k[0] == key[0]]:
+        del _predictors[stale_key]
+    _predictors[key] = predictor
+    while len(_predictors) > _max_cached_models():
+        _predictors.popitem(last=False)
+
+
+def invalidate(model_id=None):
+    """Drop cached predictors for one model, or all of them"""
+    with _lock:
+        if model_id is None:
+            _predictors.clear()
+            return
+        for key in [k for k in _predictors if k[0] == model_id]:
+            del _predictors[key]
+
+
+def warm_up():
+    """Load the active model's artifact before the first request.
+
+    Called from the WSGI/ASGI modules, so with gunicorn's ``preload_app`` the
+    artifact is mapped once in the master process and inherited by every
+    forked worker instead of being loaded on each worker's first request.
+    """
+    if not getattr(settings, 'PREDICTION_MODEL_WARM_UP', False):
+        return
+
+    from .models import MLModel
+
+    try:
+        active_model = MLModel.objects.filter(is_active=True).first()
+        if active_model:
+            get_predictor(active_model)
+            logger.info('Warmed up prediction model %s (v%s)', active_model.name, active_model.version)
+    except Exception:
+        # A missing table or artifact must not keep the server from starting
+        logger.exception('Could not warm up the active prediction model')
+    finally:
+        # Forked workers must not share the master's database sockets
+        connections.close_all()
@@ -1,5 +1,6 @@
 # predictions/models.py
 from django.db import models
+from django.utils import timezone
 from patients.models import Patient
 
 class MLModel(models.Model):
@@ -10,6 +11,12 @@ class MLModel(models.Model):
         ('neural_net', 'Neural Network'),
     ]
     
+    STATUS_CHOICES = [
+        ('training', 'Training'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+    
     name = models.CharField(max_length=255)
     model_type = models.CharField(max_length=50, choices=MODEL_TYPES)
     version = models.CharField(max_length=50)
@@ -19,9 +26,20 @@ class MLModel(models.Model):
     feature_importance = models.JSONField(default=dict)
     is_active = models.BooleanField(default=False)
     model_file = models.FileField(upload_to='ml_models/')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ready')
+    training_samples = models.IntegerField(default=0)
+    training_time = models.FloatField(null=True, blank=True)  # seconds spent fitting
+    training_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # At most one active model; also serves the is_active=True lookups
+            models.UniqueConstraint(fields=['is_active'], condition=models.Q(is_active=True),
+                                    name='unique_active_model'),
+        ]
+
 class PredictionResult(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
     ml_model = models.ForeignKey(MLModel, on_delete=models.CASCADE)
@@ -33,7 +51,89 @@ class PredictionResult(models.Model):
     ])
     confidence = models.FloatField()  # Model confidence
     top_factors = models.JSONField()  # {"factor": "weight"}
+    fingerprint = models.CharField(max_length=32, blank=True, default='')  # inputs + model version hash
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        # No default ordering: every query would pay for a sort it rarely
+        # needs. Lists that show rows in order say so with order_by().
+        indexes = [
+            # Latest prediction per patient (fingerprint checks, history)
+            models.Index(fields=['patient', '-created_at', '-id'], name='prediction_patient_recent_idx'),
+            # Recent predictions list and date-range exports
+            models.Index(fields=['-created_at', '-id'], name='prediction_recent_idx'),
+        ]
+
+class RiskSummary(models.Model):
+    """Running totals of PredictionResult rows per model and risk category.
+
+    Kept current by predictions.summary.record_predictions so dashboards
+    read a handful of rows instead of scanning PredictionResult.
+    """
+    ml_model = models.ForeignKey(MLModel, on_delete=models.CASCADE)
+    risk_category = models.CharField(max_length=20)
+    prediction_count = models.BigIntegerField(default=0)
+    risk_score_sum = models.FloatField(default=0.0)
+    confidence_sum = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ml_model', 'risk_category'], name='unique_risk_summary'),
+        ]
+
+class PredictionJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    ml_model = models.ForeignKey(MLModel, on_delete=models.SET_NULL, null=True)
+    patient_ids = models.JSONField(default=list, blank=True)  # empty = all patients without predictions
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)  # unchanged since their last prediction
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # last sign of life from the worker
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def throughput(self):
+        """Patients scored per second since the job started"""
+        if not self.started_at or not self.processed:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        elapsed = (end - self.started_at).total_seconds()
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+class PredictionTiming(models.Model):
+    """Prediction latency totals per model, stage and minute.
+
+    Written by predictions.telemetry from every worker, so summing the
+    rows of a time window gives the deployment-wide figures.
+    """
+    STAGES = [
+        ('features', 'Feature build'),
+        ('inference', 'Inference'),
+        ('explanation', 'Explanation'),
+        ('write', 'Database write'),
+        ('total', 'Total'),
+    ]
+
+    minute = models.DateTimeField()
+    ml_model = models.ForeignKey(MLModel, on_delete=models.CASCADE)
+    stage = models.CharField(max_length=20, choices=STAGES)
+    prediction_count = models.BigIntegerField(default=0)
+    total_seconds = models.FloatField(default=0.0)
+    failures = models.BigIntegerField(default=0)  # only counted on the "total" stage
+
+    class Meta:
+        constraints = [
+            # Leading on minute, it also serves the time-window reads
+            models.UniqueConstraint(fields=['minute', 'ml_model', 'stage'], name='unique_prediction_timing'),
+        ]
@@ -0,0 +1,82 @@
+# predictions/retention.py
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from patients.models import Patient
+from .models import PredictionResult
+from .summary import forget_predictions
+
+DELETE_CHUNK_SIZE = 1000
+# Patients whose history is examined per query
+PATIENT_WINDOW = 500
+
+
+def superseded_predictions(detail_days=None, snapshot_days=None):
+    """Yield ids of old PredictionResult rows that compaction removes.
+
+    Everything newer than ``detail_days`` is kept. Older rows are reduced
+    to one snapshot per patient per ``snapshot_days`` period: the latest
+    prediction in it. A patient's most recent prediction is therefore
+    never removed. Patients are walked in id windows so each query reads
+    a slice of the (patient, -created_at, -id) index.
+    """
+    if detail_days is None:
+        detail_days = settings.PREDICTION_HISTORY_DETAIL_DAYS
+    if snapshot_days is None:
+        snapshot_days = settings.PREDICTION_HISTORY_SNAPSHOT_DAYS
+    cutoff = timezone.now() - timedelta(days=detail_days)
+    period = snapshot_days * 86400
+
+    bounds = Patient.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, PATIENT_WINDOW):
+        rows = (
+            PredictionResult.objects
+            .filter(patient_id__gte=start, patient_id__lt=start + PATIENT_WINDOW, created_at__lt=cutoff)
+            .order_by('patient_id', '-created_at', '-id')
+            .values_list('id', 'patient_id', 'created_at')
+        )
+        kept = set()
+        # Fetched whole before yielding: the caller deletes while we walk
+        for prediction_id, patient_id, created_at in rows:
+            snapshot = (patient_id, int(created_at.timestamp() // period))
+            if snapshot in kept:
+                yield prediction_id
+            else:
+                kept.add(snapshot)
+
+
+def delete_predictions(prediction_ids, chunk_size=DELETE_CHUNK_SIZE, pause=0.0):
+    """Delete PredictionResult rows by id in short transactions; return the number deleted.
+
+    Each chunk is one DELETE plus the matching RiskSummary adjustment, so
+    row locks are held briefly and concurrent predictions keep flowing.
+    ``pause`` seconds between chunks throttles the load on a busy database.
+    """
+    deleted = 0
+    chunk = []
+    for prediction_id in prediction_ids:
+        chunk.append(prediction_id)
+        if len(chunk) >= chunk_size:
+            deleted += _delete_chunk(chunk)
+            chunk = []
+            if pause:
+                time.sleep(pause)
+    if chunk:
+        deleted += _delete_chunk(chunk)
+    return deleted
+
+
+def _delete_chunk(prediction_ids):
+    with transaction.atomic():
+        queryset = PredictionResult.objects.filter(id__in=prediction_ids)
+        forget_predictions(queryset)
+        # No signals or reverse relations: a single DELETE statement
+        deleted, _ = queryset.order_by().delete()
+    return deleted
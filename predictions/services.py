@@ -1,52 +1,216 @@
 # predictions/services.py
-import random
+import hashlib
+
+import joblib
+import numpy as np
+
+from . import telemetry
+
+# Column order of the feature matrix used by the batch scoring path
+FEATURE_NAMES = [
+    'age',
+    'previous_admissions',
+    'chronic_conditions_count',
+    'medication_count',
+    'length_of_stay',
+    'social_support_score',
+    'transportation_access',
+]
+
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+RISK_CATEGORIES = np.array(['low', 'medium', 'high'])
+RISK_THRESHOLDS = [0.3, 0.6]
+
+
+# Patient fields the feature vector is computed from
+FEATURE_SOURCE_FIELDS = [
+    'age', 'previous_admissions', 'chronic_conditions', 'medication_count',
+    'length_of_stay', 'social_support_score', 'transportation_access',
+]
+
+
+def _feature_row(age, admissions, conditions, medications, stay, social_support, transportation):
+    return (
+        age or 0,
+        admissions or 0,
+        len(conditions or []),
+        medications or 0,
+        stay or 0,
+        social_support or 0,
+        1 if transportation or transportation is None else 0,
+    )
+
+
+def patient_feature_row(patient):
+    """Feature vector of a single Patient instance, in FEATURE_NAMES order"""
+    return _feature_row(*(getattr(patient, field) for field in FEATURE_SOURCE_FIELDS))
+
+
+def patient_feature_matrix(patients):
+    """Convert a Patient queryset into (ids, feature matrix) with a single query"""
+    rows = patients.values_list('id', *FEATURE_SOURCE_FIELDS)
+    ids = []
+    features = []
+    for patient_id, *values in rows.iterator(chunk_size=2000):
+        ids.append(patient_id)
+        features.append(_feature_row(*values))
+
+    matrix = np.array(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    return np.array(ids, dtype=np.int64), matrix
+
+
+def model_version(ml_model):
+    """Identifies the exact model a score came from; changes when the MLModel row is saved"""
+    return f'{ml_model.pk}:{ml_model.updated_at.isoformat()}'
+
+
+def feature_fingerprints(X, version):
+    """Hex digest per feature row, salted with the model version.
+
+    Two predictions with the same fingerprint were made by the same model on
+    the same inputs, so the second one can be skipped.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    salt = version.encode()
+    return [hashlib.blake2b(row.tobytes(), digest_size=16, key=salt[:64]).hexdigest() for row in X]
+
 
 class ReadmissionPredictor:
     def __init__(self):
         self.model = None
+        self._explainer = None
         
-    def load_model(self, model_path):
-        """Simple model loader - for demo purposes"""
-        self.model = "simple_rule_based"
+    def load_model(self, model_path, mmap_mode=None):
+        """Load a fitted estimator saved with joblib (path or open file).
+
+        With ``mmap_mode='r'`` and an uncompressed artifact on local disk the
+        estimator's NumPy arrays are memory-mapped instead of copied, so
+        every worker process shares the same page-cache pages.
+        """
+        self.model = joblib.load(model_path, mmap_mode=mmap_mode)
+        self._explainer = None
         return True
     
+    @property
+    def has_estimator(self):
+        return hasattr(self.model, 'predict_proba')
+
     def predict(self, patient_data):
-        """Simple prediction using rule-based approach"""
+        """Predict from a single patient dict, using the loaded estimator if any"""
+        row = np.array([[float(patient_data.get(name, 0) or 0) for name in FEATURE_NAMES]])
+        if self.has_estimator:
+            batch = self.predict_batch(row)
+            return {
+                'risk_score': float(batch['risk_scores'][0]),
+                'confidence': float(batch['confidences'][0]),
+                'risk_category': str(batch['risk_categories'][0]),
+                'top_factors': batch['top_factors'][0]
+            }
+
         # Use a simple rule-based calculation
-        risk_score = self._calculate_simple_risk(patient_data)
+        with telemetry.stage('inference'):
+            risk_score = self._calculate_simple_risk(patient_data)
         confidence = 0.85  # Fixed confidence for demo
         
+        with telemetry.stage('explanation'):
+            factors = self.explain(row)[0]
+
         return {
             'risk_score': risk_score,
             'confidence': confidence,
             'risk_category': self._categorize_risk(risk_score),
-            'top_factors': self._get_simple_factors(patient_data)
+            'top_factors': factors
         }
     
+    def predict_batch(self, features, explain=True):
+        """Score many patients in one vectorized pass.
+
+        ``features`` is either a 2D array with columns in ``FEATURE_NAMES``
+        order or a Patient queryset, which is converted with a single query.
+        Returns parallel arrays/lists indexed like the rows of the matrix.
+        With ``explain=False`` the (more expensive) top factors are left empty.
+        """
+        patient_ids = None
+        if hasattr(features, 'values_list'):
+            patient_ids, features = patient_feature_matrix(features)
+
+        X = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+        with telemetry.stage('inference'):
+            if self.has_estimator and len(X):
+                risk_scores = self.model.predict_proba(X)[:, 1]
+                # Distance from the decision boundary, 0.5 (coin flip) to 1.0
+                confidences = np.maximum(risk_scores, 1 - risk_scores)
+            else:
+                risk_scores = self._calculate_batch_risk(X)
+                confidences = np.full(len(X), 0.85)
+            risk_categories = self._categorize_batch(risk_scores)
+
+        with telemetry.stage('explanation'):
+            factors = self.explain(X) if explain else [{} for _ in range(len(X))]
+
+        return {
+            'patient_ids': patient_ids,
+            'risk_scores': risk_scores,
+            'risk_categories': risk_categories,
+            'confidences': confidences,
+            'top_factors': factors,
+        }
+
     def _calculate_simple_risk(self, patient_data):
         """Calculate risk using simple rules"""
+        # Missing values count as 0, as in the feature matrix (_feature_row),
+        # so a patient scores the same through predict() and predict_batch()
         base_risk = 0.1
-        age_factor = min(0.3, patient_data.get('age', 50) / 200)
-        admissions_factor = min(0.3, patient_data.get('previous_admissions', 0) * 0.1)
-        conditions_factor = min(0.3, patient_data.get('chronic_conditions_count', 0) * 0.08)
-        stay_factor = min(0.2, patient_data.get('length_of_stay', 5) / 50)
+        age_factor = min(0.3, (patient_data.get('age') or 0) / 200)
+        admissions_factor = min(0.3, (patient_data.get('previous_admissions') or 0) * 0.1)
+        conditions_factor = min(0.3, (patient_data.get('chronic_conditions_count') or 0) * 0.08)
+        stay_factor = min(0.2, (patient_data.get('length_of_stay') or 0) / 50)
         
         total_risk = base_risk + age_factor + admissions_factor + conditions_factor + stay_factor
         return max(0.05, min(0.95, total_risk))
     
-    def _get_simple_factors(self, patient_data):
-        """Get simple factor analysis"""
-        factors = {}
-        if patient_data.get('age', 0) > 65:
-            factors['Age'] = 25
-        if patient_data.get('previous_admissions', 0) > 1:
-            factors['Previous Admissions'] = 30
-        if patient_data.get('chronic_conditions_count', 0) > 0:
-            factors['Chronic Conditions'] = 35
-        if patient_data.get('length_of_stay', 0) > 7:
-            factors['Length of Stay'] = 20
-        
-        return factors
+    def _calculate_batch_risk(self, X):
+        """Vectorized version of _calculate_simple_risk over a feature matrix"""
+        total_risk = (
+            0.1
+            + np.minimum(0.3, X[:, FEATURE_INDEX['age']] / 200)
+            + np.minimum(0.3, X[:, FEATURE_INDEX['previous_admissions']] * 0.1)
+            + np.minimum(0.3, X[:, FEATURE_INDEX['chronic_conditions_count']] * 0.08)
+            + np.minimum(0.2, X[:, FEATURE_INDEX['length_of_stay']] / 50)
+        )
+        return np.clip(total_risk, 0.05, 0.95)
+
+    def explain(self, X):
+        """Top contributing factors for every row of a feature matrix.
+
+        Uses the exact decomposition of the loaded estimator when it has one
+        (see predictions.explanations), otherwise the additive terms of the
+        rule-based score.
+        """
+        from .explanations import Explainer, top_factors
+
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+        contributions = None
+        if self.has_estimator:
+            if self._explainer is None:
+                self._explainer = Explainer(self.model)
+            contributions = self._explainer.contributions(X)
+        if contributions is None:
+            contributions = self._rule_contributions(X)
+        return top_factors(contributions)
+
+    def _rule_contributions(self, X):
+        """Additive terms of _calculate_batch_risk, one column per feature"""
+        contributions = np.zeros_like(X, dtype=np.float64)
+        contributions[:, FEATURE_INDEX['age']] = np.minimum(0.3, X[:, FEATURE_INDEX['age']] / 200)
+        contributions[:, FEATURE_INDEX['previous_admissions']] = np.minimum(
+            0.3, X[:, FEATURE_INDEX['previous_admissions']] * 0.1)
+        contributions[:, FEATURE_INDEX['chronic_conditions_count']] = np.minimum(
+            0.3, X[:, FEATURE_INDEX['chronic_conditions_count']] * 0.08)
+        contributions[:, FEATURE_INDEX['length_of_stay']] = np.minimum(
+            0.2, X[:, FEATURE_INDEX['length_of_stay']] / 50)
+        return contributions
     
     def _categorize_risk(self, risk_score):
         if risk_score < 0.3:
@@ -54,4 +218,8 @@ class ReadmissionPredictor:
         elif risk_score < 0.6:
             return 'medium'
         else:
-            return 'high'
\ No newline at end of file
+            return 'high'
+
+    def _categorize_batch(self, risk_scores):
+        """Vectorized version of _categorize_risk"""
+        return RISK_CATEGORIES[np.searchsorted(RISK_THRESHOLDS, risk_scores, side='right')]
@@ -0,0 +1,65 @@
+# predictions/signals.py
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from patients.models import Patient
+from .dashboard_cache import bump_data_version
+from .feature_store import get_store
+from .models import MLModel, PredictionResult
+from .services import FEATURE_SOURCE_FIELDS, patient_feature_row
+from .summary import forget_predictions
+
+logger = logging.getLogger(__name__)
+
+
+def _on_commit_safely(func, *args):
+    """Run func after commit; a stale feature row must never fail a save"""
+    def run():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('Feature store refresh failed')
+
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=Patient)
+def refresh_patient_features(sender, instance, update_fields=None, **kwargs):
+    """Keep the patient's row in the feature store current"""
+    if update_fields is not None and not set(update_fields) & set(FEATURE_SOURCE_FIELDS):
+        return
+    store = get_store()
+    if store is None:
+        return
+    _on_commit_safely(store.update, [instance.pk], [patient_feature_row(instance)])
+
+
+@receiver(post_delete, sender=Patient)
+def remove_patient_features(sender, instance, **kwargs):
+    """Drop a deleted patient from the feature store"""
+    store = get_store()
+    if store is None:
+        return
+    _on_commit_safely(store.delete, [instance.pk])
+
+
+@receiver(pre_delete, sender=Patient)
+def forget_patient_predictions(sender, instance, **kwargs):
+    """Take the patient's predictions, about to be cascade-deleted, out of RiskSummary"""
+    forget_predictions(PredictionResult.objects.filter(patient=instance))
+
+
+@receiver(post_save, sender=MLModel)
+@receiver(post_delete, sender=MLModel)
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+def invalidate_dashboard_cache(sender, **kwargs):
+    """Cached dashboard payloads show models and patients; start a new data version.
+
+    PredictionResult writes bump the version through the RiskSummary
+    bookkeeping in summary.py, which every prediction path goes through.
+    """
+    bump_data_version()
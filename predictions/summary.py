@@ -0,0 +1,136 @@
+# predictions/summary.py
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Sum
+from django.utils import timezone
+
+from patients.models import Patient
+from .dashboard_cache import bump_data_version
+from .models import PredictionResult, RiskSummary
+
+RISK_LEVELS = ['high', 'medium', 'low']
+
+
+def record_predictions(ml_model_id, risk_categories, risk_scores, confidences):
+    """Add newly written PredictionResult rows to the running totals.
+
+    Call inside the transaction that writes the rows so the totals commit
+    (or roll back) with them. One UPDATE per category touched; categories
+    are updated in a fixed order so concurrent writers can't deadlock.
+    """
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for category, score, confidence in zip(risk_categories, risk_scores, confidences):
+        total = totals[category]
+        total[0] += 1
+        total[1] += score
+        total[2] += confidence
+    _apply(ml_model_id, totals, sign=1)
+
+
+def forget_predictions(queryset):
+    """Subtract the rows of a PredictionResult queryset that is about to be deleted"""
+    by_model = defaultdict(dict)
+    for row in queryset.order_by().values('ml_model_id', 'risk_category').annotate(
+        count=Count('id'), score_sum=Sum('risk_score'), confidence_sum=Sum('confidence')
+    ):
+        by_model[row['ml_model_id']][row['risk_category']] = [row['count'], row['score_sum'], row['confidence_sum']]
+    for ml_model_id, totals in by_model.items():
+        _apply(ml_model_id, totals, sign=-1)
+
+
+def _apply(ml_model_id, totals, sign):
+    now = timezone.now()
+    with transaction.atomic():
+        # Every PredictionResult write passes through here
+        bump_data_version()
+        for category in sorted(totals):
+            count, score_sum, confidence_sum = totals[category]
+            row = RiskSummary.objects.filter(ml_model_id=ml_model_id, risk_category=category)
+            increment = {
+                'prediction_count': F('prediction_count') + sign * count,
+                'risk_score_sum': F('risk_score_sum') + sign * score_sum,
+                'confidence_sum': F('confidence_sum') + sign * confidence_sum,
+                'updated_at': now,
+            }
+            if not row.update(**increment) and sign > 0:
+                # First prediction in this category; get_or_create tolerates
+                # a concurrent writer creating the row first
+                RiskSummary.objects.get_or_create(ml_model_id=ml_model_id, risk_category=category)
+                row.update(**increment)
+
+
+def rebuild():
+    """Recompute every RiskSummary row from PredictionResult with one GROUP BY"""
+    with transaction.atomic():
+        RiskSummary.objects.all().delete()
+        RiskSummary.objects.bulk_create([
+            RiskSummary(
+                ml_model_id=row['ml_model_id'],
+                risk_category=row['risk_category'],
+                prediction_count=row['count'],
+                risk_score_sum=row['score_sum'],
+                confidence_sum=row['confidence_sum'],
+            )
+            for row in PredictionResult.objects.order_by().values('ml_model_id', 'risk_category').annotate(
+                count=Count('id'), score_sum=Sum('risk_score'), confidence_sum=Sum('confidence')
+            )
+        ])
+        bump_data_version()
+    return RiskSummary.objects.count()
+
+
+def prediction_stats(ml_model=None):
+    """Prediction counts per risk category and average score/confidence.
+
+    Reads the RiskSummary rows, or with ``PREDICTION_SUMMARY_ENABLED`` off
+    computes the same numbers from PredictionResult in one query.
+    """
+    if getattr(settings, 'PREDICTION_SUMMARY_ENABLED', True):
+        rows = RiskSummary.objects.all()
+        if ml_model is not None:
+            rows = rows.filter(ml_model=ml_model)
+        stats = {f'{level}_risk_count': 0 for level in RISK_LEVELS}
+        total = score_sum = confidence_sum = 0
+        for category, count, row_score_sum, row_confidence_sum in rows.values_list(
+            'risk_category', 'prediction_count', 'risk_score_sum', 'confidence_sum'
+        ):
+            if category in RISK_LEVELS:
+                stats[f'{category}_risk_count'] += count
+            total += count
+            score_sum += row_score_sum
+            confidence_sum += row_confidence_sum
+        stats['total_predictions'] = total
+        stats['avg_risk_score'] = score_sum / total if total else 0.0
+        stats['avg_confidence'] = confidence_sum / total if total else 0.0
+        return stats
+
+    queryset = PredictionResult.objects.order_by()
+    if ml_model is not None:
+        queryset = queryset.filter(ml_model=ml_model)
+    stats = queryset.aggregate(
+        total_predictions=Count('id'),
+        avg_risk_score=Avg('risk_score'),
+        avg_confidence=Avg('confidence'),
+        **{f'{level}_risk_count': Count('id', filter=Q(risk_category=level)) for level in RISK_LEVELS},
+    )
+    stats['avg_risk_score'] = stats['avg_risk_score'] or 0.0
+    stats['avg_confidence'] = stats['avg_confidence'] or 0.0
+    return stats
+
+
+def patient_stats():
+    """Patient totals, averages and risk distribution in one conditional aggregate query"""
+    assessed = Q(ml_risk_score__gt=0)
+    stats = Patient.objects.order_by().aggregate(
+        total_patients=Count('id'),
+        total_assessed=Count('id', filter=assessed),
+        avg_risk_score=Avg('ml_risk_score', filter=assessed),
+        avg_stay=Avg('length_of_stay', filter=Q(length_of_stay__gt=0)),
+        **{level: Count('id', filter=Q(risk_category=level)) for level in RISK_LEVELS + ['unknown']},
+    )
+    stats['avg_risk_score'] = stats['avg_risk_score'] or 0.0
+    stats['avg_stay'] = stats['avg_stay'] or 0.0
+    stats['risk_distribution'] = {level: stats.pop(level) for level in RISK_LEVELS + ['unknown']}
+    return stats
@@ -0,0 +1,225 @@
+# predictions/telemetry.py
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# PredictionTiming.STAGES; the model is imported lazily so the scoring code
+# in predictions.services can import this module without the ORM
+STAGES = ['features', 'inference', 'explanation', 'write', 'total']
+
+# (minute, model id, stage, predictions, seconds, failures) records not yet
+# written to PredictionTiming. Appending to a deque needs no lock; when
+# flushes fall behind the oldest records are dropped, never memory.
+_buffer = deque(maxlen=10000)
+# The process's pending flush timer, if any
+_flushed = {'pid': None, 'timer': None, 'pruned': 0.0}
+_timer_lock = threading.Lock()
+
+_current = contextvars.ContextVar('prediction_timer', default=None)
+_disabled = contextvars.ContextVar('prediction_telemetry_disabled', default=False)
+
+
+class PredictionTimer:
+    """Stage timings of one prediction, or one bulk chunk of ``count`` predictions"""
+
+    def __init__(self, ml_model_id, count=1):
+        self.ml_model_id = ml_model_id
+        self.count = count
+        self.stages = defaultdict(float)
+        self.discarded = False
+
+    def discard(self):
+        """Don't record this one (e.g. a previous prediction was reused)"""
+        self.discarded = True
+
+
+@contextmanager
+def timed(ml_model_id, count=1):
+    """Time the enclosed prediction(s); stage() blocks inside are attributed to it.
+
+    The whole block is recorded as the "total" stage, as a failure if it
+    raises.
+    """
+    timer = PredictionTimer(ml_model_id, count)
+    token = _current.set(timer)
+    started = time.perf_counter()
+    failed = True
+    try:
+        yield timer
+        failed = False
+    finally:
+        _current.reset(token)
+        if not timer.discarded and timer.count and not _disabled.get():
+            timer.stages['total'] = time.perf_counter() - started
+            _record(timer, failed)
+
+
+@contextmanager
+def disabled():
+    """Record nothing timed inside the block, e.g. work that will be rolled back"""
+    token = _disabled.set(True)
+    try:
+        yield
+    finally:
+        _disabled.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Add the time spent in the block to the current timer's stage; a no-op outside timed()"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.stages[name] += time.perf_counter() - started
+
+
+def _record(timer, failed):
+    minute = timezone.now().replace(second=0, microsecond=0)
+    for name, seconds in timer.stages.items():
+        failures = timer.count if failed and name == 'total' else 0
+        _buffer.append((minute, timer.ml_model_id, name, timer.count, seconds, failures))
+
+    _schedule_flush()
+
+
+def _schedule_flush():
+    """Write the buffer out FLUSH_INTERVAL seconds after its oldest unwritten timing.
+
+    A timer rather than the next prediction, so a worker's last timings
+    reach analytics even if no prediction follows them. The timer thread
+    writes on its own connection, so a caller's rollback can't lose them.
+    """
+    with _timer_lock:
+        if _flushed['pid'] == os.getpid() and _flushed['timer'] is not None:
+            return
+        # A forked worker doesn't inherit its parent's timer thread
+        timer = threading.Timer(getattr(settings, 'PREDICTION_TELEMETRY_FLUSH_INTERVAL', 30), _flush_from_timer)
+        timer.daemon = True
+        _flushed.update(pid=os.getpid(), timer=timer)
+        timer.start()
+
+
+def _flush_from_timer():
+    with _timer_lock:
+        # Timings recorded from here on schedule the next flush
+        _flushed['timer'] = None
+    try:
+        _flush_safely()
+    finally:
+        connection.close()
+
+
+def flush_on_commit():
+    """Write the buffer once the current transaction commits; for bulk runs, whose
+    process may exit before the timer fires"""
+    transaction.on_commit(_flush_safely)
+
+
+def _flush_safely():
+    try:
+        flush()
+    except Exception:
+        # Telemetry must never fail a prediction
+        logger.exception('Writing prediction telemetry failed')
+
+
+def flush():
+    """Add the buffered timings to PredictionTiming, one UPDATE per (minute, model, stage).
+
+    Each key is written in its own savepoint, so one that can't be written
+    (its model was deleted meanwhile) doesn't lose the others.
+    """
+    from .dashboard_cache import bump_telemetry_version
+    from .models import MLModel, PredictionTiming
+
+    totals = defaultdict(lambda: [0, 0.0, 0])
+    while True:
+        try:
+            minute, ml_model_id, name, count, seconds, failures = _buffer.popleft()
+        except IndexError:
+            break
+        total = totals[(minute, ml_model_id, name)]
+        total[0] += count
+        total[1] += seconds
+        total[2] += failures
+    if not totals:
+        return
+
+    # Timings of deleted models have nothing left to describe
+    live = set(MLModel.objects.filter(id__in={key[1] for key in totals}).values_list('id', flat=True))
+    with transaction.atomic():
+        # Fixed order so concurrent flushes from other workers can't deadlock
+        for key in sorted(key for key in totals if key[1] in live):
+            minute, ml_model_id, name = key
+            count, seconds, failures = totals[key]
+            row = PredictionTiming.objects.filter(minute=minute, ml_model_id=ml_model_id, stage=name)
+            increment = {
+                'prediction_count': F('prediction_count') + count,
+                'total_seconds': F('total_seconds') + seconds,
+                'failures': F('failures') + failures,
+            }
+            try:
+                with transaction.atomic():
+                    if not row.update(**increment):
+                        PredictionTiming.objects.get_or_create(minute=minute, ml_model_id=ml_model_id, stage=name)
+                        row.update(**increment)
+            except DatabaseError:
+                logger.exception('Writing prediction telemetry for model %s failed', ml_model_id)
+        # Only the analytics tab shows these numbers
+        bump_telemetry_version()
+
+    if time.monotonic() - _flushed['pruned'] >= 3600:
+        _flushed['pruned'] = time.monotonic()
+        days = getattr(settings, 'PREDICTION_TELEMETRY_RETENTION_DAYS', 30)
+        PredictionTiming.objects.filter(minute__lt=timezone.now() - timedelta(days=days)).delete()
+
+
+def prediction_telemetry(hours=None):
+    """Measured latency and success rate of the active model over the last ``hours``.
+
+    One aggregate query. Times are milliseconds per prediction; bulk
+    chunks count once per patient scored. Values are None before the
+    active model has made any timed prediction.
+    """
+    from .models import PredictionTiming
+
+    if hours is None:
+        hours = getattr(settings, 'PREDICTION_TELEMETRY_WINDOW_HOURS', 24)
+    rows = PredictionTiming.objects.filter(
+        ml_model__is_active=True, minute__gte=timezone.now() - timedelta(hours=hours)
+    )
+    totals = rows.aggregate(**{
+        f'{name}_{field}': Sum(field, filter=Q(stage=name))
+        for name in STAGES
+        for field in ('prediction_count', 'total_seconds')
+    }, failures=Sum('failures', filter=Q(stage='total')))
+
+    predictions = totals['total_prediction_count'] or 0
+    stage_times = {
+        name: round(totals[f'{name}_total_seconds'] * 1000 / totals[f'{name}_prediction_count'], 3)
+        for name in STAGES
+        if totals[f'{name}_prediction_count']
+    }
+    return {
+        'predictions': predictions,
+        'avg_prediction_time': stage_times.get('total'),
+        'success_rate': round((predictions - totals['failures']) * 100 / predictions, 1) if predictions else None,
+        'stage_times': stage_times,
+    }
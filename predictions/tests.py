@@ -1,3 +1,656 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from backend.testing import create_dataset, isolated_storage
+from patients.models import Patient
+from . import model_cache, summary, training
+from .batch import score_patients
+from .dashboard import PAYLOADS, abuild_payload, build_payload
+from . import telemetry
+from .events import PredictionBroadcaster
+from .feature_store import FeatureStore, get_store, load_features
+from .jobs import claim_next_job
+from .retention import delete_predictions, superseded_predictions
+from .services import FEATURE_INDEX, FEATURE_NAMES, ReadmissionPredictor, patient_feature_matrix, patient_feature_row
+from .models import MLModel, PredictionJob, PredictionResult, PredictionTiming, RiskSummary
+
+
+class IndexPlanMixin:
+    def assertUsesIndex(self, queryset, index_name):
+        """The planner picks index_name for queryset (sequential scans disabled on PostgreSQL)"""
+        if connection.vendor == 'postgresql':
+            # With test-sized tables a sequential scan is always cheapest
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'Expected {index_name} in plan:\n{plan}')
+
+
+@isolated_storage
+@override_settings(PREDICTION_JOBS_IN_PROCESS=False, PREDICTION_SUMMARY_ENABLED=True)
+class DashboardQueryBudgetTests(TestCase):
+    """Query counts per endpoint must not grow with the number of rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ml_model = create_dataset()
+
+    def setUp(self):
+        # Budgets are for a cold cache
+        cache.clear()
+
+    def test_api_dashboard_data(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('predictions:api_dashboard_data'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stats']['total_predictions'], 60)
+
+    def test_api_dashboard_data_without_summary_table(self):
+        with self.settings(PREDICTION_SUMMARY_ENABLED=False), self.assertNumQueries(3):
+            response = self.client.get(reverse('predictions:api_dashboard_data'))
+        self.assertEqual(response.json()['stats']['high_risk_count'], 20)
+
+    def test_api_analytics(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('predictions:api_analytics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['risk_distribution'], {'high': 10, 'medium': 10, 'low': 10, 'unknown': 0})
+
+    def test_api_models(self):
+        MLModel.objects.create(name='Candidate', model_type='random_forest', version='2.0')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('predictions:api_models'))
+        self.assertEqual(response.json()['total_models'], 2)
+
+    def test_payloads_are_cached_until_data_changes(self):
+        url = reverse('predictions:api_dashboard_data')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['stats']['total_predictions'], 60)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = Patient.objects.first()
+            PredictionResult.objects.create(patient=patient, ml_model=self.ml_model, risk_score=0.9,
+                                            risk_category='high', confidence=0.8, top_factors={})
+            summary.record_predictions(self.ml_model.pk, ['high'], [0.9], [0.8])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['stats']['total_predictions'], 61)
+
+    def test_model_changes_invalidate_models_payload(self):
+        url = reverse('predictions:api_models')
+        self.assertEqual(self.client.get(url).json()['total_models'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            MLModel.objects.create(name='Candidate', model_type='random_forest', version='2.0')
+        self.assertEqual(self.client.get(url).json()['total_models'], 2)
+
+    def test_unchanged_payload_answers_not_modified(self):
+        url = reverse('predictions:api_analytics')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Patient.objects.create(first_name='New', last_name='Patient', age=50)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['total_patients'], 31)
+
+    def test_bulk_predict(self):
+        self.client.force_login(get_user_model().objects.create_user(username='clinician', password='secret'))
+        # Session and user lookups, then the active model and the job
+        with self.assertNumQueries(4):
+            response = self.client.post(reverse('predictions:bulk_predict'))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(PredictionJob.objects.get().status, 'queued')
+
+    def test_bulk_predict_rejects_anonymous_users_and_bad_ids(self):
+        url = reverse('predictions:bulk_predict')
+        self.assertEqual(self.client.post(url).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user(username='clinician', password='secret'))
+        response = self.client.post(url, {'patient_ids': ['1', 'x']})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PredictionJob.objects.exists())
+
+
+@isolated_storage
+@override_settings(PREDICTION_JOBS_IN_PROCESS=False, PREDICTION_JOB_TIMEOUT=600)
+class JobRecoveryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ml_model = create_dataset(patients=3)
+
+    def job(self, status, heartbeat=None, started=None):
+        now = timezone.now()
+        return PredictionJob.objects.create(
+            ml_model=self.ml_model, status=status,
+            heartbeat_at=heartbeat and now - timedelta(seconds=heartbeat),
+            started_at=started and now - timedelta(seconds=started),
+        )
+
+    def test_jobs_of_dead_workers_fail(self):
+        dead = self.job('running', heartbeat=601, started=5000)
+        dead_before_heartbeats = self.job('running', started=601)
+        alive = self.job('running', heartbeat=60, started=5000)
+        queued = self.job('queued')
+
+        response = self.client.get(reverse('predictions:job_status', args=[dead.id]))
+        self.assertEqual(response.json()['status'], 'failed')
+        self.assertIn('stopped responding', response.json()['error'])
+        dead_before_heartbeats.refresh_from_db()
+        self.assertEqual(dead_before_heartbeats.status, 'failed')
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, 'running')
+
+        self.assertEqual(claim_next_job(), queued.id)
+        queued.refresh_from_db()
+        self.assertIsNotNone(queued.heartbeat_at)
+
+
+@isolated_storage
+@override_settings(MODEL_TRAINING_TIMEOUT=3600)
+class TrainingRecoveryTests(TestCase):
+
+    def training_model(self, age):
+        ml_model = MLModel.objects.create(name=f'Started {age}s ago', model_type='logistic', version='1.0',
+                                          status='training')
+        MLModel.objects.filter(id=ml_model.id).update(created_at=timezone.now() - timedelta(seconds=age))
+        return ml_model
+
+    def test_abandoned_training_fails_when_models_are_listed(self):
+        abandoned = self.training_model(3601)
+        running = self.training_model(60)
+
+        cache.clear()
+        self.assertEqual(self.client.get(reverse('predictions:api_models')).status_code, 200)
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.status, 'failed')
+        self.assertIn('stopped before it finished', abandoned.training_error)
+        running.refresh_from_db()
+        self.assertEqual(running.status, 'training')
+
+    def test_abandoned_training_fails_when_activated(self):
+        abandoned = self.training_model(3601)
+        response = self.client.post(reverse('predictions:activate_model', args=[abandoned.id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Failed', response.json()['error'])
+
+    def test_pool_failures_close_the_callback_threads_connection(self):
+        ml_model = self.training_model(60)
+        future = mock.Mock(**{'exception.return_value': RuntimeError('worker killed')})
+        with mock.patch.object(training, 'connection') as callback_connection:
+            training._log_pool_failure(ml_model.id, future)
+        callback_connection.close.assert_called_once_with()
+        ml_model.refresh_from_db()
+        self.assertEqual((ml_model.status, ml_model.training_error), ('failed', 'worker killed'))
+
+    def test_training_requires_staff(self):
+        url = reverse('predictions:train_model')
+        self.assertEqual(self.client.post(url, {'model_type': 'logistic'}).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user(username='clinician', password='secret'))
+        self.assertEqual(self.client.post(url, {'model_type': 'logistic'}).status_code, 403)
+
+        self.client.force_login(get_user_model().objects.create_user(username='admin', password='secret',
+                                                                     role='admin'))
+        with mock.patch('predictions.views.submit_training') as submit:
+            response = self.client.post(url, {'model_type': 'logistic'})
+        self.assertEqual(response.status_code, 202)
+        submit.assert_called_once()
+
+
+@isolated_storage
+class IndexTests(IndexPlanMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ml_model = create_dataset()
+
+    def test_recent_predictions_use_created_at_index(self):
+        recent = PredictionResult.objects.select_related('patient').order_by('-created_at', '-id')[:10]
+        self.assertUsesIndex(recent, 'prediction_recent_idx')
+
+    def test_unordered_queries_do_not_sort(self):
+        sql = str(PredictionResult.objects.filter(risk_category='high').query)
+        self.assertNotIn('ORDER BY', sql)
+
+    def test_latest_patient_prediction_uses_patient_index(self):
+        patient = Patient.objects.first()
+        self.assertUsesIndex(
+            PredictionResult.objects.filter(patient=patient).order_by('-created_at', '-id')[:1],
+            'prediction_patient_recent_idx',
+        )
+
+    def test_risk_category_filter_uses_category_index(self):
+        self.assertUsesIndex(
+            Patient.objects.filter(risk_category='high').order_by('-ml_risk_score', '-id')[:50],
+            'patient_category_score_idx',
+        )
+
+    def test_unscored_patients_use_score_index(self):
+        self.assertUsesIndex(Patient.objects.filter(ml_risk_score=0).values('id'), 'patient_score_idx')
+
+    def test_active_model_lookup_uses_partial_index(self):
+        self.assertUsesIndex(MLModel.objects.filter(is_active=True), 'unique_active_model')
+
+    def test_only_one_model_can_be_active(self):
+        with self.assertRaises(IntegrityError):
+            MLModel.objects.create(name='Second', model_type='logistic', version='2.0', is_active=True)
+
+
+@isolated_storage
+class AsyncDashboardTests(TransactionTestCase):
+    """The concurrent queries run on other connections, so the data must be committed"""
+
+    def setUp(self):
+        create_dataset()
+
+    async def test_async_payloads_match_sync(self):
+        for name in PAYLOADS:
+            with self.subTest(name):
+                self.assertEqual(await abuild_payload(name), await sync_to_async(build_payload)(name))
+
+
+@isolated_storage
+class PredictionEventTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ml_model = create_dataset(patients=3)
+
+    def test_stream_requires_login(self):
+        response = self.client.get(reverse('predictions:prediction_events'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_changes_since_last_poll(self):
+        broadcaster = PredictionBroadcaster()
+        broadcaster._version, broadcaster._last_id = broadcaster._position()
+        self.assertEqual(broadcaster._changes()[0], 'refresh')
+
+        patient = Patient.objects.first()
+        prediction = PredictionResult.objects.create(patient=patient, ml_model=self.ml_model, risk_score=0.7,
+                                                     risk_category='high', confidence=0.8, top_factors={})
+        name, data = broadcaster._changes()
+        self.assertEqual(name, 'predictions')
+        self.assertEqual([row['id'] for row in data['predictions']], [prediction.id])
+        self.assertEqual(data['predictions'][0]['patient_id'], patient.patient_id)
+        self.assertEqual(broadcaster._changes()[0], 'refresh')
+
+
+@isolated_storage
+class TelemetryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ml_model = create_dataset(patients=3)
+
+    def setUp(self):
+        reset_telemetry()
+
+    def test_timings_and_failures_reach_analytics(self):
+        for fail in (False, False, False, True):
+            try:
+                with telemetry.timed(self.ml_model.pk):
+                    with telemetry.stage('inference'):
+                        pass
+                    if fail:
+                        raise ValueError('scoring failed')
+            except ValueError:
+                pass
+        with telemetry.timed(self.ml_model.pk) as timer:
+            timer.discard()
+        telemetry.flush()
+
+        stats = telemetry.prediction_telemetry()
+        self.assertEqual(stats['predictions'], 4)
+        self.assertEqual(stats['success_rate'], 75.0)
+        self.assertIsNotNone(stats['avg_prediction_time'])
+        self.assertEqual(set(stats['stage_times']), {'inference', 'total'})
+
+    def test_no_measurements(self):
+        self.assertEqual(telemetry.prediction_telemetry()['avg_prediction_time'], None)
+
+    def test_unwritable_timings_dont_lose_the_others(self):
+        deleted = MLModel.objects.create(name='Deleted', model_type='logistic', version='2.0')
+        for ml_model_id in (deleted.pk, self.ml_model.pk):
+            with telemetry.timed(ml_model_id):
+                with telemetry.stage('inference'):
+                    pass
+        deleted.delete()
+
+        get_or_create = PredictionTiming.objects.get_or_create
+
+        def fail_inference(**kwargs):
+            if kwargs['stage'] == 'inference':
+                raise IntegrityError('simulated')
+            return get_or_create(**kwargs)
+
+        with mock.patch.object(PredictionTiming.objects, 'get_or_create', side_effect=fail_inference), \
+                self.assertLogs('predictions.telemetry', 'ERROR'):
+            telemetry.flush()
+        self.assertEqual(list(PredictionTiming.objects.values_list('ml_model_id', 'stage')),
+                         [(self.ml_model.pk, 'total')])
+
+    def test_flushes_only_invalidate_analytics(self):
+        etags = {name: self.client.get(reverse(f'predictions:{name}'))['ETag']
+                 for name in ('api_dashboard_data', 'api_analytics', 'api_models')}
+        with telemetry.timed(self.ml_model.pk):
+            pass
+        with self.captureOnCommitCallbacks(execute=True):
+            telemetry.flush()
+
+        for name, etag in etags.items():
+            response = self.client.get(reverse(f'predictions:{name}'), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200 if name == 'api_analytics' else 304, name)
+
+    def test_db_write_benchmark_leaves_no_rows_or_timings(self):
+        patients, predictions = Patient.objects.count(), PredictionResult.objects.count()
+        out = io.StringIO()
+        call_command('benchmark_predictions', '--model-types', 'random_forest', '--train-rows', '200',
+                     '--sizes', '10', '--single-calls', '5', '--db-rows', '20', stdout=out, stderr=io.StringIO())
+
+        results = json.loads(out.getvalue())['results']
+        self.assertEqual([r['patients_scored'] for r in results if r['benchmark'] == 'db_write'], [20, 20])
+        self.assertEqual(list(MLModel.objects.values_list('id', flat=True)), [self.ml_model.pk])
+        self.assertEqual((Patient.objects.count(), PredictionResult.objects.count()), (patients, predictions))
+        self.assertEqual(len(telemetry._buffer), 0)
+
+
+def reset_telemetry():
+    """Drop timings and the pending flush timer other tests left in this process"""
+    with telemetry._timer_lock:
+        if telemetry._flushed['timer'] is not None:
+            telemetry._flushed['timer'].cancel()
+        telemetry._flushed['timer'] = None
+    telemetry._buffer.clear()
+
+
+@isolated_storage
+class TelemetryFlushTests(TransactionTestCase):
+    """Buffered timings are written without waiting for another prediction"""
+
+    def setUp(self):
+        reset_telemetry()
+        self.addCleanup(reset_telemetry)
+        self.ml_model = create_dataset(patients=3)
+
+    def test_bulk_scoring_flushes_when_done(self):
+        score_patients(Patient.objects.all(), self.ml_model)
+        self.assertEqual(telemetry.prediction_telemetry()['predictions'], 3)
+        self.assertEqual(len(telemetry._buffer), 0)
+
+    @override_settings(PREDICTION_TELEMETRY_FLUSH_INTERVAL=0.05)
+    def test_timer_flushes_the_last_timings(self):
+        with telemetry.timed(self.ml_model.pk):
+            pass
+        pending = telemetry._flushed['timer']
+        pending.join(timeout=5)
+        self.assertEqual(PredictionTiming.objects.get(stage='total').prediction_count, 1)
+
+
+@isolated_storage
+class RetentionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ml_model = create_dataset(patients=3)
+
+    def test_old_history_is_reduced_to_snapshots(self):
+        patient = Patient.objects.first()
+        now = timezone.now()
+        # Two predictions 100 days ago, a day apart, and two within the detail window
+        ages = [0, 5, 100, 101]
+        ids = []
+        for days in ages:
+            prediction = PredictionResult.objects.create(patient=patient, ml_model=self.ml_model, risk_score=0.5,
+                                                         risk_category='medium', confidence=0.9, top_factors={})
+            PredictionResult.objects.filter(id=prediction.id).update(created_at=now - timedelta(days=days))
+            ids.append(prediction.id)
+        summary.rebuild()
+
+        superseded = list(superseded_predictions(detail_days=30, snapshot_days=10000))
+        self.assertEqual(superseded, [ids[3]])
+
+        self.assertEqual(delete_predictions(superseded, chunk_size=1), 1)
+        self.assertFalse(PredictionResult.objects.filter(id=ids[3]).exists())
+        self.assertEqual(PredictionResult.objects.filter(patient=patient).count(), 5)
+        stats = summary.prediction_stats()
+        with self.settings(PREDICTION_SUMMARY_ENABLED=False):
+            self.assertEqual(summary.prediction_stats(), stats)
+
+
+@isolated_storage
+class SinglePredictionTests(TestCase):
+    """predict_readmission and bulk scoring give a patient the same result"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ml_model = create_dataset(patients=3)
+        cls.patient = Patient.objects.create(patient_id='T-NOCAR', age=71, previous_admissions=2,
+                                             length_of_stay=6, transportation_access=False)
+
+    def setUp(self):
+        self.addCleanup(model_cache.invalidate)
+
+    def predict(self):
+        response = self.client.post(reverse('predictions:predict_readmission', args=[self.patient.id]))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_estimator_scores_the_fingerprinted_row(self):
+        from sklearn.linear_model import LogisticRegression
+
+        # Risk driven by the lack of transportation alone
+        rng = np.random.default_rng(0)
+        X = rng.integers(0, 5, size=(200, len(FEATURE_NAMES))).astype(float)
+        X[:, FEATURE_INDEX['transportation_access']] = rng.integers(0, 2, size=200)
+        y = 1 - X[:, FEATURE_INDEX['transportation_access']]
+        predictor = ReadmissionPredictor()
+        predictor.model = LogisticRegression().fit(X, y)
+        model_cache.put(self.ml_model, predictor)
+
+        result = self.predict()
+        self.assertEqual(result['risk_category'], 'high')
+
+        bulk = score_patients(Patient.objects.filter(id=self.patient.id), self.ml_model, force=True)
+        self.assertEqual(bulk['preview'], [(self.patient.id, result['risk_score'], result['risk_category'])])
+        self.assertEqual(score_patients(Patient.objects.filter(id=self.patient.id), self.ml_model)['skipped'], 1)
+
+    def test_rule_based_prediction_matches_bulk(self):
+        result = self.predict()
+        self.assertTrue(self.predict()['unchanged'])
+
+        bulk = score_patients(Patient.objects.filter(id=self.patient.id), self.ml_model, force=True)
+        self.assertEqual(bulk['preview'], [(self.patient.id, result['risk_score'], result['risk_category'])])
+        latest = PredictionResult.objects.filter(patient=self.patient).latest('id')
+        self.assertEqual(latest.top_factors, result['top_factors'])
+        self.assertEqual(latest.confidence, result['confidence'])
+
+
+@isolated_storage
+class FeatureStoreTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Patient.objects.bulk_create([
+            Patient(patient_id=f'F{i:03d}', age=30 + i, previous_admissions=i % 4,
+                    chronic_conditions=['copd'] * (i % 3), medication_count=i, length_of_stay=i % 7,
+                    social_support_score=i % 5, transportation_access=i % 2 == 0)
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(FEATURE_STORE_DIR=Path(directory.name))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.store = get_store()
+        self.store.rebuild()
+
+    def assertStoreMatchesPatients(self):
+        ids, X = patient_feature_matrix(Patient.objects.all())
+        stored_ids, stored_X = self.store.read()
+        np.testing.assert_array_equal(stored_ids, ids)
+        np.testing.assert_array_equal(stored_X, X)
+        loaded_ids, loaded_X = load_features(ids)
+        np.testing.assert_array_equal(loaded_ids, ids)
+        np.testing.assert_array_equal(loaded_X, X)
+
+    def test_rebuild(self):
+        self.assertStoreMatchesPatients()
+
+    def test_grows_past_capacity(self):
+        capacity = len(self.store._open())
+        before = self.store._open()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(capacity + 1):
+                Patient.objects.create(patient_id=f'G{i:03d}', age=80, previous_admissions=i)
+
+        self.assertGreaterEqual(len(self.store._open()), 2 * capacity)
+        self.assertStoreMatchesPatients()
+        # A map opened before the file was replaced still reads the old rows
+        self.assertEqual(len(before), capacity)
+        self.assertEqual(int(before[Patient.objects.get(patient_id='F001').pk, 0]), 1)
+
+    def test_saves_and_deletes_keep_rows_current(self):
+        patient = Patient.objects.get(patient_id='F002')
+        with self.captureOnCommitCallbacks(execute=True):
+            patient.age = 99
+            patient.transportation_access = False
+            patient.save()
+        self.assertStoreMatchesPatients()
+
+        # Saves that don't touch a feature leave the store alone
+        with mock.patch.object(FeatureStore, 'update') as update, self.captureOnCommitCallbacks(execute=True):
+            patient.risk_category = 'high'
+            patient.save(update_fields=['risk_category'])
+        update.assert_not_called()
+
+        deleted = Patient.objects.get(patient_id='F003').pk
+        with self.captureOnCommitCallbacks(execute=True):
+            Patient.objects.filter(pk=deleted).get().delete()
+        self.assertNotIn(deleted, self.store.read()[0])
+        self.assertStoreMatchesPatients()
+
+    def test_rows_missing_from_the_store_are_read_from_the_database(self):
+        # bulk_create skips the save signal
+        Patient.objects.bulk_create([Patient(patient_id='F100', age=50, length_of_stay=3)])
+        ids, X = patient_feature_matrix(Patient.objects.all())
+        loaded_ids, loaded_X = load_features(ids)
+        order = np.argsort(loaded_ids)
+        np.testing.assert_array_equal(loaded_ids[order], ids)
+        np.testing.assert_array_equal(loaded_X[order], X)
+
+
+class FixedScores:
+    """Stand-in estimator returning preset probabilities"""
+
+    def __init__(self, scores):
+        self.scores = np.asarray(scores)
+
+    def predict_proba(self, X):
+        return np.column_stack([1 - self.scores, self.scores])
+
+
+class RiskCategoryTests(SimpleTestCase):
+
+    def test_threshold_scores_fall_into_the_higher_category(self):
+        scores = [0.0, 0.2999, 0.3, 0.5999, 0.6, 0.95]
+        predictor = ReadmissionPredictor()
+        predictor.model = FixedScores(scores)
+        batch = predictor.predict_batch(np.zeros((len(scores), len(FEATURE_NAMES))), explain=False)
+        expected = ['low', 'low', 'medium', 'medium', 'high', 'high']
+        self.assertEqual(batch['risk_categories'].tolist(), expected)
+        self.assertEqual([predictor._categorize_risk(score) for score in scores], expected)
+
+
+class RuleParityTests(SimpleTestCase):
+
+    def test_missing_fields_score_the_same_through_both_paths(self):
+        predictor = ReadmissionPredictor()
+        for data in ({}, {'age': None, 'previous_admissions': 2}, {'age': 80, 'length_of_stay': None},
+                     {'chronic_conditions_count': 3, 'length_of_stay': 12}):
+            with self.subTest(data=data):
+                patient = Patient(age=data.get('age'), previous_admissions=data.get('previous_admissions') or 0,
+                                  chronic_conditions=['condition'] * data.get('chronic_conditions_count', 0),
+                                  length_of_stay=data.get('length_of_stay'))
+                batch = predictor.predict_batch(np.array([patient_feature_row(patient)]))
+                single = predictor.predict(data)
+                self.assertAlmostEqual(single['risk_score'], float(batch['risk_scores'][0]))
+                self.assertEqual(single['risk_category'], str(batch['risk_categories'][0]))
+
+
+@isolated_storage
+class BulkScoringTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ml_model = create_dataset(patients=6)
+
+    def score(self, **kwargs):
+        return score_patients(Patient.objects.all(), self.ml_model, **kwargs)
+
+    def assertSummaryMatchesPredictions(self):
+        def rounded(stats):
+            return {key: round(value, 9) for key, value in stats.items()}
+
+        with self.settings(PREDICTION_SUMMARY_ENABLED=False):
+            expected = rounded(summary.prediction_stats())
+        self.assertEqual(rounded(summary.prediction_stats()), expected)
+        self.assertEqual(
+            {(row.ml_model_id, row.risk_category): row.prediction_count
+             for row in RiskSummary.objects.all() if row.prediction_count},
+            {(row['ml_model_id'], row['risk_category']): row['count']
+             for row in PredictionResult.objects.values('ml_model_id', 'risk_category').annotate(count=Count('id'))},
+        )
+
+    def test_unchanged_patients_are_skipped(self):
+        first = self.score()
+        self.assertEqual((first['processed'], first['skipped'], len(first['preview'])), (6, 0, 6))
+        written = PredictionResult.objects.count()
+
+        second = self.score()
+        self.assertEqual((second['skipped'], second['preview']), (6, []))
+        self.assertEqual(PredictionResult.objects.count(), written)
+
+        patient = Patient.objects.order_by('id').first()
+        patient.previous_admissions += 1
+        patient.save()
+        third = self.score()
+        self.assertEqual(third['skipped'], 5)
+        self.assertEqual([row[0] for row in third['preview']], [patient.id])
+
+        self.assertEqual(self.score(force=True)['skipped'], 0)
+        # Saving the model changes its version, so every fingerprint changes
+        self.ml_model.save()
+        self.assertEqual(self.score()['skipped'], 0)
+
+    def test_summary_follows_scoring_and_deletes(self):
+        self.score()
+        self.assertSummaryMatchesPredictions()
+
+        Patient.objects.order_by('id').first().delete()
+        self.assertSummaryMatchesPredictions()
+
+        oldest = list(PredictionResult.objects.order_by('id').values_list('id', flat=True)[:4])
+        self.assertEqual(delete_predictions(oldest, chunk_size=3), 4)
+        self.assertSummaryMatchesPredictions()
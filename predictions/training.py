@@ -0,0 +1,202 @@
+# predictions/training.py
+import io
+import logging
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import django
+import joblib
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+
+from patients.models import Patient
+from .models import MLModel
+from .dashboard_cache import bump_data_version
+from .feature_store import load_features
+from .services import FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+# A patient counts as readmitted when they came back within this many days
+# of their previous discharge
+READMISSION_WINDOW_DAYS = 30
+
+MIN_TRAINING_SAMPLES = 20
+
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # "spawn" gives each training process a clean interpreter instead of
+        # a fork of a web worker holding open sockets and DB connections.
+        # The initializer is referenced before this module can be imported
+        # in the child, so it has to be django.setup itself.
+        _pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'MODEL_TRAINING_PROCESSES', 1),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+    return _pool
+
+
+def submit_training(ml_model):
+    """Train ml_model in the process pool once the current transaction commits"""
+    def submit():
+        future = _get_pool().submit(train_model, ml_model.id)
+        future.add_done_callback(lambda f: _log_pool_failure(ml_model.id, f))
+
+    transaction.on_commit(submit)
+
+
+def _log_pool_failure(model_id, future):
+    # train_model records its own errors; this only fires if the pool broke
+    global _pool
+    if isinstance(future.exception(), BrokenProcessPool):
+        _pool = None
+    if future.exception() is None:
+        return
+    try:
+        logger.error('Training process for model %s died: %s', model_id, future.exception())
+        MLModel.objects.filter(id=model_id, status='training').update(
+            status='failed', training_error=str(future.exception())
+        )
+        bump_data_version()
+    finally:
+        # Runs on the executor's callback thread, which has its own connection
+        connection.close()
+
+
+def training_cutoff():
+    """Models still training that were created before this are presumed dead"""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'MODEL_TRAINING_TIMEOUT', 3600))
+
+
+def fail_stale_training():
+    """Fail models still training after MODEL_TRAINING_TIMEOUT seconds.
+
+    The pool lives in the web process, so a worker restart or redeploy
+    takes its training runs with it and their rows would stay in
+    "training", never to be activated. Returns the number of rows failed.
+    """
+    failed = MLModel.objects.filter(status='training', created_at__lt=training_cutoff()).update(
+        status='failed', updated_at=timezone.now(),
+        training_error='The process training this model stopped before it finished; train it again',
+    )
+    if failed:
+        bump_data_version()
+    return failed
+
+
+def build_estimator(model_type):
+    """Return an unfitted estimator for one of MLModel.MODEL_TYPES"""
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.neural_network import MLPClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if model_type == 'logistic':
+        return LogisticRegression(max_iter=1000)
+    if model_type == 'random_forest':
+        return RandomForestClassifier(n_estimators=200, min_samples_leaf=5, random_state=42)
+    if model_type == 'xgboost':
+        try:
+            from xgboost import XGBClassifier
+            return XGBClassifier(n_estimators=200, max_depth=4, learning_rate=0.1)
+        except ImportError:
+            # xgboost is optional; gradient boosting is the closest built-in
+            return GradientBoostingClassifier(random_state=42)
+    if model_type == 'neural_net':
+        return make_pipeline(
+            StandardScaler(),
+            MLPClassifier(hidden_layer_sizes=(32, 16), max_iter=500, random_state=42),
+        )
+    raise ValueError(f'Unknown model type: {model_type}')
+
+
+def load_training_data():
+    """Return (features, labels) for every patient with a known discharge history"""
+    days_since_discharge = dict(
+        Patient.objects.filter(time_since_last_discharge__isnull=False)
+        .values_list('id', 'time_since_last_discharge')
+    )
+    ids, X = load_features(list(days_since_discharge))
+    y = np.array([days_since_discharge[patient_id] <= READMISSION_WINDOW_DAYS for patient_id in ids], dtype=np.int8)
+    return X, y
+
+
+def feature_importance(estimator):
+    """Normalized importance per feature name, if the estimator exposes it"""
+    final_step = estimator.steps[-1][1] if hasattr(estimator, 'steps') else estimator
+    if hasattr(final_step, 'feature_importances_'):
+        weights = np.asarray(final_step.feature_importances_, dtype=np.float64)
+    elif hasattr(final_step, 'coef_'):
+        weights = np.abs(np.asarray(final_step.coef_, dtype=np.float64)).ravel()
+    else:
+        return {}
+
+    total = weights.sum()
+    if total <= 0:
+        return {}
+    return {name: round(float(weight / total), 3) for name, weight in zip(FEATURE_NAMES, weights)}
+
+
+def train_model(model_id):
+    """Fit, evaluate and persist the estimator for an MLModel row.
+
+    Runs inside a training process; the outcome is recorded on the row.
+    """
+    from sklearn.metrics import accuracy_score, precision_score, recall_score
+    from sklearn.model_selection import train_test_split
+
+    ml_model = MLModel.objects.get(id=model_id)
+    try:
+        X, y = load_training_data()
+        if len(y) < MIN_TRAINING_SAMPLES or len(np.unique(y)) < 2:
+            raise ValueError(
+                f'Need at least {MIN_TRAINING_SAMPLES} patients with a discharge history, '
+                'including both readmitted and non-readmitted ones'
+            )
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, stratify=y, random_state=42
+        )
+
+        estimator = build_estimator(ml_model.model_type)
+        started = time.perf_counter()
+        estimator.fit(X_train, y_train)
+        training_time = time.perf_counter() - started
+
+        y_pred = estimator.predict(X_test)
+
+        # Uncompressed so the model cache can memory-map the arrays
+        artifact = io.BytesIO()
+        joblib.dump(estimator, artifact)
+        ml_model.model_file.save(
+            f'{ml_model.model_type}_{ml_model.id}.joblib', ContentFile(artifact.getvalue()), save=False
+        )
+
+        ml_model.accuracy = float(accuracy_score(y_test, y_pred))
+        ml_model.precision = float(precision_score(y_test, y_pred, zero_division=0))
+        ml_model.recall = float(recall_score(y_test, y_pred, zero_division=0))
+        ml_model.feature_importance = feature_importance(estimator)
+        ml_model.training_samples = len(y)
+        ml_model.training_time = round(training_time, 3)
+        ml_model.status = 'ready'
+        ml_model.save()
+    except Exception:
+        logger.exception('Training model %s failed', model_id)
+        ml_model.status = 'failed'
+        ml_model.training_error = traceback.format_exc(limit=5)
+        ml_model.save(update_fields=['status', 'training_error', 'updated_at'])
+
+    return ml_model.status
@@ -1,18 +1,28 @@
 # predictions/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'predictions'
 
+if settings.DASHBOARD_ASYNC_VIEWS:
+    dashboard_views = [views.api_dashboard_data_async, views.api_analytics_async, views.api_models_async]
+else:
+    dashboard_views = [views.api_dashboard_data, views.api_analytics, views.api_models]
+
 urlpatterns = [
     # API endpoints for clinical dashboard tabs
-    path('api/dashboard-data/', views.api_dashboard_data, name='api_dashboard_data'),
-    path('api/analytics/', views.api_analytics, name='api_analytics'),
-    path('api/models/', views.api_models, name='api_models'),
+    path('api/dashboard-data/', dashboard_views[0], name='api_dashboard_data'),
+    path('api/analytics/', dashboard_views[1], name='api_analytics'),
+    path('api/models/', dashboard_views[2], name='api_models'),
+    path('events/', views.prediction_events, name='prediction_events'),
     
     # Prediction endpoints
     path('patient/<int:patient_id>/predict/', views.predict_readmission, name='predict_readmission'),
     path('bulk-predict/', views.bulk_predict, name='bulk_predict'),
+    path('prediction/<int:prediction_id>/explain/', views.explain_prediction, name='explain_prediction'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('export/', views.export_predictions, name='export_predictions'),
     
     # Model management endpoints
     path('train-model/', views.train_model, name='train_model'),
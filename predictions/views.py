@@ -1,68 +1,39 @@
 # predictions/views.py
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
-from django.template.loader import render_to_string
-from django.db.models import Avg
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
+from django.urls import reverse
+from django.db import transaction
+from django.utils import timezone
 import json
-import random
 
-# Handle pandas import gracefully
-try:
-    import pandas as pd
-    import numpy as np
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-    print("Warning: pandas not available, using fallback prediction methods")
+import numpy as np
 
-from .models import MLModel, PredictionResult
+from .models import MLModel, PredictionJob, PredictionResult
 from patients.models import Patient
-from .services import ReadmissionPredictor
+from . import model_cache, telemetry
+from .dashboard import abuild_payload, build_payload
+from .dashboard_cache import acached_payload, cached_payload, payload_etag, payload_last_modified
+from .events import event_stream
+from .exports import EXPORT_FORMATS, export_stream, filter_predictions
+from .jobs import enqueue_bulk_prediction, fail_stale_jobs
+from .services import feature_fingerprints, model_version, patient_feature_row
+from .summary import record_predictions
+from .training import fail_stale_training, submit_training
 
-# Initialize predictor
-predictor = ReadmissionPredictor()
-
-# API endpoints for clinical dashboard tabs
+# API endpoints for clinical dashboard tabs. The ETag is the dashboard data
+# version, so a client that already has the current payload gets a 304
+# without any query or rendering; no-cache makes browsers revalidate.
 @csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=payload_etag('predictions'), last_modified_func=payload_last_modified('predictions'))
 def api_dashboard_data(request):
     """API endpoint for predictions tab data"""
     try:
-        active_model = MLModel.objects.filter(is_active=True).first()
-        recent_predictions = PredictionResult.objects.select_related('patient').all()[:10]
-        
-        # Calculate prediction statistics
-        total_predictions = PredictionResult.objects.count()
-        high_risk_count = PredictionResult.objects.filter(risk_category='high').count()
-        medium_risk_count = PredictionResult.objects.filter(risk_category='medium').count()
-        low_risk_count = PredictionResult.objects.filter(risk_category='low').count()
-        
-        # Render predictions HTML
-        html = render_to_string('predictions/partials/predictions_list.html', {
-            'predictions': recent_predictions,
-            'total_predictions': total_predictions,
-            'high_risk_count': high_risk_count,
-            'medium_risk_count': medium_risk_count,
-            'low_risk_count': low_risk_count
-        })
-        
-        return JsonResponse({
-            'success': True,
-            'html': html,
-            'active_model': {
-                'name': active_model.name if active_model else 'No active model',
-                'version': active_model.version if active_model else 'N/A',
-                'accuracy': float(active_model.accuracy) if active_model else 0.0,
-                'model_type': active_model.get_model_type_display() if active_model else 'N/A'
-            },
-            'stats': {
-                'total_predictions': total_predictions,
-                'high_risk_count': high_risk_count,
-                'medium_risk_count': medium_risk_count,
-                'low_risk_count': low_risk_count
-            }
-        })
+        return JsonResponse(cached_payload('predictions', lambda: build_payload('predictions')))
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -70,63 +41,12 @@ def api_dashboard_data(request):
         }, status=500)
 
 @csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=payload_etag('analytics'), last_modified_func=payload_last_modified('analytics'))
 def api_analytics(request):
     """API endpoint for analytics data"""
     try:
-        # Calculate real analytics from your data
-        total_patients = Patient.objects.count()
-        patients_with_predictions = Patient.objects.filter(ml_risk_score__gt=0).count()
-        
-        # Calculate average risk score
-        avg_risk_score_result = Patient.objects.filter(ml_risk_score__gt=0).aggregate(
-            avg_risk=Avg('ml_risk_score')
-        )
-        avg_risk_score = avg_risk_score_result['avg_risk'] or 0.0
-        
-        # Calculate average length of stay
-        avg_stay_result = Patient.objects.filter(length_of_stay__gt=0).aggregate(
-            avg_stay=Avg('length_of_stay')
-        )
-        avg_stay = avg_stay_result['avg_stay'] or 0.0
-        
-        # Mock readmission rate (replace with actual calculation)
-        readmission_rate = 12.5
-        
-        # Risk distribution
-        risk_distribution = {
-            'high': Patient.objects.filter(risk_category='high').count(),
-            'medium': Patient.objects.filter(risk_category='medium').count(),
-            'low': Patient.objects.filter(risk_category='low').count(),
-            'unknown': Patient.objects.filter(risk_category='unknown').count()
-        }
-        
-        # Model performance metrics
-        active_model = MLModel.objects.filter(is_active=True).first()
-        model_metrics = {
-            'accuracy': active_model.accuracy if active_model else 0.85,
-            'precision': getattr(active_model, 'precision', 0.82) if active_model else 0.82,
-            'recall': getattr(active_model, 'recall', 0.87) if active_model else 0.87,
-            'f1_score': 0.84  # Calculated from precision and recall
-        }
-        
-        # Render analytics HTML
-        html = render_to_string('predictions/partials/analytics_content.html')
-        
-        return JsonResponse({
-            'success': True,
-            'html': html,
-            'readmission_rate': readmission_rate,
-            'avg_risk_score': round(avg_risk_score * 100, 1),
-            'avg_stay': round(avg_stay, 1),
-            'total_assessed': patients_with_predictions,
-            'risk_distribution': risk_distribution,
-            'total_patients': total_patients,
-            'model_metrics': model_metrics,
-            'quick_stats': {
-                'avg_prediction_time': 2.3,
-                'success_rate': 95.7
-            }
-        })
+        return JsonResponse(cached_payload('analytics', lambda: build_payload('analytics')))
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -134,27 +54,77 @@ def api_analytics(request):
         }, status=500)
 
 @csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=payload_etag('models'), last_modified_func=payload_last_modified('models'))
 def api_models(request):
     """API endpoint for models management"""
     try:
-        models = MLModel.objects.all().order_by('-created_at')
-        
-        html = render_to_string('predictions/partials/models_list.html', {
-            'models': models
-        })
-        
+        return JsonResponse(cached_payload('models', lambda: build_payload('models')))
+    except Exception as e:
         return JsonResponse({
-            'success': True,
-            'html': html,
-            'total_models': models.count(),
-            'active_models': models.filter(is_active=True).count()
-        })
+            'success': False,
+            'error': f'Error loading models: {str(e)}'
+        }, status=500)
+
+# Async variants of the tab endpoints, routed instead of the above when
+# DASHBOARD_ASYNC_VIEWS is on (ASGI deployments): a cache miss runs the
+# tab's queries concurrently
+@csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=payload_etag('predictions'), last_modified_func=payload_last_modified('predictions'))
+async def api_dashboard_data_async(request):
+    """API endpoint for predictions tab data"""
+    try:
+        return JsonResponse(await acached_payload('predictions', lambda: abuild_payload('predictions')))
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Error loading dashboard data: {str(e)}'
+        }, status=500)
+
+@csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=payload_etag('analytics'), last_modified_func=payload_last_modified('analytics'))
+async def api_analytics_async(request):
+    """API endpoint for analytics data"""
+    try:
+        return JsonResponse(await acached_payload('analytics', lambda: abuild_payload('analytics')))
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Error loading analytics: {str(e)}'
+        }, status=500)
+
+@csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=payload_etag('models'), last_modified_func=payload_last_modified('models'))
+async def api_models_async(request):
+    """API endpoint for models management"""
+    try:
+        return JsonResponse(await acached_payload('models', lambda: abuild_payload('models')))
     except Exception as e:
         return JsonResponse({
             'success': False,
             'error': f'Error loading models: {str(e)}'
         }, status=500)
 
+async def prediction_events(request):
+    """Server-sent events: new predictions and updated counts as they are written"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be tied up for as long as the stream stays open
+        return JsonResponse({
+            'success': False,
+            'error': 'Live updates need the ASGI server (backend.asgi:application)'
+        }, status=503)
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def predict_readmission(request, patient_id):
@@ -169,42 +139,71 @@ def predict_readmission(request, patient_id):
                 'error': 'No active prediction model found'
             }, status=400)
         
-        # For demo purposes - use simulated prediction
-        prediction_result = simulate_prediction(patient)
-        
-        if prediction_result:
-            # Save prediction result
-            prediction_record = PredictionResult.objects.create(
-                patient=patient,
-                ml_model=active_model,
-                risk_score=prediction_result['risk_score'],
-                risk_category=prediction_result['risk_category'],
-                confidence=prediction_result['confidence'],
-                top_factors=prediction_result['top_factors']
-            )
+        with telemetry.timed(active_model.pk) as timer:
+            # Inputs and model unchanged since the last prediction: reuse it
+            with telemetry.stage('features'):
+                row = patient_feature_row(patient)
+                fingerprint = feature_fingerprints([row], model_version(active_model))[0]
+                latest = PredictionResult.objects.filter(patient=patient).order_by('-created_at', '-id').first()
+            if latest and latest.fingerprint == fingerprint:
+                timer.discard()
+                return JsonResponse({
+                    'success': True,
+                    'prediction_id': latest.id,
+                    'risk_score': latest.risk_score,
+                    'risk_category': latest.risk_category,
+                    'confidence': latest.confidence,
+                    'top_factors': latest.top_factors,
+                    'patient_id': patient.id,
+                    'patient_name': f"{patient.first_name} {patient.last_name}",
+                    'timestamp': latest.created_at.isoformat(),
+                    'unchanged': True
+                })
             
-            # Update patient with latest prediction
-            patient.ml_risk_score = prediction_result['risk_score']
-            patient.risk_category = prediction_result['risk_category']
-            patient.last_prediction_date = prediction_record.created_at
-            patient.save()
+            # Same row, predictor and rounding as bulk scoring, so both give
+            # this patient the same result (rule-based without an artifact)
+            predictor = model_cache.get_predictor(active_model)
+            batch = predictor.predict_batch(np.array([row]))
+            prediction_result = {
+                'risk_score': round(float(batch['risk_scores'][0]), 3),
+                'risk_category': str(batch['risk_categories'][0]),
+                'confidence': round(float(batch['confidences'][0]), 3),
+                'top_factors': batch['top_factors'][0]
+            }
             
-            return JsonResponse({
-                'success': True,
-                'prediction_id': prediction_record.id,
-                'risk_score': prediction_result['risk_score'],
-                'risk_category': prediction_result['risk_category'],
-                'confidence': prediction_result['confidence'],
-                'top_factors': prediction_result['top_factors'],
-                'patient_id': patient.id,
-                'patient_name': f"{patient.first_name} {patient.last_name}",
-                'timestamp': prediction_record.created_at.isoformat()
-            })
-        else:
-            return JsonResponse({
-                'success': False,
-                'error': 'Prediction failed'
-            }, status=500)
+            with telemetry.stage('write'), transaction.atomic():
+                # Save prediction result
+                prediction_record = PredictionResult.objects.create(
+                    patient=patient,
+                    ml_model=active_model,
+                    risk_score=prediction_result['risk_score'],
+                    risk_category=prediction_result['risk_category'],
+                    confidence=prediction_result['confidence'],
+                    top_factors=prediction_result['top_factors'],
+                    fingerprint=fingerprint
+                )
+                record_predictions(
+                    active_model.pk, [prediction_record.risk_category],
+                    [prediction_record.risk_score], [prediction_record.confidence]
+                )
+                
+                # Update patient with latest prediction
+                patient.ml_risk_score = prediction_result['risk_score']
+                patient.risk_category = prediction_result['risk_category']
+                patient.last_prediction_date = prediction_record.created_at
+                patient.save(update_fields=['ml_risk_score', 'risk_category', 'last_prediction_date'])
+
+        return JsonResponse({
+            'success': True,
+            'prediction_id': prediction_record.id,
+            'risk_score': prediction_result['risk_score'],
+            'risk_category': prediction_result['risk_category'],
+            'confidence': prediction_result['confidence'],
+            'top_factors': prediction_result['top_factors'],
+            'patient_id': patient.id,
+            'patient_name': f"{patient.first_name} {patient.last_name}",
+            'timestamp': prediction_record.created_at.isoformat()
+        })
             
     except Exception as e:
         return JsonResponse({
@@ -215,17 +214,17 @@ def predict_readmission(request, patient_id):
 @csrf_exempt
 @require_http_methods(["POST"])
 def bulk_predict(request):
-    """API endpoint for bulk predictions"""
+    """API endpoint for bulk predictions (clinicians and staff)"""
+    user = request.user
+    if not (user.is_authenticated and (user.is_staff or getattr(user, 'role', '') in ('admin', 'staff', 'clinician'))):
+        return JsonResponse({'success': False, 'error': 'Clinician or staff access required'}, status=403)
+    
+    try:
+        patient_ids = [int(patient_id) for patient_id in request.POST.getlist('patient_ids')]
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'patient_ids must be integers'}, status=400)
+    
     try:
-        patient_ids = request.POST.getlist('patient_ids') or []
-        
-        if not patient_ids:
-            # If no specific patients, get all patients without predictions
-            patients = Patient.objects.filter(ml_risk_score=0)[:50]  # Limit to 50 for performance
-        else:
-            patients = Patient.objects.filter(id__in=patient_ids)
-        
-        results = []
         active_model = MLModel.objects.filter(is_active=True).first()
         
         if not active_model:
@@ -234,40 +233,16 @@ def bulk_predict(request):
                 'error': 'No active prediction model found'
             })
         
-        for patient in patients:
-            # Use simulated prediction for demo
-            prediction_result = simulate_prediction(patient)
-            
-            if prediction_result:
-                # Save prediction result
-                prediction_record = PredictionResult.objects.create(
-                    patient=patient,
-                    ml_model=active_model,
-                    risk_score=prediction_result['risk_score'],
-                    risk_category=prediction_result['risk_category'],
-                    confidence=prediction_result['confidence'],
-                    top_factors=prediction_result['top_factors']
-                )
-                
-                # Update patient
-                patient.ml_risk_score = prediction_result['risk_score']
-                patient.risk_category = prediction_result['risk_category']
-                patient.last_prediction_date = prediction_record.created_at
-                patient.save()
-                
-                results.append({
-                    'patient_id': patient.id,
-                    'patient_name': f"{patient.first_name} {patient.last_name}",
-                    'risk_score': prediction_result['risk_score'],
-                    'risk_category': prediction_result['risk_category']
-                })
+        # Scoring runs on a background worker; the client polls job_status
+        job = enqueue_bulk_prediction(active_model, patient_ids)
         
         return JsonResponse({
             'success': True,
-            'message': f'Successfully generated predictions for {len(results)} patients',
-            'results': results,
-            'total_processed': len(results)
-        })
+            'message': 'Bulk prediction job queued',
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse('predictions:job_status', args=[job.id])
+        }, status=202)
         
     except Exception as e:
         return JsonResponse({
@@ -275,40 +250,121 @@ def bulk_predict(request):
             'error': f'Bulk prediction error: {str(e)}'
         }, status=500)
 
+@require_http_methods(["GET"])
+def explain_prediction(request, prediction_id):
+    """API endpoint returning the top factors of a prediction, computing them on first access"""
+    try:
+        prediction = get_object_or_404(PredictionResult.objects.select_related('patient', 'ml_model'), id=prediction_id)
+        
+        if not prediction.top_factors:
+            row = [patient_feature_row(prediction.patient)]
+            fingerprint = feature_fingerprints(row, model_version(prediction.ml_model))[0]
+            if prediction.fingerprint and prediction.fingerprint != fingerprint:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Patient data or model changed since this prediction; run a new prediction'
+                }, status=409)
+            
+            predictor = model_cache.get_predictor(prediction.ml_model)
+            prediction.top_factors = predictor.explain(row)[0]
+            prediction.save(update_fields=['top_factors'])
+        
+        return JsonResponse({
+            'success': True,
+            'prediction_id': prediction.id,
+            'risk_score': prediction.risk_score,
+            'risk_category': prediction.risk_category,
+            'top_factors': prediction.top_factors
+        })
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Explanation error: {str(e)}'
+        }, status=500)
+
+@require_http_methods(["GET"])
+def job_status(request, job_id):
+    """API endpoint reporting progress of a bulk prediction job"""
+    fail_stale_jobs()
+    job = get_object_or_404(PredictionJob, id=job_id)
+    
+    return JsonResponse({
+        'success': job.status != 'failed',
+        'job_id': job.id,
+        'status': job.status,
+        'processed': job.processed,
+        'total': job.total,
+        'skipped': job.skipped,
+        'throughput': round(job.throughput, 1),
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    })
+
+@require_http_methods(["GET"])
+def export_predictions(request):
+    """Stream the filtered PredictionResult history as CSV or NDJSON (staff only)"""
+    user = request.user
+    if not (user.is_authenticated and (user.is_staff or getattr(user, 'role', '') in ('admin', 'staff'))):
+        return JsonResponse({'success': False, 'error': 'Staff access required'}, status=403)
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({
+            'success': False,
+            'error': f'Unsupported format: {export_format}'
+        }, status=400)
+    
+    try:
+        queryset = filter_predictions(
+            date_from=request.GET.get('from'),
+            date_to=request.GET.get('to'),
+            model_id=request.GET.get('model'),
+            risk_category=request.GET.get('risk_category'),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': f'Invalid filter: {str(e)}'}, status=400)
+    
+    response = StreamingHttpResponse(export_stream(queryset, export_format), content_type=EXPORT_FORMATS[export_format])
+    filename = f'predictions-{timezone.now():%Y%m%d-%H%M%S}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def train_model(request):
-    """API endpoint to train a new ML model"""
+    """API endpoint to train a new ML model (staff only)"""
+    user = request.user
+    if not (user.is_authenticated and (user.is_staff or getattr(user, 'role', '') in ('admin', 'staff'))):
+        return JsonResponse({'success': False, 'error': 'Staff access required'}, status=403)
+    
     try:
-        # This would integrate with your actual ML training pipeline
-        # For now, we'll simulate model training
-        
         model_type = request.POST.get('model_type', 'logistic')
         model_name = request.POST.get('model_name', f'New {model_type} Model')
         
-        # Simulate training process
-        import time
-        time.sleep(2)  # Simulate training time
+        if model_type not in dict(MLModel.MODEL_TYPES):
+            return JsonResponse({
+                'success': False,
+                'error': f'Unknown model type: {model_type}'
+            }, status=400)
         
-        # Create a new model instance (in real scenario, this would be your trained model)
+        # Fitting happens in the training process pool, never in this request
         new_model = MLModel.objects.create(
             name=model_name,
             model_type=model_type,
-            version='1.0',
-            accuracy=0.85,  # Simulated accuracy
-            precision=0.82,
-            recall=0.87,
-            feature_importance={'age': 0.15, 'previous_admissions': 0.25, 'chronic_conditions': 0.30},
+            version=f'{MLModel.objects.filter(model_type=model_type).count() + 1}.0',
+            status='training',
             is_active=False
         )
+        submit_training(new_model)
         
         return JsonResponse({
             'success': True,
-            'message': f'Model {model_name} trained successfully',
+            'message': f'Training of {model_name} started',
             'model_id': new_model.id,
             'model_name': new_model.name,
-            'accuracy': new_model.accuracy
-        })
+            'status': new_model.status
+        }, status=202)
         
     except Exception as e:
         return JsonResponse({
@@ -321,14 +377,30 @@ def train_model(request):
 def activate_model(request, model_id):
     """API endpoint to activate a specific model"""
     try:
+        fail_stale_training()
         model = get_object_or_404(MLModel, id=model_id)
         
-        # Deactivate all other models
-        MLModel.objects.filter(is_active=True).update(is_active=False)
+        if model.status != 'ready':
+            return JsonResponse({
+                'success': False,
+                'error': f'Model {model.name} is not ready ({model.get_status_display()})'
+            }, status=400)
+        
+        # Make sure the artifact deserializes before switching over to it
+        predictor = model_cache.get_predictor(model)
+        
+        with transaction.atomic():
+            # Deactivate all other models (at most one may be active)
+            MLModel.objects.filter(is_active=True).update(is_active=False)
+            
+            # Activate the selected model
+            model.is_active = True
+            model.save()
         
-        # Activate the selected model
-        model.is_active = True
-        model.save()
+        # Saving bumped updated_at; drop the old versions and keep the
+        # already loaded artifact under the new one
+        model_cache.invalidate()
+        model_cache.put(model, predictor)
         
         return JsonResponse({
             'success': True,
@@ -342,59 +414,3 @@ def activate_model(request, model_id):
             'success': False,
             'error': f'Error activating model: {str(e)}'
         }, status=500)
-
-# Helper functions
-def prepare_patient_data(patient):
-    """Prepare patient data for prediction"""
-    return {
-        'age': patient.age or 0,
-        'previous_admissions': patient.previous_admissions or 0,
-        'chronic_conditions_count': len(patient.chronic_conditions or []),
-        'medication_count': patient.medication_count or 0,
-        'length_of_stay': patient.length_of_stay or 0,
-        'social_support_score': patient.social_support_score or 0,
-        'transportation_access': patient.transportation_access or True,
-        'emergency_admission': getattr(patient, 'emergency_admission', False)
-    }
-
-def simulate_prediction(patient):
-    """Simulate prediction for demo purposes"""
-    # Simple risk calculation based on patient factors
-    base_risk = 0.1
-    age_factor = min(0.3, (patient.age or 50) / 200)
-    admissions_factor = min(0.3, (patient.previous_admissions or 0) * 0.1)
-    conditions_factor = min(0.3, len(patient.chronic_conditions or []) * 0.08)
-    stay_factor = min(0.2, (patient.length_of_stay or 5) / 50)
-    
-    risk_score = base_risk + age_factor + admissions_factor + conditions_factor + stay_factor
-    risk_score = min(0.95, risk_score)  # Cap at 95%
-    
-    # Add some randomness
-    risk_score += random.uniform(-0.1, 0.1)
-    risk_score = max(0.05, min(0.95, risk_score))
-    
-    # Determine risk category
-    if risk_score > 0.6:
-        risk_category = 'high'
-    elif risk_score > 0.3:
-        risk_category = 'medium'
-    else:
-        risk_category = 'low'
-    
-    # Simulate confidence
-    confidence = random.uniform(0.7, 0.95)
-    
-    # Simulate top factors
-    top_factors = {
-        'Age': round(age_factor * 100, 1),
-        'Previous Admissions': round(admissions_factor * 100, 1),
-        'Chronic Conditions': round(conditions_factor * 100, 1),
-        'Length of Stay': round(stay_factor * 100, 1)
-    }
-    
-    return {
-        'risk_score': round(risk_score, 3),
-        'risk_category': risk_category,
-        'confidence': round(confidence, 3),
-        'top_factors': top_factors
-    }
\ No newline at end of file
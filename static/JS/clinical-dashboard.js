@@ -15,12 +15,45 @@ function showTab(tabName) {
     }
 }
 
+// Last payload and ETag per dashboard API URL
+const tabPayloads = {};
+
+// Fetch a dashboard API, revalidating the payload we already have; resolves
+// to {data, changed} where changed is false when the server answered 304
+function fetchTabData(url) {
+    const cached = tabPayloads[url];
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    
+    return fetch(url, { headers: headers, cache: 'no-store' })
+        .then(response => {
+            if (response.status === 304 && cached) {
+                return { data: cached.data, changed: false };
+            }
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json().then(data => {
+                const etag = response.headers.get('ETag');
+                if (etag && data.success) {
+                    tabPayloads[url] = { etag: etag, data: data };
+                }
+                return { data: data, changed: true };
+            });
+        })
+        .catch(error => {
+            // The tab now shows an error; fetch everything next time
+            delete tabPayloads[url];
+            throw error;
+        });
+}
+
 // Load Predictions Tab Content
 function loadPredictionsTab() {
     console.log('Loading predictions tab...');
+    const url = '/predictions/api/dashboard-data/';
     
-    // Show loading state
-    document.getElementById('predictions-content').innerHTML = `
+    // Show loading state (unless the current content just needs revalidating)
+    if (!tabPayloads[url]) document.getElementById('predictions-content').innerHTML = `
         <div class="text-center py-5">
             <div class="spinner-border text-primary" role="status">
                 <span class="visually-hidden">Loading predictions...</span>
@@ -29,14 +62,12 @@ function loadPredictionsTab() {
         </div>
     `;
 
-    fetch('/predictions/api/dashboard-data/')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Network response was not ok');
+    fetchTabData(url)
+        .then(({ data, changed }) => {
+            if (!changed) {
+                console.log('Predictions tab unchanged');
+                return;
             }
-            return response.json();
-        })
-        .then(data => {
             if (data.success) {
                 // Update the predictions tab with the HTML content
                 document.getElementById('predictions-content').innerHTML = data.html;
@@ -49,12 +80,7 @@ function loadPredictionsTab() {
                 }
                 
                 // Update statistics
-                if (document.getElementById('total-predictions')) {
-                    document.getElementById('total-predictions').textContent = data.stats.total_predictions;
-                    document.getElementById('high-risk-count').textContent = data.stats.high_risk_count;
-                    document.getElementById('medium-risk-count').textContent = data.stats.medium_risk_count;
-                    document.getElementById('low-risk-count').textContent = data.stats.low_risk_count;
-                }
+                updatePredictionStats(data.stats);
                 
                 console.log('Predictions tab loaded successfully');
             } else {
@@ -75,18 +101,87 @@ function loadPredictionsTab() {
         });
 }
 
+function updatePredictionStats(stats) {
+    if (document.getElementById('total-predictions')) {
+        document.getElementById('total-predictions').textContent = stats.total_predictions;
+        document.getElementById('high-risk-count').textContent = stats.high_risk_count;
+        document.getElementById('medium-risk-count').textContent = stats.medium_risk_count;
+        document.getElementById('low-risk-count').textContent = stats.low_risk_count;
+    }
+}
+
+// Live prediction updates pushed by the server; the predictions tab is
+// patched in place instead of being fetched again
+const RECENT_PREDICTION_ROWS = 10;
+
+function connectPredictionEvents() {
+    // The page says whether it was served by the ASGI server, the only one
+    // that streams events; elsewhere the stream answers 503
+    if (!window.EventSource || document.body.dataset.liveUpdates !== 'true') return;
+    
+    let opened = false;
+    const source = new EventSource('/predictions/events/');
+    source.onopen = () => {
+        opened = true;
+    };
+    source.addEventListener('predictions', event => {
+        const data = JSON.parse(event.data);
+        updatePredictionStats(data.stats);
+        prependPredictionRows(data.predictions);
+    });
+    source.addEventListener('refresh', event => {
+        updatePredictionStats(JSON.parse(event.data).stats);
+    });
+    source.onerror = () => {
+        // The browser reconnects a dropped stream on its own; one that was
+        // refused or never opened would only be retried every few seconds
+        if (source.readyState === EventSource.CLOSED || !opened) {
+            source.close();
+            console.log('Live prediction updates unavailable');
+        }
+    };
+}
+
+function prependPredictionRows(predictions) {
+    const tbody = document.getElementById('recent-predictions-rows');
+    if (!tbody) return;
+    
+    tbody.querySelectorAll('.no-predictions').forEach(row => row.remove());
+    // Events list the newest prediction first
+    predictions.slice().reverse().forEach(prediction => {
+        if (tbody.querySelector(`tr[data-prediction-id="${prediction.id}"]`)) return;
+        tbody.insertAdjacentHTML('afterbegin', renderPredictionRow(prediction));
+    });
+    while (tbody.rows.length > RECENT_PREDICTION_ROWS) {
+        tbody.deleteRow(-1);
+    }
+}
+
+function renderPredictionRow(prediction) {
+    const risk = escapeHtml(prediction.risk_category);
+    const created = new Date(prediction.created_at);
+    return `
+        <tr data-prediction-id="${prediction.id}">
+            <td>${escapeHtml(prediction.patient_name)} <small class="text-muted">${escapeHtml(prediction.patient_id)}</small></td>
+            <td><span class="risk-score ${risk}">${risk.charAt(0).toUpperCase() + risk.slice(1)} Risk</span></td>
+            <td>${Math.round(prediction.risk_score * 100)}%</td>
+            <td>${Math.round(prediction.confidence * 100)}%</td>
+            <td>${created.toLocaleString([], { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' })}</td>
+            <td><button class="btn btn-outline btn-sm" onclick="viewPredictionDetails(${prediction.id})">Details</button></td>
+        </tr>
+    `;
+}
+
 // Load Analytics Tab Content
 function loadAnalyticsTab() {
     console.log('Loading analytics tab...');
     
-    fetch('/predictions/api/analytics/')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Network response was not ok');
+    fetchTabData('/predictions/api/analytics/')
+        .then(({ data, changed }) => {
+            if (!changed) {
+                console.log('Analytics tab unchanged');
+                return;
             }
-            return response.json();
-        })
-        .then(data => {
             if (data.success) {
                 // Update analytics metrics
                 document.getElementById('readmission-rate').textContent = data.readmission_rate + '%';
@@ -120,14 +215,12 @@ function loadAnalyticsTab() {
 function loadModelsTab() {
     console.log('Loading models tab...');
     
-    fetch('/predictions/api/models/')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Network response was not ok');
+    fetchTabData('/predictions/api/models/')
+        .then(({ data, changed }) => {
+            if (!changed) {
+                console.log('Models tab unchanged');
+                return;
             }
-            return response.json();
-        })
-        .then(data => {
             if (data.success) {
                 // Update the models tab with the HTML content
                 document.getElementById('models-content').innerHTML = data.html;
@@ -259,8 +352,11 @@ function updatePerformanceMetrics(metrics) {
 
 function updateQuickStats(stats) {
     if (document.getElementById('avg-prediction-time')) {
-        document.getElementById('avg-prediction-time').textContent = stats.avg_prediction_time + 's';
-        document.getElementById('success-rate').textContent = stats.success_rate + '%';
+        // Measured values; null until the active model has made a prediction
+        document.getElementById('avg-prediction-time').textContent =
+            stats.avg_prediction_time === null ? '--ms' : stats.avg_prediction_time.toFixed(1) + 'ms';
+        document.getElementById('success-rate').textContent =
+            stats.success_rate === null ? '--%' : stats.success_rate + '%';
     }
 }
 
@@ -283,27 +379,99 @@ function loadMonthlyReport() {
     console.log('Loading report for:', period);
 }
 
-// Patient Filtering
-function filterPatients(riskLevel) {
-    const patients = document.querySelectorAll('.patient-item');
+// Patient List (filtered, searched and paged on the server)
+const patientListState = {
+    riskLevel: 'all',
+    query: '',
+    sort: '-ml_risk_score',
+    cursor: null
+};
+
+function loadPatients(reset = true) {
+    const container = document.getElementById('patient-list-container');
+    const loadMore = document.getElementById('load-more-patients');
+    const params = new URLSearchParams({ sort: patientListState.sort, limit: 50 });
+    if (patientListState.riskLevel !== 'all') {
+        params.set('risk_category', patientListState.riskLevel);
+    }
+    if (patientListState.query) {
+        params.set('q', patientListState.query);
+    }
+    if (!reset && patientListState.cursor) {
+        params.set('cursor', patientListState.cursor);
+    }
+    
+    fetch(`/patients/api/patients/?${params}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.error);
+            }
+            if (reset) {
+                container.innerHTML = data.patients.length ? '' : '<p>No patients found.</p>';
+            }
+            container.insertAdjacentHTML('beforeend', data.patients.map(renderPatientItem).join(''));
+            updatePatientOptions(data.patients, reset);
+            
+            patientListState.cursor = data.next_cursor;
+            loadMore.style.display = data.next_cursor ? 'inline-block' : 'none';
+        })
+        .catch(error => {
+            console.error('Error loading patients:', error);
+            container.innerHTML = `<p>Error loading patients: ${escapeHtml(error.message)}</p>`;
+            loadMore.style.display = 'none';
+        });
+}
+
+function loadMorePatients() {
+    loadPatients(false);
+}
+
+function renderPatientItem(patient) {
+    const risk = escapeHtml(patient.risk_category);
+    return `
+        <div class="patient-item" data-risk="${risk}">
+            <div class="patient-info">
+                <h4>${escapeHtml(patient.first_name)} ${escapeHtml(patient.last_name)}</h4>
+                <p>ID: ${escapeHtml(patient.patient_id)} • Age: ${escapeHtml(patient.age)}</p>
+            </div>
+            <div class="risk-score ${risk}">
+                ${risk.charAt(0).toUpperCase() + risk.slice(1)} Risk
+            </div>
+            <button class="btn btn-outline" onclick="viewPatient(${patient.id})">View Profile</button>
+        </div>
+    `;
+}
+
+// Keep the assessment form's patient choices in step with the loaded list
+function updatePatientOptions(patients, reset) {
+    const select = document.getElementById('patient');
+    if (!select) return;
+    if (reset) {
+        select.length = 1;
+    }
     patients.forEach(patient => {
-        if (riskLevel === 'all' || patient.dataset.risk === riskLevel) {
-            patient.style.display = 'flex';
-        } else {
-            patient.style.display = 'none';
-        }
+        select.add(new Option(`${patient.first_name} ${patient.last_name} (${patient.patient_id})`, patient.id));
     });
+}
+
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value ?? '';
+    return div.innerHTML;
+}
+
+// Patient Filtering
+function filterPatients(riskLevel) {
+    patientListState.riskLevel = riskLevel;
+    loadPatients();
     showTab('dashboard');
 }
 
 // Search Patients
 function searchPatients() {
-    const query = document.getElementById('searchInput').value.toLowerCase();
-    const patients = document.querySelectorAll('.patient-item');
-    patients.forEach(patient => {
-        const text = patient.textContent.toLowerCase();
-        patient.style.display = text.includes(query) ? 'flex' : 'none';
-    });
+    patientListState.query = document.getElementById('searchInput').value.trim();
+    loadPatients();
 }
 
 // Run Bulk Predictions
@@ -319,8 +487,7 @@ function runBulkPredictions() {
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                alert(`Success! Generated ${data.total_processed} predictions.`);
-                loadPredictionsTab(); // Refresh the predictions tab
+                pollPredictionJob(data.status_url);
             } else {
                 alert('Error: ' + data.error);
             }
@@ -331,6 +498,25 @@ function runBulkPredictions() {
     }
 }
 
+// Poll a queued bulk prediction job until it finishes
+function pollPredictionJob(statusUrl) {
+    fetch(statusUrl)
+        .then(response => response.json())
+        .then(job => {
+            if (job.status === 'completed') {
+                alert(`Success! Generated ${job.processed} predictions.`);
+                loadPredictionsTab(); // Refresh the predictions tab
+            } else if (job.status === 'failed') {
+                alert('Error: ' + job.error);
+            } else {
+                setTimeout(() => pollPredictionJob(statusUrl), 1000);
+            }
+        })
+        .catch(error => {
+            alert('Error checking prediction progress: ' + error.message);
+        });
+}
+
 // Train New Model
 function trainNewModel() {
     if (confirm('Start training a new machine learning model?')) {
@@ -345,7 +531,7 @@ function trainNewModel() {
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                alert(`Model trained successfully! Accuracy: ${(data.accuracy * 100).toFixed(1)}%`);
+                alert(`${data.message}. It will appear as ready in the models list when training finishes.`);
                 loadModelsTab(); // Refresh the models tab
             } else {
                 alert('Error: ' + data.error);
@@ -429,9 +615,23 @@ function viewPatient(patientId) {
     alert(`View patient details for ID: ${patientId} - to be implemented`);
 }
 
-// View prediction details
+// View prediction details (factors are computed on first open when explanations are lazy)
 function viewPredictionDetails(predictionId) {
-    alert(`View prediction details for ID: ${predictionId} - to be implemented`);
+    fetch(`/predictions/prediction/${predictionId}/explain/`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                const factors = Object.entries(data.top_factors)
+                    .map(([factor, weight]) => `${factor}: ${weight > 0 ? '+' : ''}${weight}%`)
+                    .join('\n');
+                alert(`Risk: ${(data.risk_score * 100).toFixed(1)}% (${data.risk_category})\n\nTop factors:\n${factors}`);
+            } else {
+                alert('Error: ' + data.error);
+            }
+        })
+        .catch(error => {
+            alert('Error loading prediction details: ' + error.message);
+        });
 }
 
 // Initialize dashboard
@@ -441,11 +641,15 @@ function initDashboard() {
     // Initialize modal functionality
     initModal();
     
-    // Load all tabs initially
+    // Load the first page of patients and all tabs initially
+    loadPatients();
     loadPredictionsTab();
     loadAnalyticsTab();
     loadModelsTab();
     
+    // Then keep the predictions tab current without polling
+    connectPredictionEvents();
+    
     console.log('Clinical dashboard initialized successfully');
 }
 